@@ -0,0 +1,16 @@
+import pytest
+
+from tools import synthetic
+
+# Small enough to be written in a moment, with every ECU identified and a few rotated log files
+SESSION = synthetic.Session(
+    ecu_count=2, parents_per_ecu=4, children_per_parent=3, reads=2000, files=3
+)
+
+
+@pytest.fixture(scope="session")
+def synthetic_session(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> tuple[str, list[str]]:
+    """Path of the db and paths of the logs of `SESSION`, see `synthetic.write_session`."""
+    return synthetic.write_session(SESSION, str(tmp_path_factory.mktemp("synthetic")))
@@ -0,0 +1,96 @@
+import pytest
+
+from vidalicet._bus import _layout, child_blocks
+from vidalicet._bus.common import EcuBlockId, RawReading
+from vidalicet._db.child_blocks import DbChildBlockSpec
+from vidalicet.stats import IngestionStats
+
+EB_ID = EcuBlockId(ecu_variant_id=1, parent_block_id=10)
+
+
+def spec(
+    block_id: int,
+    offset: int,
+    length: int,
+    ppe_scaling: str = "x",
+    data_type: str = "Unsigned",
+) -> DbChildBlockSpec:
+    return DbChildBlockSpec(
+        id=block_id,
+        length=length,
+        offset=offset,
+        data_type=data_type,
+        scaling="x",
+        ppe_scaling=ppe_scaling,
+        name=f"block {block_id}",
+        text="",
+        ppe_text="",
+        ppe_unit_text="",
+    )
+
+
+@pytest.fixture(
+    params=[
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not child_blocks.HAS_NUMPY, reason="NumPy not installed"
+            ),
+        ),
+    ],
+    ids=["python", "vectorized"],
+)
+def extractor(request: pytest.FixtureRequest) -> child_blocks.BlockExtractor:
+    extractor = child_blocks.BlockExtractor(None, vectorize=request.param)
+    extractor.add_child_specs(
+        {
+            (EB_ID.ecu_variant_id, EB_ID.parent_block_id): [
+                spec(11, 0, 8, "x"),
+                spec(12, 8, 16, "x/10"),
+            ]
+        },
+        [EB_ID.ecu_variant_id],
+    )
+    return extractor
+
+
+def test_short_payload_drops_only_fields_past_its_end(
+    extractor: child_blocks.BlockExtractor,
+):
+    readings = [
+        RawReading(EB_ID, bytes([1, 0x01, 0x00]), 100),
+        # Too short for the second field
+        RawReading(EB_ID, bytes([2, 0x02]), 200),
+        RawReading(EB_ID, bytes([3, 0x03, 0x00, 0xFF]), 300),
+    ]
+    stats = IngestionStats()
+    first, second = extractor.extract_children(readings, stats)
+
+    assert list(first.timestamps) == [100, 200, 300]
+    assert list(first.values) == [1, 2, 3]
+    assert list(second.timestamps) == [100, 300]
+    assert list(second.values) == [25.6, 76.8]
+    assert stats.short_payload_count == 1
+
+
+def test_field_past_every_payload_is_omitted(extractor: child_blocks.BlockExtractor):
+    readings = [RawReading(EB_ID, bytes([1]), 100), RawReading(EB_ID, bytes([2]), 200)]
+    (first,) = extractor.extract_children(readings)
+    assert first.block_id == 11
+    assert list(first.values) == [1, 2]
+
+
+def test_block_layout_reasons():
+    layout = _layout.create_block_layout(
+        [
+            spec(11, 0, 8),
+            spec(12, 8, 40),
+            spec(13, 8, 16, data_type="ASCII"),
+            spec(14, 8, 16, data_type="Signed"),
+        ]
+    )
+    assert [field.spec.id for field in layout.fields] == [11, 14]
+    assert [field.kind for field in layout.fields] == ["unsigned", "signed"]
+    assert layout.payload_length == 3
+    assert layout.unsupported_reasons == ["unsupported_length", "unsupported_data_type"]
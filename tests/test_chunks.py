@@ -0,0 +1,67 @@
+import pytest
+
+from tools import synthetic
+from vidalicet._log_parsing import chunks, common, params
+
+
+class LineCollector(chunks.LineScanner):
+    lines: list[str]
+
+    def __init__(self) -> None:
+        super().__init__(params.PARAMETER_NEEDLES, count_lines=True, encoding="utf-8")
+        self.lines = []
+
+    def _parse_line(self, line: str, kind: common.LineKind) -> None:
+        self.lines.append(line)
+
+
+@pytest.fixture
+def log_data() -> bytes:
+    session = synthetic.Session(ecu_count=1, parents_per_ecu=2, reads=50)
+    data = "".join(synthetic.generate_lines(session)).encode()
+    # A relevant line longer than several chunks
+    long_line = b"12:00:00,000 VehComm response: '" + b"00" * 100 + b"'\n"
+    return data + long_line + data + b"12:00:00,000 VehComm response: 'AB"
+
+
+def expected_lines(data: bytes) -> list[str]:
+    return [
+        line
+        for line in data.decode().splitlines(keepends=True)
+        if line.endswith("\n") and common.classify_line(line) in ("request", "response")
+    ]
+
+
+def test_line_scanner_is_abstract():
+    with pytest.raises(TypeError):
+        chunks.LineScanner(params.PARAMETER_NEEDLES)  # type: ignore[abstract]
+
+
+@pytest.mark.parametrize("use_mmap", [False, True], ids=["read", "mmap"])
+@pytest.mark.parametrize("offset", [0, 1000])
+def test_feed_file(log_data: bytes, tmp_path, monkeypatch, use_mmap: bool, offset: int):
+    monkeypatch.setattr(chunks, "CHUNK_SIZE", 64)
+    path = tmp_path / "car.log"
+    path.write_bytes(log_data)
+    # Ingestion resumes at line boundaries
+    offset = log_data.rfind(b"\n", 0, offset) + 1
+
+    scanner = LineCollector()
+    offsets = list(scanner.feed_file(str(path), use_mmap, offset))
+    assert offsets[-1] == len(log_data)
+    assert all(b - a <= 64 for a, b in zip([offset, *offsets], offsets))
+    partial_length = len(log_data) - log_data.rfind(b"\n") - 1
+    assert scanner.discard_partial() == partial_length
+
+    rest = log_data[offset:]
+    assert scanner.lines == expected_lines(rest)
+    assert scanner.pop_line_counts() == (rest.count(b"\n"), len(scanner.lines))
+
+
+def test_end_file_parses_last_line(log_data: bytes):
+    scanner = LineCollector()
+    for i in range(0, len(log_data), 100):
+        scanner.feed(log_data[i : i + 100])
+    scanner.end_file()
+    assert scanner.lines[-1] == "12:00:00,000 VehComm response: 'AB"
+    assert scanner.lines[:-1] == expected_lines(log_data)
@@ -0,0 +1,67 @@
+import csv
+import io
+import os
+
+import pytest
+
+from tools import create_db
+
+COLUMNS = ("text_id", "data")
+
+# Exported by PowerShell: a BOM, CRLF line breaks, and values quoted where needed
+DUMP = (
+    "\ufeffextra,text_id,data\r\n"
+    "x,1,plain\r\n"
+    'x,2,"with ""doubled"" quotes"\r\n'
+    'x,3,"line\r\nbreak"\r\n'
+    'x,4,"ends with a quote """\r\n'
+    'x,5,""""\r\n'
+    '"multi\r\n""quoted""\r\nlines",6,""\r\n'
+    "\r\n"
+    'x,7,"äö ∞, and a comma"\r\n'
+    'x,8,"LF only\nbreak"\n'
+    'x,9,"""\r\n"""\r\n'
+    "x,10,last row without a line break"
+)
+
+
+@pytest.fixture
+def dump_path(tmp_path) -> str:
+    path = str(tmp_path / "texts.csv")
+    with open(path, "wb") as f:
+        f.write(DUMP.encode("utf-8"))
+    return path
+
+
+def dict_reader_rows(path: str) -> list[tuple[str, ...]]:
+    """Rows of the dump as read before it was split into batches."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return [tuple(row[column] for column in COLUMNS) for row in csv.DictReader(f)]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3, 5, 8, 13, 1 << 20])
+def test_batches_match_dict_reader(dump_path: str, batch_size: int):
+    expected = dict_reader_rows(dump_path)
+    assert len(expected) == 10
+
+    header, ranges = create_db.split_dump(dump_path, batch_size)
+    assert header == ["extra", "text_id", "data"]
+    assert [end for _, end in ranges[:-1]] == [start for start, _ in ranges[1:]]
+    assert ranges[-1][1] == os.path.getsize(dump_path)
+
+    rows: list[tuple[str, ...]] = []
+    parsed: list[create_db.Row] = []
+    with open(dump_path, "rb") as f:
+        for start, end in ranges:
+            f.seek(start)
+            dump = io.TextIOWrapper(io.BytesIO(f.read(end - start)), encoding="utf-8")
+            rows.extend(map(tuple, create_db.read_rows(dump, header, COLUMNS)))
+            parsed.extend(create_db.parse_batch("texts", dump_path, header, start, end))
+    assert rows == expected
+    assert parsed == create_db.parse_texts(expected)
+
+
+def test_empty_dump(tmp_path):
+    path = str(tmp_path / "texts.csv")
+    open(path, "wb").close()
+    assert create_db.split_dump(path) == ([], [])
@@ -0,0 +1,95 @@
+import pytest
+
+from vidalicet._bus.common import EcuBlockId, RawReading
+from vidalicet._bus.matching import MessageMatcher
+from vidalicet._db.matching import DbParentBlockMatchData
+from vidalicet._log_parsing.params import RawParamRxMsg
+from vidalicet.stats import IngestionStats
+
+CAN_ID = "7E8"
+
+# Each compare value is a prefix of the next, longer one
+COMPARE_VALUES = {"0x12": 1, "0x1234": 2, "0x123456": 3, "0xF1": 4}
+
+
+@pytest.fixture(scope="module")
+def matcher() -> MessageMatcher:
+    return MessageMatcher(
+        [
+            DbParentBlockMatchData(
+                block_id=block_id,
+                ecu_variant_id=100,
+                can_id_rx=CAN_ID,
+                compare_value=compare_value,
+            )
+            for compare_value, block_id in COMPARE_VALUES.items()
+        ]
+        + [
+            DbParentBlockMatchData(
+                block_id=5, ecu_variant_id=200, can_id_rx="7E9", compare_value="0x1234"
+            )
+        ]
+    )
+
+
+def message(text: str, can_id: str = CAN_ID) -> RawParamRxMsg:
+    return RawParamRxMsg(ecu_addr=can_id, message=text, time=0)
+
+
+@pytest.mark.parametrize(
+    "text, block_id, payload",
+    [
+        ("62123456AABB", 3, b"\xaa\xbb"),
+        ("621234AABB", 2, b"\xaa\xbb"),
+        ("6212AABB", 1, b"\xaa\xbb"),
+        # Same as a longer compare value, but without payload
+        ("62123456", 3, b""),
+        ("621234", 2, b""),
+        ("62F1", 4, b""),
+    ],
+)
+def test_longest_compare_value_wins(
+    matcher: MessageMatcher, text: str, block_id: int, payload: bytes
+):
+    assert matcher.match_one(message(text)) == RawReading(
+        id=EcuBlockId(ecu_variant_id=100, parent_block_id=block_id),
+        payload=payload,
+        time=0,
+    )
+
+
+def test_compare_values_are_per_can_id(matcher: MessageMatcher):
+    reading = matcher.match_one(message("62123456AA", can_id="7E9"))
+    assert reading is not None
+    assert reading.id == EcuBlockId(ecu_variant_id=200, parent_block_id=5)
+    assert reading.payload == b"\x56\xaa"
+
+
+@pytest.mark.parametrize(
+    "text, can_id",
+    [
+        ("62F2AABB", CAN_ID),
+        ("6213", CAN_ID),
+        ("62", CAN_ID),
+        ("621234", "7E0"),
+        # Odd number of hex digits in the payload
+        ("6212ABC", CAN_ID),
+    ],
+)
+def test_unmatched_messages_are_counted(
+    matcher: MessageMatcher, text: str, can_id: str
+):
+    stats = IngestionStats()
+    assert list(matcher.match([message(text, can_id)], stats)) == []
+    assert stats.unmatched_by_can_id == {can_id: 1}
+
+
+def test_compare_value_must_be_hex():
+    with pytest.raises(ValueError):
+        MessageMatcher(
+            [
+                DbParentBlockMatchData(
+                    block_id=1, ecu_variant_id=1, can_id_rx=CAN_ID, compare_value="1234"
+                )
+            ]
+        )
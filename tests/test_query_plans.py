@@ -0,0 +1,69 @@
+import re
+import shutil
+import sqlite3
+
+import pytest
+
+from tools import create_db
+
+# Lookup through an index, in the formats of SQLite before and after 3.36
+INDEX_SEARCH = re.compile(
+    r"SEARCH (?:TABLE )?\w+(?: AS \w+)? USING (?:COVERING )?INDEX "
+)
+
+
+@pytest.fixture
+def db_without_stats(synthetic_session: tuple[str, list[str]], tmp_path) -> str:
+    """
+    Copy of the synthetic db without the statistics gathered by ANALYZE, with which the planner
+    rightly scans the tiny tables in full.
+    """
+    db_path = str(tmp_path / "db.sqlite3")
+    shutil.copyfile(synthetic_session[0], db_path)
+    con = sqlite3.connect(db_path)
+    con.execute("DROP TABLE sqlite_stat1")
+    con.commit()
+    con.close()
+    return db_path
+
+
+def explain(con: sqlite3.Connection, query: str, params) -> list[str]:
+    return [
+        detail for _, _, _, detail in con.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    ]
+
+
+def test_reader_queries_search_indexes(db_without_stats: str):
+    con = sqlite3.connect(db_without_stats)
+    for name, query, params in create_db.reader_queries():
+        plan = explain(con, query, params)
+        accesses = [
+            match[1]
+            for match in map(create_db.query_plan_table_access.match, plan)
+            if match is not None
+        ]
+        assert accesses and set(accesses) == {"SEARCH"}, (name, plan)
+        assert any(INDEX_SEARCH.match(detail) for detail in plan), (name, plan)
+    create_db.check_query_plans(con)
+
+
+def test_missing_index_fails_check(db_without_stats: str):
+    con = sqlite3.connect(db_without_stats)
+    con.execute("DROP INDEX block_values_block_id_compare_value")
+    with pytest.raises(RuntimeError, match="block_values"):
+        create_db.check_query_plans(con)
+
+
+@pytest.mark.parametrize(
+    "detail",
+    [
+        "SCAN ecu_blocks",
+        "SCAN TABLE ecu_variant_block_trees AS ecu_blocks",
+    ],
+)
+def test_table_access_formats(detail: str):
+    match = create_db.query_plan_table_access.match(detail)
+    assert match is not None
+    operation, table, alias, _ = match.groups()
+    assert operation == "SCAN"
+    assert (alias or table) == "ecu_blocks"
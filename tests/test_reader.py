@@ -0,0 +1,286 @@
+import dataclasses
+import os
+import shutil
+
+import pytest
+
+from tools import synthetic
+from vidalicet import cache, checkpoint, export, reader
+from vidalicet._bus.common import ParameterReadings
+from vidalicet._log_parsing import chunks
+from vidalicet._log_parsing.common import MS_PER_DAY
+
+from .conftest import SESSION
+
+type Session = tuple[str, list[str]]
+
+
+def by_block(
+    params: list[ParameterReadings],
+) -> dict[int, tuple[str, list[int], list[float]]]:
+    """Readings by block id, with the chunks of each parameter concatenated in order."""
+    result: dict[int, tuple[str, list[int], list[float]]] = {}
+    for p in params:
+        _, timestamps, values = result.setdefault(p.block_id, (p.name, [], []))
+        timestamps.extend(p.timestamps)
+        values.extend(p.values)
+    return result
+
+
+@pytest.fixture(scope="module")
+def expected(synthetic_session: Session) -> list[ParameterReadings]:
+    db_path, log_paths = synthetic_session
+    r = reader.Reader(db_path)
+    for path in log_paths:
+        r.ingest_logfile(path)
+    return r.get_new_params()
+
+
+def test_session_has_params(expected: list[ParameterReadings]):
+    assert len(expected) > 10
+    assert all(len(p.timestamps) == len(p.values) > 0 for p in expected)
+
+
+def test_parallel_matches_sequential(
+    synthetic_session: Session, expected: list[ParameterReadings]
+):
+    db_path, log_paths = synthetic_session
+    r = reader.Reader(db_path)
+    r.ingest_logfiles_parallel(log_paths, max_workers=2)
+    assert r.log_files_ingested == len(log_paths)
+    assert r.get_new_params() == expected
+
+
+def test_iter_params_matches_sequential(
+    synthetic_session: Session, expected: list[ParameterReadings]
+):
+    db_path, log_paths = synthetic_session
+    r = reader.Reader(db_path)
+    chunks = list(r.iter_params(log_paths, flush_threshold=50))
+    assert len(chunks) > len(expected)
+    assert by_block(chunks) == by_block(expected)
+
+
+def test_iter_params_yields_during_a_file(
+    synthetic_session: Session, expected: list[ParameterReadings], tmp_path, monkeypatch
+):
+    db_path, log_paths = synthetic_session
+    path = str(tmp_path / "session.log")
+    with open(path, "wb") as f:
+        for log_path in log_paths:
+            with open(log_path, "rb") as log_f:
+                f.write(log_f.read())
+    monkeypatch.setattr(chunks, "CHUNK_SIZE", 4096)
+    r = reader.Reader(db_path)
+    chunks_during_file = 0
+    params: list[ParameterReadings] = []
+    for chunk in r.iter_params([path], flush_threshold=50):
+        chunks_during_file += r.log_files_ingested == 0
+        params.append(chunk)
+    assert chunks_during_file > 1
+    assert by_block(params) == by_block(expected)
+
+
+@pytest.fixture(params=["inside_file", "between_files"])
+def midnight_logs(request: pytest.FixtureRequest, tmp_path) -> list[str]:
+    """
+    Logs of `SESSION` started just before midnight, rotated into several files, with midnight passed
+    inside one file or right where a file ends.
+    """
+    session = dataclasses.replace(
+        SESSION, start_ms=MS_PER_DAY - SESSION.reads * SESSION.interval_ms // 2, files=5
+    )
+    if request.param == "inside_file":
+        return synthetic.write_logs(session, str(tmp_path))
+
+    lines = list(synthetic.generate_lines(session))
+    after_midnight = next(i for i, line in enumerate(lines) if line.startswith("00:"))
+    splits = [
+        0,
+        after_midnight // 2,
+        after_midnight,
+        (after_midnight + len(lines)) // 2,
+    ]
+    paths = synthetic.log_paths(str(tmp_path), "synthetic", len(splits))
+    for path, start, stop in zip(paths, splits, splits[1:] + [len(lines)]):
+        with open(path, "w", newline="") as f:
+            f.writelines(lines[start:stop])
+    return paths
+
+
+def test_session_past_midnight(
+    synthetic_session: Session,
+    expected: list[ParameterReadings],
+    midnight_logs: list[str],
+):
+    db_path, _ = synthetic_session
+    r = reader.Reader(db_path)
+    for path in midnight_logs:
+        r.ingest_logfile(path)
+    params = r.get_new_params()
+    r = reader.Reader(db_path)
+    r.ingest_logfiles_parallel(midnight_logs, max_workers=2)
+    assert r.get_new_params() == params
+
+    timestamps = sorted(t for p in params for t in p.timestamps)
+    assert timestamps[0] < MS_PER_DAY <= timestamps[-1]
+    # The same session, shifted
+    shift = timestamps[0] - min(t for p in expected for t in p.timestamps)
+    assert by_block(params) == {
+        block_id: (name, [t + shift for t in block_timestamps], values)
+        for block_id, (name, block_timestamps, values) in by_block(expected).items()
+    }
+    for p in params:
+        assert all(a < b for a, b in zip(p.timestamps, p.timestamps[1:]))
+
+
+def test_checkpoint_round_trip(
+    synthetic_session: Session, expected: list[ParameterReadings], tmp_path
+):
+    db_path, log_paths = synthetic_session
+    r = reader.Reader(db_path)
+    r.ingest_logfile(log_paths[0])
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint.save(r.checkpoint(), path)
+
+    resumed = reader.Reader(db_path)
+    resumed.restore(checkpoint.load(path))
+    # Already ingested files are skipped
+    for log_path in log_paths:
+        resumed.ingest_logfile(log_path)
+    assert by_block(resumed.get_new_params()) == by_block(expected)
+
+
+def test_cache_round_trip(
+    synthetic_session: Session, expected: list[ParameterReadings], tmp_path
+):
+    db_path, log_paths = synthetic_session
+    session_cache = cache.SessionCache(str(tmp_path))
+    assert session_cache.read_session(log_paths, db_path) == expected
+    key = cache.session_key(log_paths, db_path)
+    assert session_cache.get(key) == expected
+    assert session_cache.read_session(log_paths, db_path) == expected
+
+
+def test_missing_pyarrow_keeps_buffered_params(synthetic_session: Session, monkeypatch):
+    db_path, log_paths = synthetic_session
+    r = reader.Reader(db_path)
+    for path in log_paths:
+        r.ingest_logfile(path)
+
+    monkeypatch.setattr(export, "HAS_PYARROW", False)
+    with pytest.raises(RuntimeError):
+        r.get_new_params_table()
+    with pytest.raises(RuntimeError):
+        r.write_new_params_parquet("unused.parquet")
+    assert r.get_new_params()
+
+
+@pytest.fixture
+def cut_session(synthetic_session: Session, tmp_path) -> tuple[list[str], bytes]:
+    """
+    Copy of the synthetic logs with the last file cut in the middle of a response line, like an
+    active log file that VIDA is writing to. Returns the paths and the rest of the last file.
+    """
+    _, log_paths = synthetic_session
+    paths: list[str] = []
+    for log_path in log_paths:
+        paths.append(str(tmp_path / os.path.basename(log_path)))
+        shutil.copyfile(log_path, paths[-1])
+    with open(paths[-1], "rb") as f:
+        data = f.read()
+    cut = data.index(b"VehComm response", len(data) // 2) + 30
+    with open(paths[-1], "wb") as f:
+        f.write(data[:cut])
+    return paths, data[cut:]
+
+
+@pytest.mark.parametrize("parallel", [False, True], ids=["sequential", "parallel"])
+def test_resume_after_partial_line(
+    synthetic_session: Session,
+    expected: list[ParameterReadings],
+    cut_session: tuple[list[str], bytes],
+    parallel: bool,
+    tmp_path,
+):
+    db_path, _ = synthetic_session
+    paths, rest = cut_session
+    r = reader.Reader(db_path)
+    if parallel:
+        r.ingest_logfiles_parallel(paths, max_workers=2)
+    else:
+        for path in paths:
+            r.ingest_logfile(path)
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    checkpoint.save(r.checkpoint(), checkpoint_path)
+
+    with open(paths[-1], "ab") as f:
+        f.write(rest)
+    resumed = reader.Reader(db_path)
+    resumed.restore(checkpoint.load(checkpoint_path))
+    resumed.ingest_logfile(paths[-1])
+    assert by_block(resumed.get_new_params()) == by_block(expected)
+
+
+def test_empty_first_file(
+    synthetic_session: Session, expected: list[ParameterReadings], tmp_path
+):
+    db_path, log_paths = synthetic_session
+    empty_path = str(tmp_path / "empty.log")
+    open(empty_path, "wb").close()
+    r = reader.Reader(db_path)
+    assert r.ingest_logfile(empty_path) == "ecu_identification"
+    for path in log_paths:
+        r.ingest_logfile(path)
+    assert r.get_new_params() == expected
+
+
+@pytest.fixture
+def unterminated_session(synthetic_session: Session, tmp_path) -> list[str]:
+    """Copy of the synthetic logs without a line terminator at the end of each file."""
+    _, log_paths = synthetic_session
+    paths: list[str] = []
+    for log_path in log_paths:
+        paths.append(str(tmp_path / os.path.basename(log_path)))
+        with open(log_path, "rb") as f:
+            data = f.read()
+        assert data.endswith(b"'\n")
+        with open(paths[-1], "wb") as f:
+            f.write(data[:-1])
+    return paths
+
+
+@pytest.mark.parametrize(
+    "mode", ["sequential", "parallel", "iter_params", "cache", "checkpoint"]
+)
+def test_last_line_without_terminator(
+    synthetic_session: Session,
+    expected: list[ParameterReadings],
+    unterminated_session: list[str],
+    mode: str,
+    tmp_path,
+):
+    db_path, _ = synthetic_session
+    paths = unterminated_session
+    r = reader.Reader(db_path)
+    match mode:
+        case "sequential":
+            for path in paths:
+                r.ingest_logfile(path)
+            params = r.get_new_params()
+        case "parallel":
+            r.ingest_logfiles_parallel(paths, max_workers=2)
+            params = r.get_new_params()
+        case "iter_params":
+            params = list(r.iter_params(paths, flush_threshold=50))
+        case "cache":
+            params = cache.SessionCache(str(tmp_path)).read_session(paths, db_path)
+        case _:
+            for path in paths:
+                r.ingest_logfile(path)
+            checkpoint_path = str(tmp_path / "checkpoint.json")
+            checkpoint.save(r.checkpoint(), checkpoint_path)
+            r = reader.Reader(db_path)
+            r.restore(checkpoint.load(checkpoint_path))
+            params = r.get_new_params()
+    assert by_block(params) == by_block(expected)
@@ -0,0 +1,108 @@
+import math
+import random
+from array import array
+
+import pytest
+
+from vidalicet import resample
+from vidalicet._bus.common import ParameterReadings
+
+VECTORIZE = [
+    False,
+    pytest.param(
+        True,
+        marks=pytest.mark.skipif(not resample.HAS_NUMPY, reason="NumPy not installed"),
+    ),
+]
+
+
+def random_params(rng: random.Random, count: int) -> list[ParameterReadings]:
+    params: list[ParameterReadings] = []
+    for i in range(count):
+        length = rng.randrange(0, 50)
+        # Repeated timestamps included
+        timestamps = sorted(rng.randrange(0, 1000) for _ in range(length))
+        params.append(
+            ParameterReadings(
+                block_id=i,
+                name=f"param {i}",
+                text="",
+                ppe_text="",
+                ppe_unit_text="",
+                timestamps=array("q", timestamps),
+                values=array("d", (rng.uniform(-100, 100) for _ in range(length))),
+            )
+        )
+    return params
+
+
+def reference(
+    grid: array[int],
+    param: ParameterReadings,
+    method: resample.Method,
+    tolerance_ms: int | None,
+) -> list[float]:
+    """Resample by searching all readings for every row."""
+    readings = list(zip(param.timestamps, param.values))
+    result: list[float] = []
+    for t in grid:
+        before = [(ts, v) for ts, v in readings if ts <= t]
+        after = [(ts, v) for ts, v in readings if ts > t]
+        if not before:
+            result.append(math.nan)
+            continue
+        t0, v0 = before[-1]
+        if method == "asof":
+            too_old = tolerance_ms is not None and t - t0 > tolerance_ms
+            result.append(math.nan if too_old else v0)
+        elif t0 == t:
+            result.append(v0)
+        elif not after:
+            result.append(math.nan)
+        else:
+            t1, v1 = after[0]
+            result.append(v0 + (v1 - v0) * (t - t0) / (t1 - t0))
+    return result
+
+
+@pytest.mark.parametrize("vectorize", VECTORIZE)
+@pytest.mark.parametrize(
+    "method, tolerance_ms", [("asof", None), ("asof", 20), ("linear", None)]
+)
+@pytest.mark.parametrize("interval_ms", [None, 7])
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference(
+    vectorize: bool,
+    method: resample.Method,
+    tolerance_ms: int | None,
+    interval_ms: int | None,
+    seed: int,
+):
+    params = random_params(random.Random(seed), 5)
+    table = resample.resample(
+        params,
+        interval_ms=interval_ms,
+        method=method,
+        tolerance_ms=tolerance_ms,
+        vectorize=vectorize,
+    )
+    for param, column in zip(params, table.columns):
+        expected = reference(table.timestamps, param, method, tolerance_ms)
+        assert list(column) == pytest.approx(expected, nan_ok=True)
+
+
+def test_union_grid():
+    params = random_params(random.Random(0), 5)
+    table = resample.resample(params, start_ms=100, end_ms=900)
+    timestamps = {t for p in params for t in p.timestamps if 100 <= t <= 900}
+    assert list(table.timestamps) == sorted(timestamps)
+
+
+@pytest.mark.parametrize("vectorize", VECTORIZE)
+def test_invalid_method(vectorize: bool):
+    with pytest.raises(ValueError):
+        resample.resample(
+            random_params(random.Random(0), 2),
+            method="nearest",  # type: ignore[arg-type]
+            vectorize=vectorize,
+        )
@@ -0,0 +1,146 @@
+from typing import Any
+import math
+
+import pytest
+from lark import Token, Transformer
+from lark.exceptions import VisitError
+
+from vidalicet._bus import _scaling
+
+
+class Interpreter(Transformer[Any, Any]):
+    """Evaluates a scaling parse tree for one value of `x`, like scalings were before compiling."""
+
+    x: int | float
+
+    def __init__(self, x: int | float):
+        self.x = x
+
+    def INT(self, token: Token):
+        return int(token)
+
+    def FLOAT(self, token: Token):
+        return float(token)
+
+    def HEX(self, token: Token):
+        return int.from_bytes(bytes.fromhex(token[2:]))
+
+    def BITS(self, token: Token):
+        return int(token, base=0)
+
+    def CNAME(self, token: Token):
+        return self.x if token.value in ("x", "X") else token.value
+
+    def atom(self, tokens: list[Any]):
+        return tokens[0]
+
+    def call(self, tokens: list[Any]):
+        fn_name, arg = tokens
+        assert fn_name == "ln"
+        return math.log(arg)
+
+    def add(self, tokens: list[Any]):
+        return tokens[0] + tokens[1]
+
+    def sub(self, tokens: list[Any]):
+        return tokens[0] - tokens[1]
+
+    def neg(self, tokens: list[Any]):
+        return -tokens[0]
+
+    def div(self, tokens: list[Any]):
+        return tokens[0] / tokens[1]
+
+    def mul(self, tokens: list[Any]):
+        return tokens[0] * tokens[1]
+
+    def band(self, tokens: list[Any]):
+        return tokens[0] & tokens[1]
+
+
+INT_VALUES = [0, 1, -1, 7, -128, 255, 4095, -32768, 65535, 2**31 - 1, -(2**31)]
+FLOAT_VALUES = [0.0, -0.5, 1.25, -273.15, 3.4e38]
+
+# Expressions valid for any integer or float `x`
+ARITHMETIC = [
+    "x",
+    "X",
+    "-x",
+    "-x*2",
+    "-(x-5)*2",
+    "x*0.1",
+    "x/10-40",
+    "x/3",
+    "0.5*x - -3",
+    "x*2+3/4",
+    "x - 1 - 2 - 3",
+    "x / 2 / 4",
+    "100 - x * 2 + 1.5",
+    "x*0x10",
+]
+# Bitwise operators only apply to integers
+BITWISE = [
+    "x & 0x0F",
+    "x & 0x0F * 2",
+    "(x & 0xFF00)/256",
+    "x & 0b11110000",
+    "-x & 0x7F",
+    "(x & 0x8000) / 0x8000 * -1 + (x & 0x7FFF)",
+]
+
+
+def interpret(parser: _scaling.ScalingParser, expression: str, x: int | float) -> Any:
+    return Interpreter(x).transform(parser.parse(expression))
+
+
+def outcome(f, x: int | float) -> Any:
+    """The result of `f(x)`, or the type of the exception it raises."""
+    try:
+        return f(x)
+    except VisitError as e:
+        return type(e.orig_exc)
+    except Exception as e:
+        return type(e)
+
+
+@pytest.fixture(scope="module")
+def parser() -> _scaling.ScalingParser:
+    return _scaling.ScalingParser()
+
+
+@pytest.mark.parametrize(
+    "expression, values",
+    [(e, INT_VALUES + FLOAT_VALUES) for e in ARITHMETIC]
+    + [(e, INT_VALUES) for e in BITWISE]
+    # Zero and negative values raise
+    + [("ln(x)", INT_VALUES + FLOAT_VALUES), ("100/x", INT_VALUES + FLOAT_VALUES)],
+)
+def test_compiled_matches_interpreted(
+    parser: _scaling.ScalingParser, expression: str, values: list[int | float]
+):
+    scaling = parser.compile(expression)
+    for x in values:
+        expected = outcome(lambda x: interpret(parser, expression, x), x)
+        assert outcome(scaling, x) == expected, (expression, x)
+
+
+@pytest.mark.parametrize("expression", ARITHMETIC + BITWISE)
+def test_vectorized_matches_compiled(parser: _scaling.ScalingParser, expression: str):
+    np = pytest.importorskip("numpy")
+    scaling = parser.compile(expression)
+    vectorized = parser.compile_vectorized(expression)
+    result = np.broadcast_to(
+        vectorized(np.array(INT_VALUES, dtype=np.int64)), len(INT_VALUES)
+    )
+    assert list(result) == pytest.approx([scaling(x) for x in INT_VALUES])
+
+
+def test_compile_is_cached(parser: _scaling.ScalingParser):
+    assert parser.compile("x/10-40") is parser.compile("x/10-40")
+
+
+def test_unknown_names_are_rejected(parser: _scaling.ScalingParser):
+    with pytest.raises(Exception, match="Unknown"):
+        parser.compile("exp(x)")
+    with pytest.raises(Exception, match="Unknown"):
+        parser.compile("y * 2")
@@ -0,0 +1,119 @@
+import gzip
+import json
+
+import pytest
+
+from vidalicet import _db, reader, snapshot
+from vidalicet._bus import _scaling
+
+type Session = tuple[str, list[str]]
+
+
+@pytest.fixture(scope="module")
+def session_snapshot(synthetic_session: Session) -> snapshot.Snapshot:
+    db_path, _ = synthetic_session
+    con = _db.connection.connect(db_path)
+    ecu_identifiers = [
+        identifier
+        for (identifier,) in con.execute("SELECT identifier FROM ecu_variants")
+    ]
+    return snapshot.create(con, ecu_identifiers)
+
+
+def test_round_trip(session_snapshot: snapshot.Snapshot, tmp_path):
+    path = str(tmp_path / "snapshot.json.gz")
+    snapshot.save(session_snapshot, path)
+    assert snapshot.load(path) == session_snapshot
+
+
+def test_reader_with_snapshot_matches_db(
+    synthetic_session: Session, session_snapshot: snapshot.Snapshot, tmp_path
+):
+    db_path, log_paths = synthetic_session
+    path = str(tmp_path / "snapshot.json.gz")
+    snapshot.save(session_snapshot, path)
+
+    from_db = reader.Reader(db_path)
+    from_snapshot = reader.Reader(snapshot_path=path)
+    for log_path in log_paths:
+        from_db.ingest_logfile(log_path)
+        from_snapshot.ingest_logfile(log_path)
+    assert from_snapshot.get_new_params() == from_db.get_new_params()
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["x", "X/10-40", "-x & 0x0F", "ln(x) * 2.5e-3", "(x & 0b00001111) / .5"],
+)
+def test_serialize_round_trip(expression: str):
+    parser = _scaling.ScalingParser()
+    tree = parser.parse(expression)
+    data = json.loads(json.dumps(_scaling.serialize_tree(tree)))
+    assert _scaling.deserialize_tree(data) == tree
+
+
+def atom(token_type: str, value: str):
+    return {"r": "atom", "c": [[token_type, value]]}
+
+
+X = atom("CNAME", "x")
+
+HOSTILE_TREES = [
+    # Not a tree
+    None,
+    "x",
+    ["CNAME", "x"],
+    {"c": [X]},
+    {"r": "atom"},
+    {"r": "atom", "c": "x"},
+    # Unknown rules and tokens
+    {"r": "start", "c": [X]},
+    {"r": "__class__", "c": [X]},
+    atom("NAME", "x"),
+    atom("CNAME", "y"),
+    atom("CNAME", "__import__"),
+    atom("CNAME", "x.__class__"),
+    # Token values that the grammar can't produce
+    atom("INT", "1; import os"),
+    atom("INT", "-1"),
+    atom("FLOAT", "nan"),
+    atom("FLOAT", "1e999)+(x"),
+    atom("HEX", "0xF"),
+    atom("BITS", "0b12"),
+    ["INT", 1],
+    {"r": "atom", "c": [["INT", "1", "2"]]},
+    # Wrong number of children
+    {"r": "add", "c": [X]},
+    {"r": "neg", "c": [X, X]},
+    {"r": "atom", "c": []},
+    # Tokens outside of atoms and names outside of calls
+    {"r": "add", "c": [["CNAME", "x"], X]},
+    {"r": "neg", "c": [["INT", "1"]]},
+    {"r": "call", "c": [["CNAME", "eval"], X]},
+    {"r": "call", "c": [["CNAME", "__import__"], atom("INT", "1")]},
+    {"r": "call", "c": [["INT", "1"], X]},
+    {"r": "call", "c": [X, X]},
+]
+
+
+@pytest.mark.parametrize("data", HOSTILE_TREES)
+def test_invalid_trees_are_rejected(data):
+    with pytest.raises(ValueError):
+        _scaling.deserialize_tree(data)
+
+
+def test_load_rejects_invalid_tree(session_snapshot: snapshot.Snapshot, tmp_path):
+    path = str(tmp_path / "snapshot.json.gz")
+    snapshot.save(session_snapshot, path)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    definition = next(iter(data["scaling_trees"]))
+    data["scaling_trees"][definition] = {
+        "r": "call",
+        "c": [["CNAME", "__import__"], atom("INT", "1")],
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    with pytest.raises(ValueError):
+        snapshot.load(path)
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from vidalicet._log_parsing import tail
+
+
+class FakeVida:
+    """Writes numbered lines to an active log file and rotates it like VIDA."""
+
+    path: str
+    rotations: int
+    lines_written: int
+
+    def __init__(self, directory: str) -> None:
+        self.path = os.path.join(directory, "car.log")
+        self.rotations = 0
+        self.lines_written = 0
+        open(self.path, "wb").close()
+
+    def write(self, count: int, partial: bool = False) -> None:
+        with open(self.path, "ab") as f:
+            for _ in range(count):
+                f.write(f"12:00:00,000 line {self.lines_written}\r\n".encode())
+                self.lines_written += 1
+            if partial:
+                f.write(b"12:00:00,000 incompl")
+
+    def finish_line(self) -> None:
+        with open(self.path, "ab") as f:
+            f.write(f"ete {self.lines_written}\r\n".encode())
+        self.lines_written += 1
+
+    def rotate(self) -> None:
+        os.rename(self.path, f"{self.path}{self.rotations}")
+        self.rotations += 1
+        open(self.path, "wb").close()
+
+
+def read_lines(reads: list[tail.TailRead]) -> list[str]:
+    return [
+        line.split(" ")[-1] for read in reads for line in read.data.decode().splitlines()
+    ]
+
+
+def expected_lines(start: int, end: int) -> list[str]:
+    return [str(i) for i in range(start, end)]
+
+
+@pytest.fixture(params=[True, False], ids=["inode", "no_inode"])
+def vida(request: pytest.FixtureRequest, tmp_path, monkeypatch) -> FakeVida:
+    if not request.param:
+        # Platforms without file identities report 0
+        fstat = os.fstat
+        monkeypatch.setattr(
+            tail.os,
+            "fstat",
+            lambda fd: os.stat_result((*fstat(fd)[:1], 0, *fstat(fd)[2:])),
+        )
+    return FakeVida(str(tmp_path))
+
+
+def test_partial_line_waits_for_next_poll(vida: FakeVida):
+    log_tail = tail.LogTail(vida.path)
+    vida.write(3, partial=True)
+    assert read_lines(list(log_tail.poll())) == expected_lines(0, 3)
+    vida.finish_line()
+    vida.write(2)
+    lines = read_lines(list(log_tail.poll()))
+    assert lines == expected_lines(3, 6)
+
+
+def test_rotation_after_new_file_grew_past_offset(vida: FakeVida):
+    log_tail = tail.LogTail(vida.path)
+    vida.write(3)
+    assert read_lines(list(log_tail.poll())) == expected_lines(0, 3)
+
+    vida.write(2)
+    vida.rotate()
+    # Longer than what was read from the old file
+    vida.write(10)
+    reads = list(log_tail.poll())
+    assert read_lines(reads) == expected_lines(3, 15)
+    assert [read.finished for read in reads] == [True, False]
+    assert reads[0].path == vida.path + "0"
+
+
+def test_rotations_between_polls(vida: FakeVida):
+    log_tail = tail.LogTail(vida.path)
+    vida.write(3)
+    list(log_tail.poll())
+
+    for _ in range(3):
+        vida.write(4)
+        vida.rotate()
+    vida.write(1)
+    reads = list(log_tail.poll())
+    assert read_lines(reads) == expected_lines(3, 16)
+    assert [read.path for read in reads] == [
+        vida.path + "0",
+        vida.path + "1",
+        vida.path + "2",
+        vida.path,
+    ]
+
+
+def test_resume_after_rotation(vida: FakeVida):
+    log_tail = tail.LogTail(vida.path)
+    vida.write(3)
+    list(log_tail.poll())
+
+    vida.write(2)
+    vida.rotate()
+    vida.write(10)
+    resumed = tail.LogTail(vida.path, log_tail.offset, log_tail.fingerprint)
+    assert read_lines(list(resumed.poll())) == expected_lines(3, 15)
@@ -0,0 +1,109 @@
+import datetime
+import random
+import re
+
+import pytest
+
+from vidalicet._log_parsing import common
+
+FIXED_WIDTH = re.compile(r"[0-9]{2}:[0-9]{2}:[0-9]{2}[,.][0-9]{3}")
+
+
+def reference(line: str) -> int | None:
+    """`common.parse_timestamp` in terms of `datetime.time.fromisoformat`."""
+    timestamp = line[: common.TIMESTAMP_LEN]
+    # The format is fixed-width, while `fromisoformat` also takes e.g. `HH:MM` or a time zone
+    if not FIXED_WIDTH.fullmatch(timestamp):
+        return None
+    try:
+        t = datetime.time.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 1000 + t.microsecond // 1000
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(common, "_seconds_cache", {})
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "00:00:00,000",
+        "00:00:00,999",
+        "23:59:59,000",
+        "23:59:59,999",
+        "12:34:56.789",
+        "10:00:00,000 [INFO ][12][VehComm   ] VehComm response: '62F1A0'",
+        # Malformed
+        "",
+        "10:00:00",
+        "10:00:00,",
+        "10:00:00,5",
+        "10:00:00,00",
+        "10:00:00;000",
+        "10:00:00,00Z",
+        "10:00:00,-01",
+        "10-00-00,000",
+        "1:00:00,000 ",
+        " 10:00:00,000",
+        "24:00:00,000",
+        "23:60:00,000",
+        "23:59:60,000",
+        "+1:00:00,000",
+        "1a:00:00,000",
+        "１０:00:00,000",
+        "10:00:00,١٢٣",
+    ],
+)
+def test_matches_fromisoformat(line: str):
+    assert common.parse_timestamp(line) == reference(line)
+
+
+def test_matches_fromisoformat_fuzzed():
+    rng = random.Random(0)
+    chars = "0123456789:,.Z+- a١"
+    for _ in range(20_000):
+        line = list(
+            f"{rng.randrange(24):02}:{rng.randrange(60):02}:{rng.randrange(60):02},000"
+        )
+        line[rng.randrange(len(line))] = rng.choice(chars)
+        line[rng.randrange(len(line))] = rng.choice(chars)
+        assert common.parse_timestamp("".join(line)) == reference("".join(line))
+
+
+def test_every_millisecond():
+    for millis in range(1000):
+        line = f"23:59:59,{millis:03} [INFO ]"
+        assert common.parse_timestamp(line) == common.MS_PER_DAY - 1000 + millis
+
+
+def test_seconds_are_parsed_once(monkeypatch):
+    calls: list[str] = []
+    parse_seconds = common._parse_seconds
+
+    def counting_parse_seconds(seconds: str) -> int | None:
+        calls.append(seconds)
+        return parse_seconds(seconds)
+
+    monkeypatch.setattr(common, "_parse_seconds", counting_parse_seconds)
+    assert common.parse_timestamp("10:00:00,000") == 36_000_000
+    assert common.parse_timestamp("10:00:00,999") == 36_000_999
+    assert common.parse_timestamp("10:00:01,000") == 36_001_000
+    assert common.parse_timestamp("10:00:00.500") == 36_000_500
+    assert calls == ["10:00:00", "10:00:01"]
+
+
+def test_malformed_seconds_are_not_cached():
+    assert common.parse_timestamp("24:00:00,000") is None
+    assert common.parse_timestamp("10:00:00,abc") is None
+    assert common._seconds_cache == {"10:00:00": 36_000_000}
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(common, "_SECONDS_CACHE_MAX_SIZE", 10)
+    for seconds in range(100):
+        line = f"10:{seconds // 60:02}:{seconds % 60:02},001"
+        assert common.parse_timestamp(line) == reference(line)
+        assert len(common._seconds_cache) <= 10
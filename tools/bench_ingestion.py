@@ -0,0 +1,145 @@
+from typing import Callable, Sequence
+import argparse
+import contextlib
+import logging
+import tempfile
+import time
+
+from vidalicet import _bus, _db, _log_parsing, reader
+
+from . import create_snapshot, synthetic
+
+
+def count_lines(paths: Sequence[str]) -> int:
+    lines = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            lines += sum(
+                chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")
+            )
+    return lines
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Returns the best time of `repeat` runs in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse_messages(
+    paths: Sequence[str], use_mmap: bool
+) -> list[_log_parsing.params.RawParamRxMsg]:
+    """Parse the parameter reads of all files one by one, like parallel ingestion does."""
+    clock = _log_parsing.common.SessionClock()
+    messages: list[_log_parsing.params.RawParamRxMsg] = []
+    pending_ecu_addr = None
+    for path in paths:
+        file_params = _log_parsing.params.parse_file_params_from_path(path, use_mmap)
+        file_messages, pending_ecu_addr = _log_parsing.params.stitch(
+            file_params, pending_ecu_addr, clock
+        )
+        messages.extend(file_messages)
+    return messages
+
+
+def read_session(db_path: str, paths: Sequence[str], use_mmap: bool) -> int:
+    """Read all parameters of a session with `Reader`. Returns the number of samples."""
+    r = reader.Reader(db_path)
+    for path in paths:
+        r.ingest_logfile(path, use_mmap)
+    return sum(len(p.values) for p in r.get_new_params())
+
+
+def report(name: str, count: int, unit: str, seconds: float) -> None:
+    print(f"{name:32} {count / seconds:14,.0f} {unit}/s  ({seconds:.3f} s)")
+
+
+def run(db_path: str, paths: Sequence[str], repeat: int) -> None:
+    line_count = count_lines(paths)
+    print(f"{line_count:,} lines in {len(paths)} files")
+
+    ## Parsing
+    for use_mmap in (False, True):
+        seconds = best_time(lambda: parse_messages(paths, use_mmap), repeat)
+        report(f"parse (mmap={use_mmap})", line_count, "lines", seconds)
+
+    messages = parse_messages(paths, use_mmap=False)
+    ecu_identifiers = create_snapshot.detect_ecu_identifiers(paths)
+    con = _db.connection.connect(db_path)
+    try:
+        ## Matching
+        match_data = _db.matching.get_parent_match_data(con, ecu_identifiers)
+        matcher = _bus.matching.MessageMatcher(match_data)
+        # `match` is lazy
+        seconds = best_time(lambda: list(matcher.match(messages)), repeat)
+        report("match", len(messages), "messages", seconds)
+
+        ## Extraction
+        readings = list(matcher.match(messages))
+        ecu_variant_ids = {d.ecu_variant_id for d in match_data}
+        for vectorize in (False, True):
+            if vectorize and not _bus.child_blocks.HAS_NUMPY:
+                print(f"{'extract (vectorize=True)':32} skipped, NumPy not installed")
+                continue
+            extractor = _bus.child_blocks.BlockExtractor(con, vectorize=vectorize)
+            extractor.preload(ecu_variant_ids)
+            # Also warms up the layouts and compiled scalings
+            params = extractor.extract_children(readings)
+            sample_count = sum(len(p.values) for p in params)
+            seconds = best_time(lambda: extractor.extract_children(readings), repeat)
+            report(f"extract (vectorize={vectorize})", sample_count, "samples", seconds)
+    finally:
+        con.close()
+
+    ## End to end
+    for use_mmap in (False, True):
+        seconds = best_time(lambda: read_session(db_path, paths, use_mmap), repeat)
+        report(f"Reader (mmap={use_mmap})", line_count, "lines", seconds)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark of ingesting a synthetic session, stage by stage."
+    )
+    arg_parser.add_argument(
+        "--output-dir",
+        help="directory to generate the session into and keep it (by default, a temporary directory)",
+    )
+    arg_parser.add_argument("--ecus", type=int, default=synthetic.Session.ecu_count)
+    arg_parser.add_argument(
+        "--parents", type=int, default=synthetic.Session.parents_per_ecu
+    )
+    arg_parser.add_argument(
+        "--children", type=int, default=synthetic.Session.children_per_parent
+    )
+    arg_parser.add_argument("--reads", type=int, default=synthetic.Session.reads)
+    arg_parser.add_argument("--noise", type=int, default=synthetic.Session.noise_lines)
+    arg_parser.add_argument("--files", type=int, default=synthetic.Session.files)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    # Keep the output readable
+    logging.disable(logging.WARNING)
+
+    session = synthetic.Session(
+        ecu_count=args.ecus,
+        parents_per_ecu=args.parents,
+        children_per_parent=args.children,
+        reads=args.reads,
+        noise_lines=args.noise,
+        files=args.files,
+    )
+    with contextlib.ExitStack() as stack:
+        output_dir = args.output_dir or stack.enter_context(
+            tempfile.TemporaryDirectory()
+        )
+        db_path, paths = synthetic.write_session(session, output_dir)
+        run(db_path, paths, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+from typing import Sequence
+import argparse
+import random
+import time
+
+from vidalicet import _bus, _db, _log_parsing
+
+MSG_TYPE_LEN = _bus.matching.MSG_TYPE_LEN
+CAN_ID_RX = "7E8"
+
+
+class FixedWidthMatcher:
+    """The matcher before variable-length compare values, as a reference."""
+
+    _data: dict[str, tuple[int, dict[str, _bus.common.EcuBlockId]]]
+
+    def __init__(self, match_datas: Sequence[_db.matching.DbParentBlockMatchData]):
+        self._data = {}
+        for d in match_datas:
+            comp_val = d.compare_value[2:]
+            if d.can_id_rx not in self._data:
+                self._data[d.can_id_rx] = (len(comp_val), {})
+            else:
+                assert len(comp_val) == self._data[d.can_id_rx][0]
+            self._data[d.can_id_rx][1][comp_val] = _bus.common.EcuBlockId(
+                parent_block_id=d.block_id, ecu_variant_id=d.ecu_variant_id
+            )
+
+    def match_one(
+        self, message: _log_parsing.params.RawParamRxMsg
+    ) -> _bus.common.RawReading | None:
+        id_pair_by_comp_val = self._data.get(message.ecu_addr, None)
+        if not id_pair_by_comp_val:
+            return None
+        comp_val_len, comp_data = id_pair_by_comp_val
+        matched_id = comp_data.get(
+            message.message[MSG_TYPE_LEN : MSG_TYPE_LEN + comp_val_len], None
+        )
+        if matched_id is None:
+            return None
+        try:
+            payload = bytes.fromhex(message.message[MSG_TYPE_LEN + comp_val_len :])
+        except ValueError:
+            return None
+        return _bus.common.RawReading(id=matched_id, payload=payload, time=message.time)
+
+
+def create_match_datas(
+    comp_val_lens: Sequence[int], count: int
+) -> list[_db.matching.DbParentBlockMatchData]:
+    """`count` compare values of each length in `comp_val_lens` (in hex digits)."""
+    match_datas: list[_db.matching.DbParentBlockMatchData] = []
+    for comp_val_len in comp_val_lens:
+        for i in range(count):
+            match_datas.append(
+                _db.matching.DbParentBlockMatchData(
+                    block_id=len(match_datas),
+                    ecu_variant_id=1,
+                    can_id_rx=CAN_ID_RX,
+                    compare_value=f"0x{i:0{comp_val_len}X}",
+                )
+            )
+    return match_datas
+
+
+def create_messages(
+    match_datas: Sequence[_db.matching.DbParentBlockMatchData],
+    count: int,
+    miss_ratio: float,
+) -> list[_log_parsing.params.RawParamRxMsg]:
+    rng = random.Random(0)
+    # Noon
+    t = 12 * 60 * 60 * 1000
+    messages: list[_log_parsing.params.RawParamRxMsg] = []
+    for _ in range(count):
+        if rng.random() < miss_ratio:
+            message = "7F2231"
+        else:
+            comp_val = rng.choice(match_datas).compare_value[2:]
+            message = f"62{comp_val}{rng.randrange(1 << 16):04X}"
+        messages.append(
+            _log_parsing.params.RawParamRxMsg(
+                ecu_addr=CAN_ID_RX, message=message, time=t
+            )
+        )
+    return messages
+
+
+def bench(matcher: object, messages: Sequence[object], repeat: int) -> float:
+    """Returns the best throughput of `repeat` runs in messages per second."""
+    match_one = getattr(matcher, "match_one")
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            match_one(message)
+        best = min(best, time.perf_counter() - start)
+    return len(messages) / best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Micro-benchmark of matching parameter responses to parent blocks."
+    )
+    arg_parser.add_argument("--messages", type=int, default=200_000)
+    arg_parser.add_argument("--blocks", type=int, default=200)
+    arg_parser.add_argument("--miss-ratio", type=float, default=0.1)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    scenarios = [
+        ("fixed width (4)", [4]),
+        ("mixed widths (4, 2)", [4, 2]),
+        ("mixed widths (6, 4, 2)", [6, 4, 2]),
+    ]
+    for name, comp_val_lens in scenarios:
+        match_datas = create_match_datas(comp_val_lens, args.blocks)
+        messages = create_messages(match_datas, args.messages, args.miss_ratio)
+        matcher = _bus.matching.MessageMatcher(match_datas)
+        result = f"{bench(matcher, messages, args.repeat):12,.0f} msg/s"
+
+        if len(comp_val_lens) == 1:
+            reference = FixedWidthMatcher(match_datas)
+            assert all(matcher.match_one(m) == reference.match_one(m) for m in messages)
+            result += f" (fixed-width reference: {bench(reference, messages, args.repeat):,.0f} msg/s)"
+
+        print(f"{name:24} {result}")
+
+
+if __name__ == "__main__":
+    main()
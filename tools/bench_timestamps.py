@@ -0,0 +1,98 @@
+from typing import Callable, Sequence
+import argparse
+import time
+from datetime import time as time_of_day
+
+from vidalicet import _log_parsing
+
+common = _log_parsing.common
+
+
+def parse_timestamp_fromisoformat(line: str) -> int | None:
+    """The timestamp parser before `common.parse_timestamp`, as a reference."""
+    try:
+        t = time_of_day.fromisoformat(line[: common.TIMESTAMP_LEN])
+    except ValueError:
+        return None
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 1000 + t.microsecond // 1000
+
+
+def create_lines(count: int, interval_ms: int) -> list[str]:
+    """Lines like VIDA's, `interval_ms` apart."""
+    lines: list[str] = []
+    for i in range(count):
+        ms = 10 * 60 * 60 * 1000 + i * interval_ms
+        seconds, millis = divmod(ms, 1000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        lines.append(
+            f"{hours % 24:02}:{minutes:02}:{seconds:02},{millis:03} [INFO ][12][VehComm   ] VehComm response: '6210001A2B'\n"
+        )
+    return lines
+
+
+def read_lines(path: str, relevant_only: bool) -> list[str]:
+    with open(path, "r") as f:
+        return [
+            line
+            for line in f
+            if not relevant_only or common.classify_line(line) is not None
+        ]
+
+
+def bench(func: Callable[[str], object], lines: Sequence[str], repeat: int) -> float:
+    """Returns the best time per line of `repeat` runs in nanoseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        best = min(best, time.perf_counter() - start)
+    return best / len(lines) * 1e9
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark of parsing log line timestamps."
+    )
+    arg_parser.add_argument(
+        "--log",
+        help="VIDA log file to use (by default, synthetic lines are used)",
+    )
+    arg_parser.add_argument(
+        "--all-lines",
+        action="store_true",
+        help="use all lines of the log file instead of just the ones that are parsed",
+    )
+    arg_parser.add_argument("--lines", type=int, default=200_000)
+    arg_parser.add_argument("--interval-ms", type=int, default=3)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    if args.log:
+        lines = read_lines(args.log, not args.all_lines)
+    else:
+        lines = create_lines(args.lines, args.interval_ms)
+    if not lines:
+        arg_parser.error("no lines to parse")
+
+    assert all(
+        common.parse_timestamp(line) == parse_timestamp_fromisoformat(line)
+        for line in lines
+        if common.parse_timestamp(line) is not None
+    )
+
+    print(f"{len(lines):,} lines")
+    print(
+        f"time.fromisoformat:     {bench(parse_timestamp_fromisoformat, lines, args.repeat):6.0f} ns/line"
+    )
+    print(
+        f"parse_timestamp:        {bench(common.parse_timestamp, lines, args.repeat):6.0f} ns/line"
+    )
+    print(
+        f"parse_log_entry:        {bench(common.parse_log_entry, lines, args.repeat):6.0f} ns/line"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,173 @@
-from typing import TextIO
+from typing import Any, Callable, Iterable, Iterator, Sequence, TextIO
 import sqlite3
 import argparse
 import os.path
-import contextlib
+import collections
+import concurrent.futures
 import csv
+import dataclasses
+import io
+import itertools
 import logging
+import mmap
+import operator
+import re
+import time
 
 from vidalicet import constants, _db
 
 logger = logging.getLogger(__name__)
 
+# Page cache of the connection while loading the dump (KiB)
+LOAD_CACHE_SIZE_KIB = 512 * 1024
+# The dump files are parsed in batches of about this size (bytes)
+BATCH_SIZE = 4 << 20
+
+# Row of a table with the values converted to their column types
+type Row = tuple[Any, ...]
+
+
+def split_dump(
+    path: str, batch_size: int = BATCH_SIZE
+) -> tuple[list[str], list[tuple[int, int]]]:
+    """
+    Split a CSV dump into batches of rows of about `batch_size` bytes that can be parsed on their
+    own. Returns the header and the byte ranges of the batches.
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return [], []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            header_end = _row_end(m, 0, 0)
+            header = next(csv.reader([m[:header_end].decode("utf-8-sig")]), [])
+            ranges: list[tuple[int, int]] = []
+            start = header_end
+            while start < size:
+                end = _row_end(m, start, start + batch_size)
+                ranges.append((start, end))
+                start = end
+    return header, ranges
+
+
+def _row_end(buf: mmap.mmap, start: int, pos: int) -> int:
+    """
+    End of the first row of `buf` that ends after `pos`, when a row starts at `start`.
+
+    Values can contain line breaks, but only quoted ones, and quotes in values are doubled. So a
+    line break ends a row if it's preceded by an even number of quotes since `start`.
+    """
+    quotes = 0
+    while True:
+        end = buf.find(b"\n", pos)
+        if end < 0:
+            return len(buf)
+        quotes += buf[start:end].count(b'"')
+        if quotes % 2 == 0:
+            return end + 1
+        start = pos = end + 1
+
+
+def read_rows(
+    dump: TextIO, header: Sequence[str], columns: Sequence[str]
+) -> Iterator[Sequence[str]]:
+    """
+    Rows of (a part of) a CSV dump as sequences of the values of `columns`, in that order. Much
+    cheaper than a dict per row.
+    """
+    reader = csv.reader(dump)
+    # Skip empty lines like csv.DictReader
+    rows = filter(None, reader)
+    indexes = [header.index(column) for column in columns]
+    if indexes == list(range(len(header))):
+        return rows
+    return map(operator.itemgetter(*indexes), rows)
+
+
+def parse_batch(
+    table_name: str, path: str, header: Sequence[str], start: int, end: int
+) -> list[Row]:
+    """Parse the rows in bytes `start:end` of the dump of a table (see `split_dump`)."""
+    table = _dump_tables_by_name[table_name]
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Decoded the same way as a file opened in text mode
+    dump = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+    return table.parse(read_rows(dump, header, table.columns))
+
+
+def parse_texts(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [(int(text_id), data) for text_id, data in rows]
+
+
+def parse_scalings(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [(int(id), definition) for id, definition in rows]
+
+
+def parse_data_types(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [(int(id), name) for id, name in rows]
+
+
+def parse_blocks(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [
+        (
+            int(id),
+            name,
+            int(name_text_id),
+            int(data_type_id),
+            int(offset) if offset != "" else 0,
+            int(length),
+        )
+        for id, name, name_text_id, data_type_id, offset, length in rows
+    ]
+
+
+def parse_block_values(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [
+        (
+            int(block_id),
+            compare_value,
+            int(scaling_id),
+            int(ppe_scaling_id),
+            int(text_id),
+            int(ppe_text_id),
+            int(ppe_unit_text_id),
+            int(sort_order),
+        )
+        for (
+            block_id,
+            compare_value,
+            scaling_id,
+            ppe_scaling_id,
+            text_id,
+            ppe_text_id,
+            ppe_unit_text_id,
+            sort_order,
+        ) in rows
+    ]
+
+
+def parse_ecu_types(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [(int(id), description) for id, description in rows]
+
+
+def parse_ecu_variants(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [
+        (int(id), int(ecu_type_id), identifier, can_id_rx)
+        for id, ecu_type_id, identifier, can_id_rx in rows
+    ]
+
+
+def parse_ecu_variant_block_trees(rows: Iterable[Sequence[str]]) -> list[Row]:
+    return [
+        (int(ecu_variant_id), int(parent_block_id), int(child_block_id))
+        for ecu_variant_id, parent_block_id, child_block_id in rows
+    ]
 
-def create_texts(con: sqlite3.Connection, dump: TextIO) -> None:
-    reader = csv.DictReader(dump)
+
+def create_texts(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE texts (
@@ -23,24 +178,24 @@ def create_texts(con: sqlite3.Connection, dump: TextIO) -> None:
         """
     )
     con.commit()
-    con.executemany(
+    inserted = con.executemany(
         """
         INSERT INTO texts (
             id,
             data
         )
         VALUES (
-            :text_id,
-            :data
+            ?,
+            ?
         )
         """,
-        reader,
-    )
+        rows,
+    ).rowcount
     con.commit()
+    return inserted
 
 
-def create_scalings(con: sqlite3.Connection, dump: TextIO) -> None:
-    reader = csv.DictReader(dump)
+def create_scalings(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE scalings (
@@ -51,24 +206,24 @@ def create_scalings(con: sqlite3.Connection, dump: TextIO) -> None:
         """
     )
     con.commit()
-    con.executemany(
+    inserted = con.executemany(
         """
         INSERT INTO scalings (
             id,
             definition
         )
         VALUES (
-            :id,
-            :definition
+            ?,
+            ?
         )
         """,
-        reader,
-    )
+        rows,
+    ).rowcount
     con.commit()
+    return inserted
 
 
-def create_data_types(con: sqlite3.Connection, dump: TextIO):
-    reader = csv.DictReader(dump)
+def create_data_types(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE data_types (
@@ -79,24 +234,24 @@ def create_data_types(con: sqlite3.Connection, dump: TextIO):
         """
     )
     con.commit()
-    con.executemany(
+    inserted = con.executemany(
         """
         INSERT INTO data_types (
             id,
             name
         )
         VALUES (
-            :id,
-            :name
+            ?,
+            ?
         )
         """,
-        reader,
-    )
+        rows,
+    ).rowcount
     con.commit()
+    return inserted
 
 
-def create_blocks(con: sqlite3.Connection, dump: TextIO):
-    reader = csv.DictReader(dump)
+def create_blocks(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE blocks (
@@ -111,10 +266,7 @@ def create_blocks(con: sqlite3.Connection, dump: TextIO):
         """
     )
     con.commit()
-    converted_rows = (
-        {**row, "offset": row["offset"] if row["offset"] != "" else 0} for row in reader
-    )
-    con.executemany(
+    inserted = con.executemany(
         """
         INSERT INTO blocks (
             id,
@@ -125,17 +277,18 @@ def create_blocks(con: sqlite3.Connection, dump: TextIO):
             length
         )
         VALUES (
-            :id,
-            :name,
-            :name_text_id,
-            :data_type_id,
-            :offset,
-            :length
+            ?,
+            ?,
+            ?,
+            ?,
+            ?,
+            ?
         )
         """,
-        converted_rows,
-    )
+        rows,
+    ).rowcount
     con.commit()
+    return inserted
 
 
 # def parse_compare_value(value: str) -> bytes | None:
@@ -171,8 +324,7 @@ def create_blocks(con: sqlite3.Connection, dump: TextIO):
 #             return None
 
 
-def create_block_values(con: sqlite3.Connection, dump: TextIO):
-    reader = csv.DictReader(dump)
+def create_block_values(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE block_values (
@@ -188,13 +340,8 @@ def create_block_values(con: sqlite3.Connection, dump: TextIO):
         STRICT
         """
     )
-    con.execute(
-        """
-        CREATE INDEX block_values_block_id ON block_values (block_id)
-        """
-    )
     con.commit()
-    con.executemany(
+    inserted = con.executemany(
         """
         INSERT INTO block_values (
             block_id,
@@ -207,23 +354,23 @@ def create_block_values(con: sqlite3.Connection, dump: TextIO):
             sort_order
         )
         VALUES (
-            :block_id,
-            :compare_value,
-            :scaling_id,
-            :ppe_scaling_id,
-            :text_id,
-            :ppe_text_id,
-            :ppe_unit_text_id,
-            :sort_order
+            ?,
+            ?,
+            ?,
+            ?,
+            ?,
+            ?,
+            ?,
+            ?
         )
         """,
-        reader,
-    )
+        rows,
+    ).rowcount
     con.commit()
+    return inserted
 
 
-def create_ecu_types(con: sqlite3.Connection, dump: TextIO):
-    reader = csv.DictReader(dump)
+def create_ecu_types(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE ecu_types (
@@ -234,24 +381,24 @@ def create_ecu_types(con: sqlite3.Connection, dump: TextIO):
         """
     )
     con.commit()
-    con.executemany(
+    inserted = con.executemany(
         """
         INSERT INTO ecu_types (
             id,
             description
         )
         VALUES (
-            :id,
-            :description
+            ?,
+            ?
         )
         """,
-        reader,
-    )
+        rows,
+    ).rowcount
     con.commit()
+    return inserted
 
 
-def create_ecu_variants(con: sqlite3.Connection, dump: TextIO):
-    reader = csv.DictReader(dump)
+def create_ecu_variants(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE ecu_variants (
@@ -264,7 +411,7 @@ def create_ecu_variants(con: sqlite3.Connection, dump: TextIO):
         """
     )
     con.commit()
-    con.executemany(
+    inserted = con.executemany(
         """
         INSERT INTO ecu_variants (
             id,
@@ -273,19 +420,19 @@ def create_ecu_variants(con: sqlite3.Connection, dump: TextIO):
             can_id_rx
         )
         VALUES (
-            :id,
-            :ecu_type_id,
-            :identifier,
-            :can_id_rx
+            ?,
+            ?,
+            ?,
+            ?
         )
         """,
-        reader,
-    )
+        rows,
+    ).rowcount
     con.commit()
+    return inserted
 
 
-def create_ecu_variant_block_trees(con: sqlite3.Connection, dump: TextIO):
-    reader = csv.DictReader(dump)
+def create_ecu_variant_block_trees(con: sqlite3.Connection, rows: Iterable[Row]) -> int:
     con.execute(
         """
         CREATE TABLE ecu_variant_block_trees (
@@ -298,61 +445,193 @@ def create_ecu_variant_block_trees(con: sqlite3.Connection, dump: TextIO):
         """
     )
     con.commit()
-    con.executemany(
+
+    # The dump can contain duplicates and rows that refer to missing ECU variants or blocks. Load
+    # it into a temporary table without any indexes first, and then insert the valid rows in one
+    # pass in primary key order, which builds the primary key index sequentially.
+    con.execute(
         """
-        INSERT OR IGNORE INTO ecu_variant_block_trees (
+        CREATE TEMP TABLE ecu_variant_block_trees_dump (
+            ecu_variant_id INTEGER,
+            parent_block_id INTEGER,
+            child_block_id INTEGER
+        )
+        STRICT
+        """
+    )
+    dumped = con.executemany(
+        """
+        INSERT INTO ecu_variant_block_trees_dump (
             ecu_variant_id,
             parent_block_id,
             child_block_id
         )
         VALUES (
-            :ecu_variant_id,
-            :parent_block_id,
-            :child_block_id
+            ?,
+            ?,
+            ?
         )
         """,
-        reader,
-    )
+        rows,
+    ).rowcount
+    inserted = con.execute(
+        """
+        INSERT OR IGNORE INTO ecu_variant_block_trees (
+            ecu_variant_id,
+            parent_block_id,
+            child_block_id
+        )
+        SELECT
+            ecu_variant_id,
+            parent_block_id,
+            child_block_id
+        FROM ecu_variant_block_trees_dump
+        WHERE
+            ecu_variant_id IN (SELECT id FROM ecu_variants)
+            AND parent_block_id IN (SELECT id FROM blocks)
+            AND child_block_id IN (SELECT id FROM blocks)
+        ORDER BY ecu_variant_id, parent_block_id, child_block_id
+        """
+    ).rowcount
+    con.execute("""DROP TABLE ecu_variant_block_trees_dump""")
     con.commit()
+    logger.info(f"Skipped {dumped - inserted} duplicate or orphan block tree rows")
+    return inserted
+
+
+@dataclasses.dataclass(frozen=True)
+class DumpTable:
+    name: str
+    # Columns read from the dump, in the order `parse` takes them
+    columns: tuple[str, ...]
+    # Converts rows of the dump into rows of the table. Run in worker processes.
+    parse: Callable[[Iterable[Sequence[str]]], list[Row]]
+    # Creates the table and inserts rows into it. Returns the number of rows inserted.
+    create: Callable[[sqlite3.Connection, Iterable[Row]], int]
+
+
+# In dependency order
+dump_tables = (
+    DumpTable("texts", ("text_id", "data"), parse_texts, create_texts),
+    DumpTable("scalings", ("id", "definition"), parse_scalings, create_scalings),
+    DumpTable("data_types", ("id", "name"), parse_data_types, create_data_types),
+    DumpTable(
+        "blocks",
+        ("id", "name", "name_text_id", "data_type_id", "offset", "length"),
+        parse_blocks,
+        create_blocks,
+    ),
+    DumpTable(
+        "block_values",
+        (
+            "block_id",
+            "compare_value",
+            "scaling_id",
+            "ppe_scaling_id",
+            "text_id",
+            "ppe_text_id",
+            "ppe_unit_text_id",
+            "sort_order",
+        ),
+        parse_block_values,
+        create_block_values,
+    ),
+    DumpTable("ecu_types", ("id", "description"), parse_ecu_types, create_ecu_types),
+    DumpTable(
+        "ecu_variants",
+        ("id", "ecu_type_id", "identifier", "can_id_rx"),
+        parse_ecu_variants,
+        create_ecu_variants,
+    ),
+    DumpTable(
+        "ecu_variant_block_trees",
+        ("ecu_variant_id", "parent_block_id", "child_block_id"),
+        parse_ecu_variant_block_trees,
+        create_ecu_variant_block_trees,
+    ),
+)
+_dump_tables_by_name = {table.name: table for table in dump_tables}
+
+
+def create_indexes(con: sqlite3.Connection):
+    # ecu_variant_block_trees needs no extra indexes: its primary key index
+    # (ecu_variant_id, parent_block_id, child_block_id) covers lookups by ECU variant
+    # as well as by (ECU variant, parent block). ecu_variants.identifier is UNIQUE and
+    # thus indexed too.
+
+    # Parent block matching: covering
     con.execute(
         """
-        DELETE FROM ecu_variant_block_trees
-        WHERE rowid IN (
-            SELECT DISTINCT block_trees.rowid
-            FROM ecu_variant_block_trees block_trees
-            LEFT JOIN ecu_variants ON ecu_variants.id = block_trees.ecu_variant_id
-            LEFT JOIN blocks parent_blocks ON parent_blocks.id = block_trees.parent_block_id
-            LEFT JOIN blocks child_blocks ON child_blocks.id = block_trees.child_block_id
-            WHERE
-                ecu_variants.id IS NULL
-                OR parent_blocks.id IS NULL
-                OR child_blocks.id IS NULL
-        )
+        CREATE INDEX block_values_block_id_compare_value
+        ON block_values (block_id, compare_value)
         """
     )
     con.commit()
 
 
-creator_funcs = (
-    ("texts", create_texts),
-    ("scalings", create_scalings),
-    ("data_types", create_data_types),
-    ("blocks", create_blocks),
-    ("block_values", create_block_values),
-    ("ecu_types", create_ecu_types),
-    ("ecu_variants", create_ecu_variants),
-    ("ecu_variant_block_trees", create_ecu_variant_block_trees),
+# Table access in a query plan, e.g. "SEARCH blocks USING INTEGER PRIMARY KEY (rowid=?)". SQLite
+# before 3.36 writes "SCAN TABLE ecu_variant_block_trees AS ecu_blocks" instead of "SCAN ecu_blocks".
+query_plan_table_access = re.compile(
+    r"(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?(.*)"
 )
 
 
+def reader_queries() -> list[tuple[str, str, Sequence[Any] | dict[str, Any]]]:
+    """The queries run by Reader, with placeholder parameters to explain them with."""
+    return [
+        ("parent match data", _db.matching.parent_match_data_query(2), ("", "")),
+        (
+            "child block specs",
+            _db.child_blocks.child_block_specs_query(),
+            {"ecu_variant_id": 0, "parent_block_id": 0},
+        ),
+        (
+            "child block specs by parent",
+            _db.child_blocks.child_block_specs_by_parent_query(2),
+            (0, 0),
+        ),
+    ]
+
+
+def check_query_plans(con: sqlite3.Connection):
+    """
+    Raise RuntimeError if any of the queries run by Reader would scan a table in full, or build an
+    automatic index for it (which takes a full scan too).
+
+    Only meaningful before ANALYZE: without statistics, the planner takes every table to be large,
+    so it only scans a table if no index fits the query.
+    """
+    for name, query, params in reader_queries():
+        plan = con.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        for _, _, _, detail in plan:
+            logger.debug(f"Query plan of {name}: {detail}")
+            match = query_plan_table_access.match(detail)
+            if match is None:
+                continue
+            operation, table, alias, rest = match.groups()
+            if operation == "SCAN" or " AUTOMATIC " in rest:
+                raise RuntimeError(
+                    f"Query '{name}' scans table '{alias or table}' in full: {detail}"
+                )
+
+
 def init(con: sqlite3.Connection):
     con.execute("""PRAGMA journal_mode = WAL""")
     # Disable foreign key enforcement temporarily (block tree dump can contain extra data)
     con.execute("""PRAGMA foreign_keys = false""")
+    # Bulk load settings: a crash during the load leaves a broken db anyway, which has to be
+    # created again, so there's no point in syncing to disk until the end
+    con.execute("""PRAGMA synchronous = OFF""")
+    con.execute(f"""PRAGMA cache_size = -{LOAD_CACHE_SIZE_KIB}""")
+    con.execute("""PRAGMA temp_store = MEMORY""")
     con.commit()
 
 
 def clean_up(con: sqlite3.Connection):
+    # Back to safe defaults for the final writes
+    con.execute("""PRAGMA synchronous = FULL""")
+    con.execute("""PRAGMA cache_size = -2000""")
+
     # Enable foreign key enforcement again
     con.execute("""PRAGMA foreign_keys = true""")
     con.commit()
@@ -362,21 +641,92 @@ def clean_up(con: sqlite3.Connection):
     con.commit()
     assert len(check_result) == 0, check_result
 
+    # Check before gathering statistics: with them, the planner can rightly prefer full scans
+    # of tables that happen to be small (e.g. in a partial dump), which would mask missing indexes
+    check_query_plans(con)
+
+    # Gather statistics for the query planner
+    con.execute("""ANALYZE""")
+    con.commit()
+
     con.execute("""VACUUM""")
     con.commit()
 
 
-@contextlib.contextmanager
-def open_dump_files(dump_dir: str):
-    files = {
-        name: open(os.path.join(dump_dir, f"{name}.csv"), "r", encoding="utf-8-sig")
-        for name, _ in creator_funcs
-    }
-    try:
-        yield files
-    finally:
-        for f in files.values():
-            f.close()
+def _parse_batches(
+    executor: concurrent.futures.Executor,
+    tasks: Iterable[tuple[str, str, Sequence[str], int, int]],
+    max_pending: int,
+) -> Iterator[list[Row]]:
+    """
+    Parse batches (arguments of `parse_batch`) in `executor`, and yield the results in order. Up to
+    `max_pending` batches are parsed ahead, so that memory use stays bounded if inserting is slower.
+    """
+    pending: collections.deque[concurrent.futures.Future[list[Row]]] = (
+        collections.deque()
+    )
+    for task in tasks:
+        pending.append(executor.submit(parse_batch, *task))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _log_rate(message: str, row_count: int, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    rate = row_count / elapsed if elapsed > 0 else 0
+    logger.info(f"{message} in {elapsed:.2f} s ({rate:.0f} rows/s)")
+
+
+def create_db(dump_dir: str, db_path: str, max_workers: int | None = None) -> None:
+    """
+    Create the db at `db_path` from the CSV dump in `dump_dir`.
+
+    The dump files are parsed in batches in `max_workers` worker processes (one per CPU by
+    default). This process inserts the rows, one table at a time in dependency order, while the
+    following batches are being parsed. With `max_workers=1`, everything is done in this process.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    tasks: list[tuple[str, str, Sequence[str], int, int]] = []
+    batch_counts: list[int] = []
+    for table in dump_tables:
+        path = os.path.join(dump_dir, f"{table.name}.csv")
+        header, ranges = split_dump(path)
+        missing = [column for column in table.columns if column not in header]
+        if missing:
+            raise ValueError(
+                f"Columns missing from dump '{path}': {missing}. Header: {header}"
+            )
+        tasks.extend((table.name, path, header, start, end) for start, end in ranges)
+        batch_counts.append(len(ranges))
+
+    con = _db.connection.connect(db_path)
+    init(con)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        if max_workers > 1:
+            batches = _parse_batches(executor, tasks, 2 * max_workers)
+        else:
+            # A single worker process would only add the cost of passing the rows around
+            batches = (parse_batch(*task) for task in tasks)
+        for table, batch_count in zip(dump_tables, batch_counts):
+            logger.info(f"Creating table '{table.name}'...")
+            start = time.perf_counter()
+            rows = itertools.chain.from_iterable(itertools.islice(batches, batch_count))
+            row_count = table.create(con, rows)
+            _log_rate(
+                f"Inserted {row_count} rows into '{table.name}'", row_count, start
+            )
+
+    # Indexes are built after inserting, which is faster than updating them for every row
+    logger.info("Creating indexes...")
+    create_indexes(con)
+
+    clean_up(con)
+    con.close()
 
 
 def main():
@@ -386,18 +736,16 @@ def main():
         description="Create an SQLite database from a CSV dump of Vida's database."
     )
     arg_parser.add_argument("dump_dir", help="path to directory containing .csv files")
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of processes parsing the dump (default: number of CPUs)",
+    )
     args = arg_parser.parse_args()
 
-    con = _db.connection.connect(constants.DEFAULT_DB_PATH)
-    init(con)
-
-    with open_dump_files(args.dump_dir) as dump_files:
-        for name, creator_func in creator_funcs:
-            logger.info(f"Creating table '{name}'...")
-            creator_func(con, dump_files[name])
-
-    clean_up(con)
-    con.close()
+    create_db(args.dump_dir, constants.DEFAULT_DB_PATH, args.workers)
 
 
-main()
+if __name__ == "__main__":
+    main()
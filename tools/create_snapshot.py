@@ -0,0 +1,81 @@
+from typing import Iterable
+import argparse
+import logging
+
+from vidalicet import constants, snapshot, _db, _log_parsing
+
+logger = logging.getLogger(__name__)
+
+
+def detect_ecu_identifiers(log_paths: Iterable[str]) -> set[str]:
+    """Read the ECU identifiers of a session from its log files (in order)."""
+    ecu_identifiers: set[str] = set()
+    parser = _log_parsing.session.SessionParser()
+
+    for path in log_paths:
+        for chunk in _log_parsing.chunks.read_chunks(path):
+            parser.feed(chunk)
+            if parser.state.phase == "parameters":
+                break
+        else:
+            parser.end_file()
+        ecu_identifiers.update(
+            ecu_identifier for ecu_identifier, _ in parser.pop_ecu_identifiers()
+        )
+        if parser.state.phase == "parameters":
+            # ECU identification phase complete
+            break
+
+    return ecu_identifiers
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+
+    arg_parser = argparse.ArgumentParser(
+        description="Create a snapshot of the db for a set of ECUs, for use with `Reader(snapshot_path=...)`."
+    )
+    arg_parser.add_argument("output", help="path of the snapshot file to create")
+    arg_parser.add_argument(
+        "ecu_identifiers", nargs="*", help="ECU identifiers to include"
+    )
+    arg_parser.add_argument(
+        "--log",
+        nargs="+",
+        default=[],
+        help="log files of a session (in order) to detect the ECU identifiers from",
+    )
+    arg_parser.add_argument(
+        "--db", default=constants.DEFAULT_DB_PATH, help="path to the db"
+    )
+    args = arg_parser.parse_args()
+
+    ecu_identifiers = set(args.ecu_identifiers)
+    if args.log:
+        detected = detect_ecu_identifiers(args.log)
+        logger.info(f"Detected {len(detected)} ECU identifiers in log files")
+        ecu_identifiers |= detected
+    if not ecu_identifiers:
+        arg_parser.error("no ECU identifiers given or detected")
+
+    con = _db.connection.connect(args.db)
+    logger.info(f"Creating snapshot for ECU identifiers: {sorted(ecu_identifiers)}")
+    snap = snapshot.create(con, ecu_identifiers)
+    con.close()
+
+    unknown = ecu_identifiers - {
+        ecu_identifier
+        for ecu_identifier, match_datas in snap.parent_match_data.items()
+        if match_datas
+    }
+    if unknown:
+        logger.warning(f"ECU identifiers not found in db: {sorted(unknown)}")
+
+    snapshot.save(snap, args.output)
+    logger.info(
+        f"Saved snapshot of {len(snap.child_block_specs)} parent blocks to '{args.output}'"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+from typing import Any, Iterable, Iterator, Sequence
+import argparse
+import csv
+import logging
+import os
+import random
+import struct
+from dataclasses import dataclass
+
+from vidalicet import constants
+
+from . import create_db
+
+logger = logging.getLogger(__name__)
+
+# Kinds of child blocks, cycled through in each parent block: (data type, length in bits, scaling)
+CHILD_KINDS = (
+    ("Unsigned", 16, "x*0.25"),
+    ("Signed", 8, "x-40"),
+    ("Unsigned", 4, "x"),
+    ("Unsigned", 4, "x & 0x0F"),
+    ("4-byte float", 32, "x"),
+    ("Unsigned", 8, "x/10-40"),
+)
+DATA_TYPES = ("Unsigned", "Signed", "4-byte float")
+# Payload of a negative response (service 0x22 not supported), which matches no block
+NEGATIVE_RESPONSE = "7F2231"
+UNKNOWN_ECU_IDENTIFIER = "UNKNOWN-0000"
+
+
+@dataclass(frozen=True)
+class Session:
+    """Shape of a synthetic diagnostic session and the db it's read with."""
+
+    ecu_count: int = 4
+    parents_per_ecu: int = 20
+    children_per_parent: int = 6
+    # Parameter reads (request/response pairs)
+    reads: int = 100_000
+    # Irrelevant lines after each request
+    noise_lines: int = 8
+    # Log files the session is rotated into
+    files: int = 4
+    # Share of reads answered with a negative response
+    negative_ratio: float = 0.02
+    # Time between reads
+    interval_ms: int = 5
+    start_ms: int = 10 * 60 * 60 * 1000
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class _Parent:
+    block_id: int
+    can_id: str
+    compare_value: str
+
+
+def _ecu_identifier(ecu_i: int) -> str:
+    return f"{31000000 + ecu_i} AA"
+
+
+def _can_id(ecu_i: int) -> str:
+    return f"{0x7E8 + ecu_i:03X}"
+
+
+def _compare_value(parent_i: int) -> str:
+    return f"{0x4000 + parent_i:04X}"
+
+
+def _parent_block_id(session: Session, ecu_i: int, parent_i: int) -> int:
+    return 1000 + ecu_i * session.parents_per_ecu + parent_i
+
+
+def _child_block_id(session: Session, parent_block_id: int, child_i: int) -> int:
+    return 100_000 + parent_block_id * session.children_per_parent + child_i
+
+
+def _parents(session: Session) -> list[_Parent]:
+    parents: list[_Parent] = []
+    for ecu_i in range(session.ecu_count):
+        for parent_i in range(session.parents_per_ecu):
+            parents.append(
+                _Parent(
+                    block_id=_parent_block_id(session, ecu_i, parent_i),
+                    can_id=_can_id(ecu_i),
+                    compare_value=_compare_value(parent_i),
+                )
+            )
+    return parents
+
+
+def _random_payload(rng: random.Random, children_per_parent: int) -> str:
+    """Payload of a parent block with random child values, in hex."""
+    value = 0
+    bit_length = 0
+    for child_i in range(children_per_parent):
+        data_type, length, _ = CHILD_KINDS[child_i % len(CHILD_KINDS)]
+        if data_type == "4-byte float":
+            (bits,) = struct.unpack(">I", struct.pack(">f", rng.uniform(-100, 100)))
+        else:
+            bits = rng.getrandbits(length)
+        value = (value << length) | bits
+        bit_length += length
+    payload_length = (bit_length + 7) // 8
+    value <<= payload_length * 8 - bit_length
+    return value.to_bytes(payload_length).hex().upper()
+
+
+def _write_csv(
+    dump_dir: str, name: str, header: Sequence[str], rows: Iterable[Sequence[Any]]
+) -> None:
+    # VIDA's dump is written with a BOM
+    with open(
+        os.path.join(dump_dir, f"{name}.csv"), "w", newline="", encoding="utf-8-sig"
+    ) as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_dump(session: Session, dump_dir: str) -> None:
+    """Write a CSV dump (like `DumpEcuParams.ps1`'s) of the blocks the session reads."""
+    os.makedirs(dump_dir, exist_ok=True)
+
+    scalings = sorted({scaling for _, _, scaling in CHILD_KINDS})
+    scaling_ids = {scaling: i + 1 for i, scaling in enumerate(scalings)}
+    data_type_ids = {name: i + 1 for i, name in enumerate(DATA_TYPES)}
+    texts: list[tuple[int, str]] = [(1, ""), (2, "-")]
+    blocks: list[tuple[Any, ...]] = []
+    block_values: list[tuple[Any, ...]] = []
+    block_trees: list[tuple[int, int, int]] = []
+
+    for ecu_i in range(session.ecu_count):
+        for parent_i in range(session.parents_per_ecu):
+            parent_block_id = _parent_block_id(session, ecu_i, parent_i)
+            blocks.append(
+                (
+                    parent_block_id,
+                    f"P{parent_block_id}",
+                    1,
+                    data_type_ids["Unsigned"],
+                    "",
+                    16,
+                )
+            )
+            block_values.append(
+                (parent_block_id, f"0x{_compare_value(parent_i)}", 1, 1, 1, 1, 1, 0)
+            )
+
+            offset = 0
+            for child_i in range(session.children_per_parent):
+                data_type, length, scaling = CHILD_KINDS[child_i % len(CHILD_KINDS)]
+                block_id = _child_block_id(session, parent_block_id, child_i)
+                text_id = len(texts) + 1
+                texts.append((text_id, f"Parameter {block_id}"))
+                blocks.append(
+                    (
+                        block_id,
+                        f"param_{block_id}",
+                        text_id,
+                        data_type_ids[data_type],
+                        offset,
+                        length,
+                    )
+                )
+                block_values.append(
+                    (
+                        block_id,
+                        "",
+                        scaling_ids[scaling],
+                        scaling_ids[scaling],
+                        text_id,
+                        text_id,
+                        2,
+                        0,
+                    )
+                )
+                block_trees.append((ecu_i + 1, parent_block_id, block_id))
+                offset += length
+
+    _write_csv(dump_dir, "texts", ("text_id", "data"), texts)
+    _write_csv(
+        dump_dir,
+        "scalings",
+        ("id", "definition"),
+        ((i, scaling) for scaling, i in scaling_ids.items()),
+    )
+    _write_csv(
+        dump_dir,
+        "data_types",
+        ("id", "name"),
+        ((i, name) for name, i in data_type_ids.items()),
+    )
+    _write_csv(
+        dump_dir,
+        "blocks",
+        ("id", "name", "name_text_id", "data_type_id", "offset", "length"),
+        blocks,
+    )
+    _write_csv(
+        dump_dir,
+        "block_values",
+        (
+            "block_id",
+            "compare_value",
+            "scaling_id",
+            "ppe_scaling_id",
+            "text_id",
+            "ppe_text_id",
+            "ppe_unit_text_id",
+            "sort_order",
+        ),
+        block_values,
+    )
+    _write_csv(dump_dir, "ecu_types", ("id", "description"), [(1, "ECU")])
+    _write_csv(
+        dump_dir,
+        "ecu_variants",
+        ("id", "ecu_type_id", "identifier", "can_id_rx"),
+        (
+            (ecu_i + 1, 1, _ecu_identifier(ecu_i), _can_id(ecu_i))
+            for ecu_i in range(session.ecu_count)
+        ),
+    )
+    _write_csv(
+        dump_dir,
+        "ecu_variant_block_trees",
+        ("ecu_variant_id", "parent_block_id", "child_block_id"),
+        block_trees,
+    )
+
+
+def _format_line(time_ms: int, thread: int, category: str, message: str) -> str:
+    seconds, millis = divmod(time_ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours % 24:02}:{minutes:02}:{seconds:02},{millis:03} [INFO ][{thread}][{category:<10}] {message}\n"
+
+
+def generate_lines(session: Session) -> Iterator[str]:
+    """All lines of the session's log, in order."""
+    rng = random.Random(session.seed)
+    t = session.start_ms
+    parents = _parents(session)
+
+    yield _format_line(t, 1, "Diag", "Starting diagnostic session")
+    yield _format_line(t, 1, "Diag", "> PerformEcuIdentification <")
+    for ecu_i in range(session.ecu_count):
+        t += 20
+        can_id = _can_id(ecu_i)
+        yield _format_line(
+            t, 12, "VehComm", f"VehComm request: Ecu '{can_id}' Data '22F1A0'"
+        )
+        yield _format_line(
+            t, 12, "VehComm", f"VehComm response: '62F1A0{31000000 + ecu_i:08X}'"
+        )
+        yield _format_line(
+            t,
+            5,
+            "SP",
+            f"SP: general_GetEcuId, EcuId: {_ecu_identifier(ecu_i)}, Result: OK",
+        )
+    t += 20
+    yield _format_line(
+        t, 5, "SP", f"SP: general_GetEcuId, EcuId: {UNKNOWN_ECU_IDENTIFIER}, Result: OK"
+    )
+    yield _format_line(t, 1, "Diag", "> PerformCarConfigReadout <")
+
+    for i in range(session.reads):
+        t += session.interval_ms
+        # The watchlist is polled round-robin
+        parent = parents[i % len(parents)]
+        yield _format_line(
+            t,
+            12,
+            "VehComm",
+            f"VehComm request: Ecu '{parent.can_id}' Data '22{parent.compare_value}'",
+        )
+        for j in range(session.noise_lines):
+            yield _format_line(
+                t,
+                7 + j % 3,
+                "Other",
+                f"Diagnostic event {j}: status 0x{rng.randrange(1 << 32):08X}, counter {i}",
+            )
+        if rng.random() < session.negative_ratio:
+            response = NEGATIVE_RESPONSE
+        else:
+            payload = _random_payload(rng, session.children_per_parent)
+            response = f"62{parent.compare_value}{payload}"
+        yield _format_line(t + 1, 12, "VehComm", f"VehComm response: '{response}'")
+
+
+def log_paths(log_dir: str, name: str, files: int) -> list[str]:
+    """Paths of the log files of a session in order: `.log0`, `.log1`, ..., and `.log` last."""
+    return [
+        os.path.join(log_dir, f"{name}.log{'' if i == files - 1 else i}")
+        for i in range(files)
+    ]
+
+
+def write_logs(session: Session, log_dir: str, name: str = "synthetic") -> list[str]:
+    """
+    Write the session's log, rotated into `session.files` files of about equal size.
+    Returns the paths in order.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    lines = list(generate_lines(session))
+    paths = log_paths(log_dir, name, session.files)
+    file_line_count = -(-len(lines) // session.files)
+    for i, path in enumerate(paths):
+        with open(path, "w", newline="") as f:
+            f.writelines(lines[i * file_line_count : (i + 1) * file_line_count])
+    return paths
+
+
+def write_session(session: Session, output_dir: str) -> tuple[str, list[str]]:
+    """
+    Write the session's logs and a db to read them with into `output_dir`.
+    Returns the path of the db and the paths of the logs in order.
+    """
+    dump_dir = os.path.join(output_dir, "dump")
+    db_path = os.path.join(output_dir, constants.DEFAULT_DB_PATH)
+    write_dump(session, dump_dir)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    create_db.create_db(dump_dir, db_path)
+    return db_path, write_logs(session, output_dir)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+
+    arg_parser = argparse.ArgumentParser(
+        description="Generate synthetic VIDA logs and a db to read them with."
+    )
+    arg_parser.add_argument("output_dir", help="directory to write the files into")
+    arg_parser.add_argument("--ecus", type=int, default=Session.ecu_count)
+    arg_parser.add_argument("--parents", type=int, default=Session.parents_per_ecu)
+    arg_parser.add_argument("--children", type=int, default=Session.children_per_parent)
+    arg_parser.add_argument("--reads", type=int, default=Session.reads)
+    arg_parser.add_argument("--noise", type=int, default=Session.noise_lines)
+    arg_parser.add_argument("--files", type=int, default=Session.files)
+    arg_parser.add_argument("--seed", type=int, default=Session.seed)
+    args = arg_parser.parse_args()
+
+    session = Session(
+        ecu_count=args.ecus,
+        parents_per_ecu=args.parents,
+        children_per_parent=args.children,
+        reads=args.reads,
+        noise_lines=args.noise,
+        files=args.files,
+        seed=args.seed,
+    )
+    db_path, paths = write_session(session, args.output_dir)
+    logger.info(f"Wrote '{db_path}' and {len(paths)} log files")
+
+
+if __name__ == "__main__":
+    main()
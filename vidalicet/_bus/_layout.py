@@ -0,0 +1,166 @@
+from typing import Any, Literal, Sequence
+from array import array
+from dataclasses import dataclass
+
+from .common import np
+from .. import _db
+from ..stats import SkipReason
+
+type FieldKind = Literal["unsigned"] | Literal["signed"] | Literal["float"]
+
+# Wide enough for every parameter in VIDA, and keeps unaligned fields within 5 bytes
+MAX_FIELD_BITS = 32
+
+
+@dataclass(frozen=True)
+class FieldLayout:
+    """Location of a child block's value in the parent block's payload."""
+
+    spec: _db.child_blocks.DbChildBlockSpec
+    kind: FieldKind
+    # First byte that contains bits of the field
+    byte_offset: int
+    # Number of bytes that contain bits of the field
+    byte_length: int
+    # Right shift that aligns the field after reading its bytes as a big-endian integer
+    shift: int
+    bit_length: int
+
+
+@dataclass(frozen=True)
+class BlockLayout:
+    """Layouts of all (supported) child blocks of a parent block."""
+
+    fields: list[FieldLayout]
+    # Minimum payload length needed to decode all fields
+    payload_length: int
+    # Why the other child blocks can't be decoded, one reason per block
+    unsupported_reasons: list[SkipReason]
+
+
+def _get_field_kind(data_type: str, bit_length: int) -> FieldKind | None:
+    match data_type:
+        case "Signed":
+            return "signed"
+        case "Unsigned":
+            return "unsigned"
+        case "4-byte float" if bit_length == 32:
+            return "float"
+        case _:
+            return None
+
+
+def create_field_layout(
+    spec: _db.child_blocks.DbChildBlockSpec,
+) -> FieldLayout | SkipReason:
+    """
+    Returns the reason the child block can't be decoded instead if it's of an unsupported type.
+
+    Offsets and lengths are in bits, counted from the most significant bit of the payload.
+    """
+    if spec.offset < 0 or not 0 < spec.length <= MAX_FIELD_BITS:
+        return "unsupported_length"
+    kind = _get_field_kind(spec.data_type, spec.length)
+    if kind is None:
+        return "unsupported_data_type"
+
+    byte_offset, bit_offset = divmod(spec.offset, 8)
+    byte_length = (bit_offset + spec.length + 7) // 8
+    return FieldLayout(
+        spec=spec,
+        kind=kind,
+        byte_offset=byte_offset,
+        byte_length=byte_length,
+        shift=byte_length * 8 - bit_offset - spec.length,
+        bit_length=spec.length,
+    )
+
+
+def create_block_layout(
+    specs: Sequence[_db.child_blocks.DbChildBlockSpec],
+) -> BlockLayout:
+    fields: list[FieldLayout] = []
+    unsupported_reasons: list[SkipReason] = []
+    for spec in specs:
+        layout = create_field_layout(spec)
+        if isinstance(layout, FieldLayout):
+            fields.append(layout)
+        else:
+            unsupported_reasons.append(layout)
+    return BlockLayout(
+        fields=fields,
+        payload_length=max((f.byte_offset + f.byte_length for f in fields), default=0),
+        unsupported_reasons=unsupported_reasons,
+    )
+
+
+def _to_float32(values: array[int]) -> array[float]:
+    """Reinterpret 32-bit integers as floats."""
+    floats = array("f")
+    floats.frombytes(values.tobytes())
+    return array("d", floats)
+
+
+def decode(layout: BlockLayout, payloads: bytes) -> list[array[int] | array[float]]:
+    """
+    Decode all fields from `payloads`: the payloads of consecutive readings, each exactly
+    `layout.payload_length` bytes long.
+
+    Each payload is converted to an integer once, and every field is masked out of it. Returns a
+    column of values per field, in the order of `layout.fields`.
+    """
+    payload_length = layout.payload_length
+    wholes = [
+        int.from_bytes(payloads[i : i + payload_length])
+        for i in range(0, len(payloads), payload_length)
+    ]
+
+    columns: list[array[int] | array[float]] = []
+    for field in layout.fields:
+        shift = (
+            payload_length - field.byte_offset - field.byte_length
+        ) * 8 + field.shift
+        mask = (1 << field.bit_length) - 1
+        match field.kind:
+            case "unsigned":
+                columns.append(array("q", [(w >> shift) & mask for w in wholes]))
+            case "signed":
+                sign = 1 << (field.bit_length - 1)
+                columns.append(
+                    array("q", [(((w >> shift) & mask) ^ sign) - sign for w in wholes])
+                )
+            case "float":
+                columns.append(
+                    _to_float32(array("I", [(w >> shift) & mask for w in wholes]))
+                )
+    return columns
+
+
+def decode_vectorized(
+    layout: BlockLayout, payloads: bytes
+) -> list["np.ndarray[Any, Any]"]:
+    """
+    Like `decode`, but decodes into NumPy arrays.
+
+    Integers are widened to `int64` and floats to `float64` so that scaling can't overflow and
+    produces the same results as scaling Python numbers.
+    """
+    matrix = np.frombuffer(payloads, dtype=np.uint8).reshape(-1, layout.payload_length)
+
+    columns: list["np.ndarray[Any, Any]"] = []
+    for field in layout.fields:
+        raw = np.zeros(matrix.shape[0], dtype=np.uint64)
+        for i in range(field.byte_offset, field.byte_offset + field.byte_length):
+            raw = (raw << np.uint64(8)) | matrix[:, i]
+        raw = (raw >> np.uint64(field.shift)) & np.uint64((1 << field.bit_length) - 1)
+        match field.kind:
+            case "unsigned":
+                columns.append(raw.astype(np.int64))
+            case "signed":
+                sign = np.int64(1 << (field.bit_length - 1))
+                columns.append((raw.astype(np.int64) ^ sign) - sign)
+            case "float":
+                columns.append(
+                    raw.astype(np.uint32).view(np.float32).astype(np.float64)
+                )
+    return columns
@@ -1,104 +1,179 @@
-from typing import Any, TypeGuard
+from typing import Any, Callable
 import os
-from numbers import Real
-from lark import Lark, ParseTree, Token, Transformer
+import re
+from lark import Lark, ParseTree, Token, Transformer, Tree
 import math
-from functools import cache
 
+type Scaling = Callable[[int | float], int | float]
 
-def _is_real(*values: object) -> TypeGuard[Real]:
-    return all(isinstance(value, Real) for value in values)
 
-
-class _ScalingTransformer(Transformer[Any, Any]):
-    x: int | float
-
-    def __init__(self, x: int | float):
-        self.x = x
+class _ScalingCompiler(Transformer[Any, str]):
+    """Transforms a scaling parse tree into an equivalent Python expression of `x`."""
 
     def INT(self, token: Token):
-        return int(token)
+        return repr(int(token))
 
     def FLOAT(self, token: Token):
-        return float(token)
+        return repr(float(token))
 
     def HEX(self, token: Token):
         # TODO: Endianness?
-        return bytes.fromhex(token[2:])
+        return repr(int.from_bytes(bytes.fromhex(token[2:])))
 
     def BITS(self, token: Token):
         # TODO: Endianness?
-        return int(token, base=0).to_bytes(byteorder="big")
+        return repr(int(token, base=0))
 
     def CNAME(self, token: Token):
         if token.value in ("x", "X"):
-            return self.x
+            return "x"
+        if not token.value.isidentifier():
+            raise ValueError(f"Invalid name: {token.value!r}")
         return token.value
 
-    def atom(self, tokens: list[Any]):
+    def atom(self, tokens: list[str]):
         assert len(tokens) == 1
-        return tokens[0]
+        (source,) = tokens
+        if source.isidentifier() and source != "x":
+            raise ValueError(f"Unknown variable: {source}")
+        return source
 
-    def call(self, tokens: list[str | int | float]):
+    def call(self, tokens: list[str]):
         fn_name, arg = tokens
-        assert _is_real(arg)
         match fn_name:
             case "ln":
-                return math.log(arg)
+                return f"ln({arg})"
             case _:
                 raise ValueError(f"Unknown function: {fn_name}")
 
-    def add(self, tokens: list[float | int]):
+    def add(self, tokens: list[str]):
         assert len(tokens) == 2
         l, r = tokens
-        assert _is_real(l, r)
-        return l + r
+        return f"({l} + {r})"
 
-    def sub(self, tokens: list[float | int]):
+    def sub(self, tokens: list[str]):
         assert len(tokens) == 2
         l, r = tokens
-        assert _is_real(l, r)
-        return l - r
+        return f"({l} - {r})"
 
-    def neg(self, tokens: list[float | int]):
+    def neg(self, tokens: list[str]):
         assert len(tokens) == 1
-        return -tokens[0]
+        return f"(-{tokens[0]})"
 
-    def div(self, tokens: list[float | int]):
+    def div(self, tokens: list[str]):
         assert len(tokens) == 2
         l, r = tokens
-        assert _is_real(l, r)
-        return l / r
+        return f"({l} / {r})"
 
-    def mul(self, tokens: list[float | int]):
+    def mul(self, tokens: list[str]):
         assert len(tokens) == 2
         l, r = tokens
-        assert _is_real(l, r)
-        return l * r
+        return f"({l} * {r})"
 
-    def band(self, tokens: list[float | int | bytes]):
+    def band(self, tokens: list[str]):
         assert len(tokens) == 2
         l, r = tokens
-        assert isinstance(l, int) or isinstance(l, bytes)
-        assert isinstance(r, int) or isinstance(r, bytes)
-        l_int = l if isinstance(l, int) else int.from_bytes(l)
-        r_int = r if isinstance(r, int) else int.from_bytes(r)
-        return l_int & r_int
-
-
-@cache
-def evaluate(tree: ParseTree, x: int | float) -> int | float:
-    transformer = _ScalingTransformer(x)
-    return transformer.transform(tree)
+        return f"({l} & {r})"
+
+
+# Number of children of each rule
+_RULE_ARITIES = {
+    "atom": 1,
+    "call": 2,
+    "add": 2,
+    "sub": 2,
+    "neg": 1,
+    "div": 2,
+    "mul": 2,
+    "band": 2,
+}
+# Values of the tokens that can be the child of an `atom`. Names are only for `x`.
+_ATOM_TOKENS = {
+    "INT": re.compile(r"[0-9]+"),
+    "FLOAT": re.compile(
+        r"([0-9]+\.[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?|[0-9]+[eE][-+]?[0-9]+"
+    ),
+    "HEX": re.compile(r"0x([0-9a-fA-F]{2})+"),
+    "BITS": re.compile(r"0b[01]+"),
+    "CNAME": re.compile(r"[xX]"),
+}
+# Names of the functions that can be called
+_FUNCTIONS = re.compile(r"ln")
+
+
+def serialize_tree(tree: ParseTree | Token) -> Any:
+    """Convert a scaling parse tree into JSON-compatible data."""
+    if isinstance(tree, Token):
+        return [tree.type, tree.value]
+    return {"r": str(tree.data), "c": [serialize_tree(c) for c in tree.children]}
+
+
+def _deserialize_token(data: Any, patterns: dict[str, re.Pattern[str]]) -> Token:
+    if not (isinstance(data, list) and len(data) == 2):
+        raise ValueError(f"Invalid token in scaling tree: {data!r}")
+    token_type, value = data
+    pattern = patterns.get(token_type) if isinstance(token_type, str) else None
+    if pattern is None or not isinstance(value, str) or not pattern.fullmatch(value):
+        raise ValueError(f"Invalid token in scaling tree: {data!r}")
+    return Token(token_type, value)
+
+
+def _deserialize_node(data: Any) -> ParseTree:
+    rule = data.get("r") if isinstance(data, dict) else None
+    children = data.get("c") if isinstance(data, dict) else None
+    if (
+        not isinstance(rule, str)
+        or rule not in _RULE_ARITIES
+        or not isinstance(children, list)
+        or len(children) != _RULE_ARITIES[rule]
+    ):
+        raise ValueError(f"Invalid rule in scaling tree: {data!r}")
+
+    match rule:
+        case "atom" if isinstance(children[0], list):
+            return Tree(rule, [_deserialize_token(children[0], _ATOM_TOKENS)])
+        case "call":
+            name = _deserialize_token(children[0], {"CNAME": _FUNCTIONS})
+            return Tree(rule, [name, _deserialize_node(children[1])])
+        case _:
+            return Tree(rule, [_deserialize_node(c) for c in children])
+
+
+def deserialize_tree(data: Any) -> ParseTree:
+    """
+    Inverse of `serialize_tree`.
+
+    Only trees that the scaling grammar can produce are accepted (rules with the right number of
+    children, tokens where the grammar has them, names only for `x` and known functions), so that
+    the tree compiles into nothing but arithmetic even if `data` comes from an untrusted source.
+    Raises ValueError otherwise.
+    """
+    return _deserialize_node(data)
+
+
+def _compile_source(source: str, namespace: dict[str, Any]) -> Callable[..., Any]:
+    code = compile(f"lambda x: {source}", f"<scaling: {source}>", "eval")
+    return eval(code, {"__builtins__": {}, **namespace})
 
 
 class ScalingParser:
-    _parser: Lark
-
-    def __init__(self):
+    _parser: Lark | None
+    _trees: dict[str, ParseTree]
+    _compiled: dict[str, Scaling]
+    _compiled_vectorized: dict[str, Callable[[Any], Any]]
+
+    def __init__(self, trees: dict[str, ParseTree] | None = None):
+        """`trees` can be used to provide already parsed expressions."""
+        # Created on first parse
+        self._parser = None
+        self._trees = dict(trees) if trees else {}
+        self._compiled = {}
+        self._compiled_vectorized = {}
+
+    def _create_parser(self) -> Lark:
         script_dir = os.path.dirname(os.path.realpath(__file__))
         with open(os.path.join(script_dir, "_scaling.lark"), "r") as f:
-            self._parser = Lark(
+            return Lark(
                 f,
                 start="start",
                 parser="lalr",
@@ -107,4 +182,39 @@ class ScalingParser:
             )
 
     def parse(self, expression: str) -> ParseTree:
-        return self._parser.parse(expression)
+        tree = self._trees.get(expression, None)
+        if tree is None:
+            if self._parser is None:
+                self._parser = self._create_parser()
+            tree = self._parser.parse(expression)
+            self._trees[expression] = tree
+        return tree
+
+    def compile(self, expression: str) -> Scaling:
+        """
+        Compile a scaling expression into a function of `x`.
+
+        The expression is parsed only once: later calls with the same expression return the cached function.
+        """
+        scaling = self._compiled.get(expression, None)
+        if scaling is None:
+            scaling = _compile_source(self._get_source(expression), {"ln": math.log})
+            self._compiled[expression] = scaling
+        return scaling
+
+    def compile_vectorized(self, expression: str) -> Callable[[Any], Any]:
+        """
+        Compile a scaling expression into a function that scales a whole NumPy array `x` at once.
+
+        Requires NumPy. Integer inputs should be widened to `int64` beforehand to avoid overflow.
+        """
+        import numpy as np
+
+        scaling = self._compiled_vectorized.get(expression, None)
+        if scaling is None:
+            scaling = _compile_source(self._get_source(expression), {"ln": np.log})
+            self._compiled_vectorized[expression] = scaling
+        return scaling
+
+    def _get_source(self, expression: str) -> str:
+        return _ScalingCompiler().transform(self.parse(expression))
@@ -1,75 +1,138 @@
-from typing import Iterable
+from typing import Any, Iterable
+import logging
 import sqlite3
-import struct
-from itertools import groupby
-import math
+import time
+from array import array
 
-from .common import EcuBlockId, ParameterReadings, RawReading, Reading
-from . import _scaling, matching
+from lark import ParseTree
+
+from .common import HAS_NUMPY, EcuBlockId, ParameterReadings, RawReading, np
+from . import _layout, _scaling, matching
 from .. import _db
+from ..stats import IngestionStats
 
 
-def _next_pow2(val: int):
-    a = int(math.log2(val))
-    if 2**a == val:
-        return val
-    return 2 ** (a + 1)
-
-
-def _get_unpack_info(data_type: str, len_bytes: int) -> tuple[str, int] | None:
-    """Returns `(unpack_format, padding)`."""
-    match data_type:
-        case "Signed":
-            match len_bytes:
-                case 1:
-                    return (">b", 0)
-                case 2:
-                    return (">h", 0)
-                case 4:
-                    return (">i", 0)
-                case _:
-                    return None
-        case "Unsigned":
-            padded_len = _next_pow2(len_bytes)
-            padding = padded_len - len_bytes
-            match padded_len:
-                case 1:
-                    return (">B", padding)
-                case 2:
-                    return (">H", padding)
-                case 4:
-                    return (">I", padding)
-                case _:
-                    return None
-        case "4-byte float":
-            return (">f", 0)
-        case _:
-            return None
+logger = logging.getLogger(__name__)
+
 
+def group_by_parent(
+    readings: Iterable[RawReading],
+) -> dict[EcuBlockId, list[RawReading]]:
+    groups: dict[EcuBlockId, list[RawReading]] = {}
+    for r in readings:
+        group = groups.get(r.id, None)
+        if group is None:
+            groups[r.id] = [r]
+        else:
+            group.append(r)
+    return groups
 
-def _from_hex(
-    values: Iterable[str], unpack_format: str, padding: int
-) -> list[int] | list[float]:
-    padding_str = "00" * padding
-    values_bytes = bytes.fromhex(padding_str + padding_str.join(values))
-    return [x for (x,) in struct.iter_unpack(unpack_format, values_bytes)]
 
+class ReadingBuckets:
+    """
+    Collects readings into a bucket per parent block as they come in, so that they can be
+    converted without sorting and without holding on to all of them.
+    """
 
-def _reading_id(r: RawReading) -> EcuBlockId:
-    return r.id
+    _buckets: dict[EcuBlockId, list[RawReading]]
+    _flush_threshold: int
+
+    def __init__(self, flush_threshold: int) -> None:
+        if flush_threshold < 1:
+            raise ValueError(f"Invalid flush threshold: {flush_threshold}")
+        self._buckets = {}
+        self._flush_threshold = flush_threshold
+
+    def add(self, reading: RawReading) -> list[RawReading] | None:
+        """Returns the readings of the bucket (and empties it) once it reaches the flush threshold."""
+        bucket = self._buckets.get(reading.id, None)
+        if bucket is None:
+            bucket = self._buckets[reading.id] = []
+        bucket.append(reading)
+        if len(bucket) < self._flush_threshold:
+            return None
+        del self._buckets[reading.id]
+        return bucket
+
+    def pop_all(self) -> dict[EcuBlockId, list[RawReading]]:
+        buckets, self._buckets = self._buckets, {}
+        return buckets
 
 
 class BlockExtractor:
-    _con: sqlite3.Connection
+    _con: sqlite3.Connection | None
     _data: dict[EcuBlockId, list[_db.child_blocks.DbChildBlockSpec]]
+    _layouts: dict[EcuBlockId, _layout.BlockLayout]
+    _preloaded_ecu_variant_ids: set[int]
     _scaling_parser: _scaling.ScalingParser
+    _vectorize: bool
+
+    def __init__(
+        self,
+        con: sqlite3.Connection | None,
+        vectorize: bool = HAS_NUMPY,
+        scaling_trees: dict[str, ParseTree] | None = None,
+    ) -> None:
+        """
+        If `vectorize` is true, decode and scale each parameter's readings with NumPy array operations
+        instead of one by one. Enabled by default if NumPy is installed.
+
+        Without a db connection (`con`), only specs added with `add_child_specs` are available.
+        `scaling_trees` can be used to provide already parsed scalings.
+        """
+        if vectorize and not HAS_NUMPY:
+            raise RuntimeError("Vectorized extraction requires NumPy to be installed")
 
-    def __init__(self, con: sqlite3.Connection) -> None:
         self._con = con
         self._data = {}
-        self._scaling_parser = _scaling.ScalingParser()
+        self._layouts = {}
+        self._preloaded_ecu_variant_ids = set()
+        self._scaling_parser = _scaling.ScalingParser(scaling_trees)
+        self._vectorize = vectorize
+
+    def preload(self, ecu_variant_ids: Iterable[int]) -> None:
+        """
+        Fetch the child block specs of all parent blocks of the given ECU variants in one go.
+
+        Without preloading, specs are fetched one parent block at a time as they are encountered.
+        """
+        assert self._con is not None
+        ecu_variant_ids = set(ecu_variant_ids) - self._preloaded_ecu_variant_ids
+        if not ecu_variant_ids:
+            return
+
+        start = time.perf_counter()
+        specs_by_parent = _db.child_blocks.get_child_block_specs_by_parent(
+            self._con, ecu_variant_ids
+        )
+        self.add_child_specs(specs_by_parent, ecu_variant_ids)
+        elapsed = time.perf_counter() - start
+
+        logger.info(
+            f"Preloaded child block specs of {len(specs_by_parent)} parent blocks for {len(ecu_variant_ids)} ECU variants in {elapsed:.3f} s"
+        )
+
+    def add_child_specs(
+        self,
+        specs_by_parent: dict[tuple[int, int], list[_db.child_blocks.DbChildBlockSpec]],
+        ecu_variant_ids: Iterable[int],
+    ) -> None:
+        """
+        Add child block specs by `(ecu_variant_id, parent_block_id)`.
+
+        The specs must be complete for `ecu_variant_ids`: their other parent blocks are considered
+        to have no children.
+        """
+        for (ecu_variant_id, parent_block_id), child_specs in specs_by_parent.items():
+            eb_id = EcuBlockId(
+                ecu_variant_id=ecu_variant_id, parent_block_id=parent_block_id
+            )
+            self._data[eb_id] = child_specs
+        self._preloaded_ecu_variant_ids.update(ecu_variant_ids)
 
     def _fetch_child_specs(self, eb_id: EcuBlockId):
+        if self._con is None:
+            return []
         return _db.child_blocks.get_child_block_specs(
             self._con,
             ecu_variant_id=eb_id.ecu_variant_id,
@@ -77,69 +140,151 @@ class BlockExtractor:
         )
 
     def extract_children(
-        self, readings: Iterable[matching.RawReading]
+        self,
+        readings: Iterable[matching.RawReading],
+        stats: IngestionStats | None = None,
     ) -> list[ParameterReadings]:
+        """If `stats` is given, the time spent and the blocks skipped are recorded into it."""
+        return self.extract_groups(group_by_parent(readings), stats)
 
-        ## Group by parent
-        sorted_readings = sorted(readings, key=_reading_id)
-        groups = [
-            (eb_id, list(readings))
-            for eb_id, readings in groupby(sorted_readings, key=_reading_id)
-        ]
+    def extract_groups(
+        self,
+        groups: dict[EcuBlockId, list[RawReading]],
+        stats: IngestionStats | None = None,
+    ) -> list[ParameterReadings]:
+        """Like `extract_children`, but for readings that are already grouped by parent block."""
+        # Only the groups are sorted, to keep the order of the result stable
+        sorted_groups = sorted(groups.items(), key=lambda group: group[0])
 
         ## Fill in any missing child specs
-        for eb_id, _ in groups:
+        start = time.perf_counter()
+        for eb_id, _ in sorted_groups:
+            if eb_id.ecu_variant_id in self._preloaded_ecu_variant_ids:
+                continue
             if eb_id not in self._data:
                 child_specs = self._fetch_child_specs(eb_id)
                 if len(child_specs) == 0:
                     continue
                 self._data[eb_id] = child_specs
+        if stats is not None:
+            stats.add_time("load_specs", time.perf_counter() - start)
 
         ## Convert
         result: list[ParameterReadings] = []
-        for eb_id, readings in groups:
-            child_specs = self._data.get(eb_id, None)
-            if not child_specs:
-                continue
-            if len(child_specs) != 1:
-                # TODO: Multi-child blocks
+        for eb_id, readings in sorted_groups:
+            layout = self._get_layout(eb_id)
+            if stats is not None:
+                if layout is None:
+                    stats.add_skipped_block("no_child_specs")
+                else:
+                    for reason in layout.unsupported_reasons:
+                        stats.add_skipped_block(reason)
+            if layout is None or not layout.fields:
                 continue
+            result.extend(self._convert(eb_id, layout, readings, stats))
 
-            spec = child_specs[0]
-            if spec.length % 8 != 0:
-                continue
+        return result
 
-            length_nibbles = spec.length // 4
-            offset_nibbles = spec.offset // 4
-            unpack_info = _get_unpack_info(spec.data_type, length_nibbles // 2)
-            if not unpack_info:
-                continue
+    def _get_layout(self, eb_id: EcuBlockId) -> _layout.BlockLayout | None:
+        """Returns `None` if the parent block has no child specs."""
+        layout = self._layouts.get(eb_id, None)
+        if layout is None:
+            child_specs = self._data.get(eb_id, None)
+            if not child_specs:
+                return None
+            layout = _layout.create_block_layout(child_specs)
+            if layout.unsupported_reasons:
+                logger.debug(
+                    f"Unsupported child blocks of {eb_id} skipped: {len(layout.unsupported_reasons)}/{len(child_specs)}"
+                )
+            self._layouts[eb_id] = layout
+        return layout
 
-            hex_values = [
-                r.payload[offset_nibbles : offset_nibbles + length_nibbles]
+    def _convert(
+        self,
+        eb_id: EcuBlockId,
+        layout: _layout.BlockLayout,
+        readings: list[RawReading],
+        stats: IngestionStats | None,
+    ) -> list[ParameterReadings]:
+        """
+        Decode and scale all child blocks of a parent block. Values of child blocks that extend past
+        the payload of a reading are dropped.
+        """
+        start = time.perf_counter()
+        payload_length = layout.payload_length
+        payload_lengths = [len(r.payload) for r in readings]
+        short_count = sum(1 for length in payload_lengths if length < payload_length)
+        if short_count == 0:
+            # Slicing a payload that is exactly `payload_length` long (the usual case) doesn't copy
+            payloads = b"".join(r.payload[:payload_length] for r in readings)
+        else:
+            # Padded to decode the fields they contain, the values of the others are dropped below
+            payloads = b"".join(
+                r.payload[:payload_length].ljust(payload_length, b"\0")
                 for r in readings
-            ]
-            unpack_format, padding = unpack_info
-            converted_values = _from_hex(
-                values=hex_values,
-                unpack_format=unpack_format,
-                padding=padding,
-            )
-            assert len(hex_values) == len(converted_values)
-            parsed_scaling = self._scaling_parser.parse(spec.ppe_scaling)
-            parameter_readings = ParameterReadings(
-                block_id=spec.id,
-                # parent_text=spec.parent_text,
-                name=spec.name,
-                text=spec.text,
-                ppe_text=spec.ppe_text,
-                ppe_unit_text=spec.ppe_unit_text,
-                data=[],
             )
-            result.append(parameter_readings)
+        timestamps = array("q", [r.time for r in readings])
 
-            for r, converted_value in zip(readings, converted_values):
-                scaled_value = _scaling.evaluate(tree=parsed_scaling, x=converted_value)
-                parameter_readings.data.append(Reading(time=r.time, value=scaled_value))
+        scaled_columns: list[array[float]] = []
+        if self._vectorize:
+            vectorized_columns = _layout.decode_vectorized(layout, payloads)
+            decoded = time.perf_counter()
+            for field, vectorized_column in zip(layout.fields, vectorized_columns):
+                scaling_vectorized = self._scaling_parser.compile_vectorized(
+                    field.spec.ppe_scaling
+                )
+                # Constant scalings produce a scalar
+                scaled_array = np.broadcast_to(
+                    scaling_vectorized(vectorized_column), vectorized_column.shape
+                )
+                scaled_values = array("d")
+                scaled_values.frombytes(scaled_array.astype(np.float64).tobytes())
+                scaled_columns.append(scaled_values)
+        else:
+            columns = _layout.decode(layout, payloads)
+            decoded = time.perf_counter()
+            for field, column in zip(layout.fields, columns):
+                scaling = self._scaling_parser.compile(field.spec.ppe_scaling)
+                scaled_columns.append(array("d", map(scaling, column)))
 
+        result: list[ParameterReadings] = []
+        skipped_count = 0
+        for field, scaled_values in zip(layout.fields, scaled_columns):
+            field_timestamps = timestamps
+            if short_count != 0:
+                field_end = field.byte_offset + field.byte_length
+                covered = [
+                    i for i, length in enumerate(payload_lengths) if length >= field_end
+                ]
+                skipped_count += len(readings) - len(covered)
+                if not covered:
+                    continue
+                if len(covered) != len(readings):
+                    field_timestamps = array("q", [timestamps[i] for i in covered])
+                    scaled_values = array("d", [scaled_values[i] for i in covered])
+
+            spec = field.spec
+            result.append(
+                ParameterReadings(
+                    block_id=spec.id,
+                    # parent_text=spec.parent_text,
+                    name=spec.name,
+                    text=spec.text,
+                    ppe_text=spec.ppe_text,
+                    ppe_unit_text=spec.ppe_unit_text,
+                    timestamps=field_timestamps,
+                    values=scaled_values,
+                )
+            )
+
+        if skipped_count != 0:
+            logger.warning(
+                f"Skipped {skipped_count} values of {eb_id} from {short_count}/{len(readings)} readings with payloads shorter than {payload_length} bytes"
+            )
+            if stats is not None:
+                stats.short_payload_count += skipped_count
+        if stats is not None:
+            stats.add_time("decode", decoded - start)
+            stats.add_time("scale", time.perf_counter() - decoded)
         return result
@@ -1,6 +1,21 @@
+from typing import TYPE_CHECKING, Iterator, Sequence, overload
+from array import array
 from dataclasses import dataclass
 from datetime import time
 
+# NumPy is optional. Modules with a vectorized implementation import it from here.
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    # Only used if HAS_NUMPY is true
+    if TYPE_CHECKING:
+        import numpy as np
+    HAS_NUMPY = False
+
+from .._log_parsing.common import MS_PER_DAY
+
 
 @dataclass(frozen=True, order=True)
 class EcuBlockId:
@@ -11,22 +26,80 @@ class EcuBlockId:
 @dataclass(frozen=True)
 class RawReading:
     id: EcuBlockId
-    payload: str
-    time: time
+    payload: bytes
+    # Milliseconds since midnight of the session's first day
+    time: int
+
+
+def ms_to_time(ms: int) -> time:
+    """Returns the time of day of a timestamp in milliseconds."""
+    seconds, millis = divmod(ms % MS_PER_DAY, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return time(hours, minutes, seconds, millis * 1000)
 
 
 @dataclass(frozen=True)
 class Reading:
-    time: time
+    # Milliseconds since midnight of the session's first day
+    timestamp: int
     value: int | float
 
+    @property
+    def time(self) -> time:
+        """Time of day."""
+        return ms_to_time(self.timestamp)
+
+
+class ReadingsView(Sequence[Reading]):
+    """Read-only view that presents the columns of a `ParameterReadings` as `Reading` objects."""
+
+    _timestamps: array[int]
+    _values: array[float]
+
+    def __init__(self, timestamps: array[int], values: array[float]) -> None:
+        assert len(timestamps) == len(values)
+        self._timestamps = timestamps
+        self._values = values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @overload
+    def __getitem__(self, index: int) -> Reading: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ReadingsView": ...
+
+    def __getitem__(self, index: int | slice) -> "Reading | ReadingsView":
+        if isinstance(index, slice):
+            return ReadingsView(self._timestamps[index], self._values[index])
+        return Reading(timestamp=self._timestamps[index], value=self._values[index])
+
+    def __iter__(self) -> Iterator[Reading]:
+        for timestamp, value in zip(self._timestamps, self._values):
+            yield Reading(timestamp=timestamp, value=value)
+
 
 @dataclass(frozen=True)
 class ParameterReadings:
+    """
+    Readings of a single parameter, stored column-wise.
+
+    `timestamps` (milliseconds since midnight of the session's first day, typecode `q`) and `values`
+    (typecode `d`) are parallel arrays. Both support the buffer protocol, so they can be wrapped without copying, e.g. with
+    `numpy.frombuffer`. Use `data` to iterate `Reading` objects instead.
+    """
+
     block_id: int
     # parent_text: str
     name: str
     text: str
     ppe_text: str
     ppe_unit_text: str
-    data: list[Reading]
+    timestamps: array[int]
+    values: array[float]
+
+    @property
+    def data(self) -> ReadingsView:
+        return ReadingsView(self.timestamps, self.values)
@@ -1,8 +1,12 @@
 from typing import Sequence
+import logging
 from dataclasses import dataclass
 
 from .common import EcuBlockId, RawReading
 from .. import _db, _log_parsing
+from ..stats import IngestionStats
+
+logger = logging.getLogger(__name__)
 
 MSG_TYPE_LEN = 2
 
@@ -13,14 +17,23 @@ class _EcuBlockIdByCompVal:
     data: dict[str, EcuBlockId]
 
 
-type _EcuBlockIdByCompValByCanAddr = dict[str, _EcuBlockIdByCompVal]
+# Compare values of each length in their own table, longest first
+type _EcuBlockIdByCompValByCanAddr = dict[str, list[_EcuBlockIdByCompVal]]
 
 
 class MessageMatcher:
+    """
+    Matches messages to parent blocks by the compare value that follows the message type.
+
+    An ECU can have compare values of different lengths (e.g. DIDs and local identifiers). Each
+    length gets its own hash table, and the tables are checked longest first, so a message costs
+    one dict lookup per distinct length (normally one or two).
+    """
+
     _data: _EcuBlockIdByCompValByCanAddr
 
     def __init__(self, match_datas: Sequence[_db.matching.DbParentBlockMatchData]):
-        self._data = {}
+        data_by_len: dict[str, dict[int, dict[str, EcuBlockId]]] = {}
 
         for d in match_datas:
             if not d.compare_value.startswith("0x"):
@@ -31,42 +44,73 @@ class MessageMatcher:
             # Strip 0x prefix
             comp_val = d.compare_value[2:]
 
-            if d.can_id_rx not in self._data:
-                # New CAN id: initialize mapping
-                self._data[d.can_id_rx] = _EcuBlockIdByCompVal(
-                    comp_val_len=len(comp_val), data={}
-                )
-            else:
-                # All compare values should be of the same length
-                assert len(comp_val) == self._data[d.can_id_rx].comp_val_len
+            by_comp_val = data_by_len.setdefault(d.can_id_rx, {}).setdefault(
+                len(comp_val), {}
+            )
 
             # There should be no duplicate compare values
-            assert comp_val not in self._data[d.can_id_rx].data
+            assert comp_val not in by_comp_val
 
-            self._data[d.can_id_rx].data[comp_val] = EcuBlockId(
+            by_comp_val[comp_val] = EcuBlockId(
                 parent_block_id=d.block_id, ecu_variant_id=d.ecu_variant_id
             )
 
-    def match(self, messages: Sequence[_log_parsing.params.RawParamRxMsg]):
-        for message in messages:
-            id_pair_by_comp_val = self._data.get(message.ecu_addr, None)
-            if not id_pair_by_comp_val:
-                continue
-
+        self._data = {
+            can_id_rx: [
+                _EcuBlockIdByCompVal(
+                    comp_val_len=comp_val_len, data=by_len[comp_val_len]
+                )
+                for comp_val_len in sorted(by_len, reverse=True)
+            ]
+            for can_id_rx, by_len in data_by_len.items()
+        }
+
+    def match_one(
+        self, message: _log_parsing.params.RawParamRxMsg
+    ) -> RawReading | None:
+        """
+        Returns a `RawReading` if the message matches a parent block.
+
+        The payload is decoded from hex here, once, so that the rest of the pipeline works on bytes.
+        """
+        id_pairs_by_comp_val = self._data.get(message.ecu_addr, None)
+        if not id_pairs_by_comp_val:
+            return None
+
+        # First MSG_TYPE_LEN chars: message type (ignored)
+        # Next comp_val_len chars: parameter address (should match compare value)
+        # Rest: payload
+        for id_pair_by_comp_val in id_pairs_by_comp_val:
             comp_val_len = id_pair_by_comp_val.comp_val_len
-            comp_data = id_pair_by_comp_val.data
-
-            # First MSG_TYPE_LEN chars: message type (ignored)
-            # Next comp_val_len chars: parameter address (should match compare value)
-            # Rest: payload
-            matched_id = comp_data.get(
+            matched_id = id_pair_by_comp_val.data.get(
                 message.message[MSG_TYPE_LEN : MSG_TYPE_LEN + comp_val_len], None
             )
-            if matched_id is None:
-                continue
-
-            yield RawReading(
-                id=matched_id,
-                payload=message.message[MSG_TYPE_LEN + comp_val_len :],
-                time=message.time,
-            )
+            if matched_id is not None:
+                break
+        else:
+            return None
+
+        try:
+            payload = bytes.fromhex(message.message[MSG_TYPE_LEN + comp_val_len :])
+        except ValueError:
+            logger.debug(f"Skipped message with invalid payload: '{message.message}'")
+            return None
+
+        return RawReading(id=matched_id, payload=payload, time=message.time)
+
+    def match(
+        self,
+        messages: Sequence[_log_parsing.params.RawParamRxMsg],
+        stats: IngestionStats | None = None,
+    ):
+        """
+        Yields a `RawReading` for each message that matches a parent block.
+
+        If `stats` is given, the messages that don't match are counted into it.
+        """
+        for message in messages:
+            reading = self.match_one(message)
+            if reading is not None:
+                yield reading
+            elif stats is not None:
+                stats.add_unmatched(message.ecu_addr)
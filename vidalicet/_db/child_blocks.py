@@ -1,3 +1,4 @@
+from typing import Iterable
 from sqlite3 import Connection
 import dataclasses
 
@@ -22,13 +23,7 @@ class DbChildBlockSpec:
 _db_child_block_spec_factory = _common.create_dataclass_row_factory(DbChildBlockSpec)
 
 
-def get_child_block_specs(
-    con: Connection, ecu_variant_id: int, parent_block_id: int
-) -> list[DbChildBlockSpec]:
-    cur = con.cursor()
-    cur.row_factory = _db_child_block_spec_factory
-    return cur.execute(
-        f"""
+_CHILD_BLOCK_SPECS_SELECT = """
         SELECT
             ecu_blocks.child_block_id as id
             , blocks.length
@@ -41,6 +36,9 @@ def get_child_block_specs(
             , texts.data as text
             , ppe_texts.data as ppe_text
             , ppe_unit_texts.data as ppe_unit_text
+"""
+
+_CHILD_BLOCK_SPECS_FROM = """
         FROM ecu_variant_block_trees ecu_blocks
         INNER JOIN blocks
             ON blocks.id = ecu_blocks.child_block_id
@@ -62,9 +60,64 @@ def get_child_block_specs(
             ON ppe_texts.id = block_values.ppe_text_id
         INNER JOIN texts ppe_unit_texts
             ON ppe_unit_texts.id = block_values.ppe_unit_text_id
+"""
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER of old SQLite versions (999)
+_MAX_IN_PARAMS = 500
+
+
+def child_block_specs_query() -> str:
+    return f"""
+        {_CHILD_BLOCK_SPECS_SELECT}
+        {_CHILD_BLOCK_SPECS_FROM}
         WHERE
             ecu_blocks.ecu_variant_id = :ecu_variant_id
             AND ecu_blocks.parent_block_id = :parent_block_id
-        """,
+        """
+
+
+def child_block_specs_by_parent_query(ecu_variant_id_count: int) -> str:
+    ecu_variant_id_placeholders = ", ".join(("?" for _ in range(ecu_variant_id_count)))
+    return f"""
+        {_CHILD_BLOCK_SPECS_SELECT}
+            , ecu_blocks.ecu_variant_id
+            , ecu_blocks.parent_block_id
+        {_CHILD_BLOCK_SPECS_FROM}
+        WHERE ecu_blocks.ecu_variant_id IN ({ecu_variant_id_placeholders})
+        """
+
+
+def get_child_block_specs(
+    con: Connection, ecu_variant_id: int, parent_block_id: int
+) -> list[DbChildBlockSpec]:
+    cur = con.cursor()
+    cur.row_factory = _db_child_block_spec_factory
+    return cur.execute(
+        child_block_specs_query(),
         {"ecu_variant_id": ecu_variant_id, "parent_block_id": parent_block_id},
     ).fetchall()
+
+
+def get_child_block_specs_by_parent(
+    con: Connection, ecu_variant_ids: Iterable[int]
+) -> dict[tuple[int, int], list[DbChildBlockSpec]]:
+    """
+    Get the child block specs of all parent blocks of the given ECU variants at once.
+
+    Returns specs by `(ecu_variant_id, parent_block_id)`. Parent blocks without children are left out.
+    """
+    ecu_variant_ids_tuple = tuple(ecu_variant_ids)
+    result: dict[tuple[int, int], list[DbChildBlockSpec]] = {}
+
+    for batch_start in range(0, len(ecu_variant_ids_tuple), _MAX_IN_PARAMS):
+        batch = ecu_variant_ids_tuple[batch_start : batch_start + _MAX_IN_PARAMS]
+        rows = con.execute(
+            child_block_specs_by_parent_query(len(batch)), batch
+        ).fetchall()
+
+        for *spec_row, ecu_variant_id, parent_block_id in rows:
+            result.setdefault((ecu_variant_id, parent_block_id), []).append(
+                DbChildBlockSpec(*spec_row)
+            )
+
+    return result
@@ -18,21 +18,9 @@ _db_parent_block_match_data_factory = _common.create_dataclass_row_factory(
 )
 
 
-def get_parent_match_data(
-    con: Connection, ecu_identifiers: Iterable[str]
-) -> List[DbParentBlockMatchData]:
-    ecu_identifiers_tuple = tuple(ecu_identifiers)
-
-    if len(ecu_identifiers_tuple) == 0:
-        return []
-
-    ecu_identifier_placeholders = ", ".join(
-        ("?" for _ in range(len(ecu_identifiers_tuple)))
-    )
-    cur = con.cursor()
-    cur.row_factory = _db_parent_block_match_data_factory
-    return cur.execute(
-        f"""
+def parent_match_data_query(ecu_identifier_count: int) -> str:
+    ecu_identifier_placeholders = ", ".join(("?" for _ in range(ecu_identifier_count)))
+    return f"""
         SELECT DISTINCT
             blocks_p.id as block_id
             , ecu_blocks.ecu_variant_id
@@ -46,6 +34,20 @@ def get_parent_match_data(
         INNER JOIN block_values block_values_p
             ON block_values_p.block_id = blocks_p.id
         WHERE ecus.identifier IN ({ecu_identifier_placeholders})
-        """,
+        """
+
+
+def get_parent_match_data(
+    con: Connection, ecu_identifiers: Iterable[str]
+) -> List[DbParentBlockMatchData]:
+    ecu_identifiers_tuple = tuple(ecu_identifiers)
+
+    if len(ecu_identifiers_tuple) == 0:
+        return []
+
+    cur = con.cursor()
+    cur.row_factory = _db_parent_block_match_data_factory
+    return cur.execute(
+        parent_match_data_query(len(ecu_identifiers_tuple)),
         ecu_identifiers_tuple,
     ).fetchall()
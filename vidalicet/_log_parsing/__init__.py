@@ -1,2 +1,2 @@
 # pyright: reportUnusedImport=false
-from . import common, ecu_id, params
+from . import chunks, common, ecu_id, params, session, tail
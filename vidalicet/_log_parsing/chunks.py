@@ -0,0 +1,181 @@
+from typing import Iterator
+import abc
+import locale
+import mmap
+import os
+
+from . import common
+
+# What lines are scanned in: chunks read from a file, or a memory-mapped file in place
+type Buffer = bytes | mmap.mmap
+
+# Log files are read in chunks of this size (bytes)
+CHUNK_SIZE = 1 << 20
+
+
+def read_chunks(path: str, offset: int = 0) -> Iterator[bytes]:
+    """Read a log file from byte `offset` onwards in chunks of `CHUNK_SIZE` bytes."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _count_newlines(buf: Buffer, start: int, stop: int) -> int:
+    if isinstance(buf, bytes):
+        return buf.count(b"\n", start, stop)
+    # mmap has no count(), so a copy is counted. Only done if lines are counted.
+    return buf[start:stop].count(b"\n")
+
+
+class LineScanner(abc.ABC):
+    """
+    Base of the parsers that are fed log files as chunks of bytes.
+
+    Chunks are scanned as bytes for the substrings in `needles`, which can change between lines.
+    Only the lines containing them are decoded and passed to `_parse_line`, if `common.classify_line`
+    finds them relevant. Everything else is skipped without ever becoming a `str`.
+
+    A chunk can end in the middle of a line: the rest of the line is expected in the next chunk.
+    Call `end_file` at the end of each file, so that a last line without a line terminator is
+    parsed too. If the file may still be written to, the line can be held back (see `partial`)
+    until it's known to be complete, or dropped with `discard_partial` to feed the file from the
+    start of that line next time.
+    """
+
+    needles: tuple[bytes, ...]
+    _encoding: str
+    _count_lines: bool
+    # See `stats.IngestionStats`. Only counted if `count_lines` is true.
+    _lines_scanned: int
+    _lines_matched: int
+    # Pieces of the incomplete line at the end of the last chunk
+    _partial: list[bytes]
+
+    def __init__(
+        self,
+        needles: tuple[bytes, ...],
+        count_lines: bool = False,
+        encoding: str | None = None,
+    ) -> None:
+        self.needles = needles
+        # Same default as open() in text mode
+        self._encoding = encoding or locale.getpreferredencoding(False)
+        self._count_lines = count_lines
+        self._lines_scanned = 0
+        self._lines_matched = 0
+        self._partial = []
+
+    @abc.abstractmethod
+    def _parse_line(self, line: str, kind: common.LineKind) -> None:
+        pass
+
+    def feed(self, chunk: bytes) -> None:
+        self._feed(chunk, 0, len(chunk))
+
+    def feed_file(
+        self, path: str, use_mmap: bool = False, offset: int = 0
+    ) -> Iterator[int]:
+        """
+        Feed a log file from byte `offset` onwards, one chunk of `CHUNK_SIZE` bytes at a time.
+        Yields the offset up to which the file has been fed after each chunk.
+
+        If `use_mmap` is true, the file is memory-mapped instead of read, and scanned in place: only
+        the relevant lines are copied out of the map. The contents are then fixed when the file is
+        opened.
+        """
+        if not use_mmap:
+            for chunk in read_chunks(path, offset):
+                self.feed(chunk)
+                offset += len(chunk)
+                yield offset
+            return
+
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size <= offset:
+                # Empty files can't be mapped
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for start in range(offset, size, CHUNK_SIZE):
+                    stop = min(start + CHUNK_SIZE, size)
+                    self._feed(m, start, stop)
+                    yield stop
+
+    def _feed(self, buf: Buffer, start: int, stop: int) -> None:
+        """Feed `buf[start:stop]`."""
+        if start >= stop:
+            return
+        if self._count_lines:
+            self._lines_scanned += _count_newlines(buf, start, stop)
+
+        end = buf.rfind(b"\n", start, stop) + 1
+        if end == 0:
+            self._partial.append(buf[start:stop])
+            return
+
+        pos = start
+        if self._partial:
+            pos = buf.find(b"\n", start, stop) + 1
+            self._partial.append(buf[start:pos])
+            line = b"".join(self._partial)
+            self._partial.clear()
+            self._scan(line, 0, len(line))
+        self._scan(buf, pos, end)
+        if end < stop:
+            self._partial.append(buf[end:stop])
+
+    def end_file(self) -> None:
+        if not self._partial:
+            return
+        if self._count_lines:
+            self._lines_scanned += 1
+        line = b"".join(self._partial)
+        self._partial.clear()
+        self._scan(line, 0, len(line))
+
+    @property
+    def partial(self) -> bytes:
+        """The incomplete line at the end of what has been fed so far."""
+        return b"".join(self._partial)
+
+    def discard_partial(self) -> int:
+        """
+        Drop the incomplete line at the end of the file, e.g. because it's still being written.
+        Returns its length in bytes.
+        """
+        length = sum(map(len, self._partial))
+        self._partial.clear()
+        return length
+
+    def _scan(self, buf: Buffer, pos: int, end: int) -> None:
+        """Parse the relevant lines in `buf[pos:end]`, which ends at the end of a line."""
+        while pos < end:
+            # First occurrence of any needle. Needles don't span lines, so each one only needs to
+            # be searched for up to the best hit so far.
+            hit = end
+            for needle in self.needles:
+                found = buf.find(needle, pos, hit)
+                if found >= 0:
+                    hit = found
+            if hit == end:
+                return
+
+            newline = buf.rfind(b"\n", pos, hit)
+            start = newline + 1 if newline >= 0 else pos
+            newline = buf.find(b"\n", hit, end)
+            pos = newline + 1 if newline >= 0 else end
+
+            line = buf[start:pos].decode(self._encoding, errors="replace")
+            kind = common.classify_line(line)
+            if kind is None:
+                continue
+            if self._count_lines:
+                self._lines_matched += 1
+            self._parse_line(line, kind)
+
+    def pop_line_counts(self) -> tuple[int, int]:
+        """Returns the lines scanned and matched since the last call."""
+        counts = self._lines_scanned, self._lines_matched
+        self._lines_scanned = self._lines_matched = 0
+        return counts
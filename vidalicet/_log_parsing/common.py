@@ -1,24 +1,191 @@
+from typing import Literal
 from dataclasses import dataclass
-from datetime import time
-import re
 
 
 @dataclass(frozen=True)
 class LogEntry:
-    time: time
+    # Milliseconds since midnight (time of day), or a `SessionClock` timestamp once converted
+    time: int
     message: str
 
 
-m_log_entry = re.compile(r"(\d\d:\d\d:\d\d,\d\d\d) \[.*? *\]\[.*?\]\[.*? *\] +(.+)")
+type LineKind = (
+    Literal["ecu_id_phase_start"]
+    | Literal["ecu_id_phase_end"]
+    | Literal["ecu_id"]
+    | Literal["request"]
+    | Literal["response"]
+)
+
+ECU_ID_PHASE_START_MARKER = "> PerformEcuIdentification <"
+ECU_ID_PHASE_END_MARKER = "> PerformCarConfigReadout <"
+ECU_ID_MARKER = "SP: general_GetEcuId, EcuId: "
+REQUEST_MARKER = "VehComm request: Ecu '"
+RESPONSE_MARKER = "VehComm response: '"
+
+# "HH:MM:SS,mmm"
+TIMESTAMP_LEN = 12
+
+# "HH:MM:SS", the part of the timestamp that many consecutive lines share
+SECONDS_LEN = 8
+# Parsed seconds by `SECONDS_LEN` prefix. Cleared when full.
+_seconds_cache: dict[str, int] = {}
+_SECONDS_CACHE_MAX_SIZE = 4096
+# "mmm" -> milliseconds
+_MILLIS = {f"{i:03}": i for i in range(1000)}
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+# A time of day this much earlier than the previous one means that midnight has passed
+ROLLOVER_THRESHOLD_MS = 12 * 60 * 60 * 1000
+
+
+class SessionClock:
+    """
+    Turns the times of day of a session's log entries (in order) into timestamps that keep
+    increasing past midnight: milliseconds since midnight of the session's first day.
+
+    A time of day more than `ROLLOVER_THRESHOLD_MS` earlier than the previous one starts a new day.
+    Smaller steps back are passed through as is, so out-of-order entries can still be detected.
+    """
+
+    _day_start: int
+    _last_time_of_day: int | None
+
+    def __init__(self, day_start: int = 0, last_time_of_day: int | None = None) -> None:
+        """Pass the `day_start` and `last_time_of_day` of another clock to continue from its state."""
+        self._day_start = day_start
+        self._last_time_of_day = last_time_of_day
+
+    @property
+    def day_start(self) -> int:
+        return self._day_start
+
+    @property
+    def last_time_of_day(self) -> int | None:
+        return self._last_time_of_day
+
+    def __call__(self, time_of_day: int) -> int:
+        last = self._last_time_of_day
+        if last is not None and time_of_day < last - ROLLOVER_THRESHOLD_MS:
+            self._day_start += MS_PER_DAY
+        self._last_time_of_day = time_of_day
+        return self._day_start + time_of_day
+
+    def sync(self, timestamp: int) -> None:
+        """Continue from `timestamp`, e.g. one produced by another clock and shifted to follow this one."""
+        self._last_time_of_day = timestamp % MS_PER_DAY
+        self._day_start = timestamp - self._last_time_of_day
+
+
+def classify_line(line: str) -> LineKind | None:
+    """
+    Determine the kind of a line with substring checks only, or `None` if the line is irrelevant.
+
+    Most lines are irrelevant, so the common case is a couple of failed substring searches.
+    The line is not validated: parse it with `parse_log_entry` before use.
+    """
+    if "VehComm re" in line:
+        if REQUEST_MARKER in line:
+            return "request"
+        if RESPONSE_MARKER in line:
+            return "response"
+        return None
+    if ECU_ID_MARKER in line:
+        return "ecu_id"
+    if "> Perform" in line:
+        if ECU_ID_PHASE_START_MARKER in line:
+            return "ecu_id_phase_start"
+        if ECU_ID_PHASE_END_MARKER in line:
+            return "ecu_id_phase_end"
+    return None
+
+
+def extract_field(line: str, marker: str, terminator: str) -> str | None:
+    """Returns the non-empty text between `marker` and the next `terminator`, if found."""
+    start = line.find(marker)
+    if start < 0:
+        return None
+    start += len(marker)
+    end = line.find(terminator, start + 1)
+    if end < 0:
+        return None
+    return line[start:end]
+
+
+def _parse_seconds(seconds: str) -> int | None:
+    """Parse `HH:MM:SS` into milliseconds since midnight."""
+    if (
+        len(seconds) != SECONDS_LEN
+        or seconds[2] != ":"
+        or seconds[5] != ":"
+        or not seconds.isascii()
+    ):
+        return None
+    hh, mm, ss = seconds[0:2], seconds[3:5], seconds[6:8]
+    if not (hh.isdigit() and mm.isdigit() and ss.isdigit()):
+        return None
+    h, m, s = int(hh), int(mm), int(ss)
+    if h >= 24 or m >= 60 or s >= 60:
+        return None
+    return ((h * 60 + m) * 60 + s) * 1000
+
+
+def parse_timestamp(line: str) -> int | None:
+    """
+    Parse the `HH:MM:SS,mmm` timestamp at the start of a line into milliseconds since midnight.
+
+    VIDA logs many lines per second, so the seconds are parsed once and then looked up from a
+    cache. The milliseconds are looked up from a table, so a typical line is parsed with two dict
+    lookups.
+    """
+    seconds_key = line[:SECONDS_LEN]
+    seconds = _seconds_cache.get(seconds_key, None)
+    if seconds is None:
+        seconds = _parse_seconds(seconds_key)
+        if seconds is None:
+            return None
+        if len(_seconds_cache) >= _SECONDS_CACHE_MAX_SIZE:
+            _seconds_cache.clear()
+        _seconds_cache[seconds_key] = seconds
+
+    millis = _MILLIS.get(line[SECONDS_LEN + 1 : TIMESTAMP_LEN], None)
+    if millis is None or line[SECONDS_LEN : SECONDS_LEN + 1] not in (",", "."):
+        return None
+    return seconds + millis
 
 
 def parse_log_entry(line: str) -> LogEntry | None:
-    match = m_log_entry.match(line)
-    if not match:
+    """
+    Parse a line of the form `HH:MM:SS,mmm [level][thread][category] message`. The time is returned
+    as milliseconds since midnight.
+
+    The timestamp is fixed-width, so only the three bracketed fields need to be searched for.
+    """
+    if (
+        len(line) <= TIMESTAMP_LEN + 1
+        or line[TIMESTAMP_LEN : TIMESTAMP_LEN + 2] != " ["
+    ):
+        return None
+
+    # End of level field
+    bracket_end = line.find("][", TIMESTAMP_LEN + 2)
+    if bracket_end < 0:
+        return None
+    # End of thread field
+    bracket_end = line.find("][", bracket_end + 2)
+    if bracket_end < 0:
+        return None
+    # End of category field
+    bracket_end = line.find("]", bracket_end + 2)
+    if bracket_end < 0 or line[bracket_end + 1 : bracket_end + 2] != " ":
+        return None
+
+    message = line[bracket_end + 1 :].lstrip(" ").rstrip("\r\n")
+    if not message:
+        return None
+
+    time_of_day = parse_timestamp(line)
+    if time_of_day is None:
         return None
 
-    (timestamp, message) = match.groups()
-    return LogEntry(
-        time=time.fromisoformat(timestamp),
-        message=message,
-    )
+    return LogEntry(time=time_of_day, message=message)
@@ -1,111 +1,255 @@
-from typing import Generator, TextIO, NoReturn
-import re
-from datetime import time
+from typing import Iterable
+import dataclasses
+import time
 from dataclasses import dataclass
 
-from . import common
+from . import chunks, common
+
+# Every request and response line contains this (see `common.classify_line`)
+PARAMETER_NEEDLES = (b"VehComm re",)
 
 
 @dataclass(frozen=True)
 class RawParamRxMsg:
     ecu_addr: str
     message: str
-    time: time
-
+    # See `common.SessionClock`
+    time: int
 
-m_request = re.compile(r".*VehComm request: Ecu '(.+?)'.*")
-m_response = re.compile(r".*VehComm response: '(.+?)'.*")
 
+def parse_request(line: str) -> str | None:
+    """ECU address of a `request` line (see `common.classify_line`), if found."""
+    return common.extract_field(line, common.REQUEST_MARKER, "'")
 
-def _parse_ecu_address_from_request(line: str) -> str | None:
-    match = m_request.match(line)
-    return match.group(1) if match else None
 
+def parse_response(line: str) -> str | None:
+    """Message of a `response` line (see `common.classify_line`), if found."""
+    return common.extract_field(line, common.RESPONSE_MARKER, "'")
 
-def _parse_ecu_message_from_response(line: str) -> str | None:
-    match = m_response.match(line)
-    return match.group(1) if match else None
 
-
-def _message_group_parser(
-    ecu_addr: str,
-) -> Generator[RawParamRxMsg | None, TextIO, TextIO]:
+@dataclass(frozen=True)
+class FileParams:
     """
-    Parse a single parameter read spanning one or more log files.
+    Parameter reads of a single log file, parsed without knowing how the previous file ended.
 
-    ### Usage
+    Which request the first response of the file answers depends on whether the previous file ended
+    with a pending request, so it's kept separate. Everything after it is unambiguous.
+    Use `stitch` to resolve the file boundary.
 
-    1. Wait until a parameter request line is found.
-    2. Start with `.send(None)`.
-    3. Send file with `.send(f)` (will yield `None`).
-    4. Iterate until exhaustion:
-        1. If `None` was yielded: EOF was reached. Send another file and continue.
-        2. Else process yielded value.
-
-    Will misbehave if the above conventions are not followed.
+    Timestamps are relative to the day of the first response, unless the file was parsed with the
+    session's clock.
     """
-    while True:
-        f = yield
-        yield
-
-        for line in f:
-            ecu_message = _parse_ecu_message_from_response(line)
-            if ecu_message is None:
-                continue
-
-            entry = common.parse_log_entry(line)
-            if not entry:
-                break
 
-            yield RawParamRxMsg(ecu_addr=ecu_addr, message=ecu_message, time=entry.time)
-            break
+    # Request made before the first response, if any
+    first_request_ecu_addr: str | None
+    first_response_found: bool
+    # `None` if not found or if the line was malformed
+    first_response: common.LogEntry | None
+    # Parameter reads after the first response
+    messages: list[RawParamRxMsg]
+    # Request still waiting for a response at EOF
+    pending_ecu_addr: str | None
+    # See `stats.IngestionStats`. Scanned lines are only counted on request.
+    lines_scanned: int = 0
+    lines_matched: int = 0
+    # Only set by `parse_file_params_from_path`
+    parse_seconds: float = 0.0
+    # Byte offset where parsing ended: at the end of the file, or before `partial_line`
+    end_offset: int = 0
+    # Last line without a line terminator, if it was held back instead of parsed
+    partial_line: bytes = b""
+
+
+class _FileParamsParser(chunks.LineScanner):
+    """Parser of `parse_file_params`."""
+
+    _clock: common.SessionClock
+    _first_request_ecu_addr: str | None
+    _first_response_found: bool
+    _first_response: common.LogEntry | None
+    _messages: list[RawParamRxMsg]
+    _pending_ecu_addr: str | None
+
+    def __init__(
+        self, clock: common.SessionClock | None = None, count_lines: bool = False
+    ) -> None:
+        super().__init__(PARAMETER_NEEDLES, count_lines)
+        if clock is None:
+            clock = common.SessionClock()
+        self._clock = clock
+        self._first_request_ecu_addr = None
+        self._first_response_found = False
+        self._first_response = None
+        self._messages = []
+        self._pending_ecu_addr = None
+
+    def _parse_line(self, line: str, kind: common.LineKind) -> None:
+        match kind:
+            case "request":
+                if self._pending_ecu_addr is None:
+                    self._pending_ecu_addr = parse_request(line)
+            case "response":
+                ecu_message = parse_response(line)
+                if ecu_message is None:
+                    return
+
+                entry = common.parse_log_entry(line)
+                if not self._first_response_found:
+                    self._first_response_found = True
+                    self._first_request_ecu_addr = self._pending_ecu_addr
+                    if entry:
+                        self._first_response = common.LogEntry(
+                            time=self._clock(entry.time), message=ecu_message
+                        )
+                elif self._pending_ecu_addr is not None and entry:
+                    self._messages.append(
+                        RawParamRxMsg(
+                            ecu_addr=self._pending_ecu_addr,
+                            message=ecu_message,
+                            time=self._clock(entry.time),
+                        )
+                    )
+                self._pending_ecu_addr = None
+            case _:
+                pass
+
+    def result(self, end_offset: int, hold_back_partial: bool) -> FileParams:
+        """
+        Returns the result once the whole file has been fed, up to byte `end_offset`.
+
+        If `hold_back_partial` is true, a last line without a line terminator is left unparsed (see
+        `FileParams.partial_line`), because VIDA may still be writing it.
+        """
+        partial_line = b""
+        if hold_back_partial:
+            partial_line = self.partial
+            end_offset -= self.discard_partial()
         else:
-            # EOF reached
-            continue
-
-        return f
-
+            self.end_file()
+        lines_scanned, lines_matched = self.pop_line_counts()
+        return FileParams(
+            first_request_ecu_addr=(
+                self._first_request_ecu_addr
+                if self._first_response_found
+                else self._pending_ecu_addr
+            ),
+            first_response_found=self._first_response_found,
+            first_response=self._first_response,
+            messages=self._messages,
+            pending_ecu_addr=self._pending_ecu_addr,
+            lines_scanned=lines_scanned,
+            lines_matched=lines_matched,
+            end_offset=end_offset,
+            partial_line=partial_line,
+        )
+
+
+def parse_file_params(
+    file_chunks: Iterable[bytes],
+    clock: common.SessionClock | None = None,
+    count_lines: bool = False,
+    hold_back_partial: bool = False,
+) -> FileParams:
+    """
+    Parse parameter reads from a single log file, given as chunks of bytes. See `FileParams`.
 
-def parser() -> Generator[RawParamRxMsg | None, TextIO, NoReturn]:
+    Pairs requests and responses exactly like `session.SessionParser`: a request is answered by the
+    next response, and any requests in between are ignored. Timestamps come from `clock` (a new
+    one by default). Pass `hold_back_partial` if the file may still be written to.
     """
-    Parse parameter reads from one or more log files, forever.
+    parser = _FileParamsParser(clock, count_lines)
+    end_offset = 0
+    for chunk in file_chunks:
+        parser.feed(chunk)
+        end_offset += len(chunk)
+    return parser.result(end_offset, hold_back_partial)
+
+
+def parse_file_params_from_path(
+    path: str,
+    use_mmap: bool = False,
+    count_lines: bool = False,
+    hold_back_partial: bool = False,
+) -> FileParams:
+    """
+    `parse_file_params` for a whole file. Suitable for running in a worker process.
 
-    ### Usage
+    The time it takes is recorded in the result, and so are the line counts if `count_lines` is true.
+    """
+    start = time.perf_counter()
+    parser = _FileParamsParser(count_lines=count_lines)
+    end_offset = 0
+    for end_offset in parser.feed_file(path, use_mmap):
+        pass
+    return dataclasses.replace(
+        parser.result(end_offset, hold_back_partial),
+        parse_seconds=time.perf_counter() - start,
+    )
+
+
+def stitch(
+    file_params: FileParams,
+    pending_ecu_addr: str | None,
+    clock: common.SessionClock | None = None,
+) -> tuple[list[RawParamRxMsg], str | None]:
+    """
+    Resolve the start of a file given the request left pending by the previous file (if any).
 
-    1. Start with `.send(None)`.
-    2. Send file with `.send(f)` (will yield `None`).
-    3. Iterate until exhaustion:
-        1. If `None` was yielded: EOF was reached. Send another file and continue (or don't).
-        2. Else process yielded value.
+    Returns the parameter reads of the file in order, and the request left pending at its end.
 
-    Will misbehave if the above conventions are not followed.
+    If `clock` (the session's clock) is given, the file was parsed with a clock of its own, and its
+    timestamps are moved to the right day of the session.
     """
-    while True:
-        f = yield
-        yield
-
-        while True:
-            # Using while+readline instead of for-in because the file can change during the loop
-            line = f.readline()
-            if line == "":
-                # EOF reached
-                break
-
-            ecu_addr = _parse_ecu_address_from_request(line)
-            if ecu_addr is None:
-                continue
-
-            # Start line found: descent
-
-            group_parser = _message_group_parser(ecu_addr)
-            next(group_parser)
-            group_parser.send(f)
-            group_parser_f = yield from group_parser
-
-            # If the file was changed in group_parser, bring it here.
-            # We could parse the groups differently to avoid this, but then we'd have to
-            # either discard any parameter reads that span two log files boundaries, or
-            # to keep track of parser state explicitly.
-            if f != group_parser_f:
-                f = group_parser_f
-                continue
+    if not file_params.first_response_found:
+        # The whole file was spent waiting for a response
+        if pending_ecu_addr is None:
+            pending_ecu_addr = file_params.first_request_ecu_addr
+        return [], pending_ecu_addr
+
+    # A pending request takes precedence over any requests made before its response
+    ecu_addr = (
+        pending_ecu_addr
+        if pending_ecu_addr is not None
+        else file_params.first_request_ecu_addr
+    )
+    messages: list[RawParamRxMsg] = []
+    first_response = file_params.first_response
+    if ecu_addr is not None and first_response is not None:
+        messages.append(
+            RawParamRxMsg(
+                ecu_addr=ecu_addr,
+                message=first_response.message,
+                time=first_response.time,
+            )
+        )
+    messages.extend(file_params.messages)
+
+    if clock is not None:
+        messages = _follow_clock(file_params, messages, clock)
+
+    return messages, file_params.pending_ecu_addr
+
+
+def _follow_clock(
+    file_params: FileParams,
+    messages: list[RawParamRxMsg],
+    clock: common.SessionClock,
+) -> list[RawParamRxMsg]:
+    # The file's own clock started from its first response, on day 0
+    if file_params.first_response is not None:
+        first_time = file_params.first_response.time
+    elif file_params.messages:
+        first_time = file_params.messages[0].time
+    else:
+        return messages
+
+    offset = clock(first_time) - first_time
+    last_time = messages[-1].time if messages else first_time
+    clock.sync(last_time + offset)
+
+    if offset == 0:
+        return messages
+    return [
+        RawParamRxMsg(ecu_addr=m.ecu_addr, message=m.message, time=m.time + offset)
+        for m in messages
+    ]
@@ -0,0 +1,116 @@
+from typing import Literal
+from dataclasses import dataclass
+
+from . import chunks, common, ecu_id, params
+
+# "ecu_id_start": looking for the start of the ECU identification phase
+# "ecu_id": reading ECU identifiers until the end of the phase
+# "parameters": reading parameters (for the rest of the session)
+type ParserPhase = Literal["ecu_id_start"] | Literal["ecu_id"] | Literal["parameters"]
+
+# Substrings of the lines each phase is interested in (see `common.classify_line`)
+_NEEDLES: dict[ParserPhase, tuple[bytes, ...]] = {
+    "ecu_id_start": (b"> Perform",),
+    "ecu_id": (common.ECU_ID_MARKER.encode(), b"> Perform"),
+    "parameters": params.PARAMETER_NEEDLES,
+}
+
+
+@dataclass
+class ParserState:
+    """State of a `SessionParser` between files."""
+
+    phase: ParserPhase = "ecu_id_start"
+    # Parameter read phase: request waiting for a response, possibly made in a previous file
+    pending_ecu_addr: str | None = None
+
+
+class SessionParser(chunks.LineScanner):
+    """
+    Parse ECU identifiers and then parameter reads from the log files of a session, as a flat
+    state machine.
+
+    All of its state is in `state` (and the clock), so parsing can be continued from any file
+    boundary with another parser. Timestamps come from `clock` (a new one by default).
+
+    ### Usage
+
+    1. Feed the log files in order with `.feed(chunk)`, in chunks of bytes of any size. Call
+    `.end_file()` (or `.discard_partial()`, see `chunks.LineScanner`) at the end of each file.
+    2. Take the results with `.pop_ecu_identifiers()` and `.pop_messages()` after any call. The ECU
+    identification phase is over once `state.phase` is `"parameters"`, and all ECU identifiers are
+    found before any parameter reads.
+
+    Requests are answered by the next response, even if it's in the next file. Any requests in
+    between are ignored.
+    """
+
+    state: ParserState
+    _clock: common.SessionClock
+    # (ecu_identifier, timestamp)
+    _ecu_identifiers: list[tuple[str, int]]
+    _messages: list[params.RawParamRxMsg]
+
+    def __init__(
+        self,
+        clock: common.SessionClock | None = None,
+        state: ParserState | None = None,
+        count_lines: bool = False,
+    ) -> None:
+        if state is None:
+            state = ParserState()
+        if clock is None:
+            clock = common.SessionClock()
+        super().__init__(_NEEDLES[state.phase], count_lines)
+        self.state = state
+        self._clock = clock
+        self._ecu_identifiers = []
+        self._messages = []
+
+    def _enter_phase(self, phase: ParserPhase) -> None:
+        self.state.phase = phase
+        self.needles = _NEEDLES[phase]
+
+    def _parse_line(self, line: str, kind: common.LineKind) -> None:
+        state = self.state
+        match state.phase:
+            case "parameters":
+                if kind == "request":
+                    if state.pending_ecu_addr is None:
+                        state.pending_ecu_addr = params.parse_request(line)
+                elif kind == "response" and state.pending_ecu_addr is not None:
+                    ecu_message = params.parse_response(line)
+                    if ecu_message is None:
+                        return
+
+                    entry = common.parse_log_entry(line)
+                    if entry:
+                        self._messages.append(
+                            params.RawParamRxMsg(
+                                ecu_addr=state.pending_ecu_addr,
+                                message=ecu_message,
+                                time=self._clock(entry.time),
+                            )
+                        )
+                    state.pending_ecu_addr = None
+            case "ecu_id_start":
+                if kind == "ecu_id_phase_start":
+                    self._enter_phase("ecu_id")
+            case "ecu_id":
+                if kind == "ecu_id_phase_end":
+                    self._enter_phase("parameters")
+                elif kind == "ecu_id":
+                    parsed = ecu_id.parse_ecu_identifier(line)
+                    if parsed is not None:
+                        ecu_identifier, time_of_day = parsed
+                        self._ecu_identifiers.append(
+                            (ecu_identifier, self._clock(time_of_day))
+                        )
+
+    def pop_ecu_identifiers(self) -> list[tuple[str, int]]:
+        ecu_identifiers, self._ecu_identifiers = self._ecu_identifiers, []
+        return ecu_identifiers
+
+    def pop_messages(self) -> list[params.RawParamRxMsg]:
+        messages, self._messages = self._messages, []
+        return messages
@@ -0,0 +1,155 @@
+from typing import Iterator
+from dataclasses import dataclass
+import glob
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Number of bytes at the start of a log file that identify it
+FINGERPRINT_SIZE = 256
+
+
+def read_fingerprint(path: str) -> bytes:
+    """
+    Returns the start of a log file, which identifies it: log files are only appended to, and they
+    start with timestamped lines. Shorter than `FINGERPRINT_SIZE` if the file is.
+    """
+    with open(path, "rb") as f:
+        return f.read(FINGERPRINT_SIZE)
+
+
+def _rotated_paths(path: str) -> list[str]:
+    """Returns `<path>0`, `<path>1` etc. that exist, newest (highest number) first."""
+    numbered: list[tuple[int, str]] = []
+    for rotated_path in glob.glob(glob.escape(path) + "[0-9]*"):
+        suffix = rotated_path[len(path) :]
+        if suffix.isdigit():
+            numbered.append((int(suffix), rotated_path))
+    return [rotated_path for _, rotated_path in sorted(numbered, reverse=True)]
+
+
+@dataclass(frozen=True)
+class TailRead:
+    """Lines read from a log file by `LogTail.poll`."""
+
+    path: str
+    data: bytes
+    # Byte offset of the file after `data`
+    end_offset: int
+    # Whether the file has been rotated, so that nothing will be added to it anymore. `data` then
+    # ends at the end of the file, even if its last line has no line terminator.
+    finished: bool
+
+
+class LogTail:
+    """
+    Follows VIDA's active log file (`.log`) as it grows.
+
+    When the active file fills up, VIDA renames it to the next free `.logN` and starts a new `.log`.
+    The rest of the renamed file (and of any files rotated after it) is read before moving on to the
+    new one, so no lines are lost.
+
+    The active file is recognized by its inode number where the platform has them, and by its
+    fingerprint (see `read_fingerprint`) otherwise.
+
+    The files are only kept open while reading, so VIDA can rename them at any time.
+
+    Reading starts from byte `offset`, e.g. the `offset` of an earlier `LogTail` of the same file.
+    Pass its `fingerprint` too, so that a rotation in between is noticed.
+    """
+
+    path: str
+    _offset: int
+    # File identity of the active file, 0 if unknown or unsupported by the platform
+    _ino: int
+    # Fingerprint of the active file, empty if unknown
+    _fingerprint: bytes
+
+    def __init__(self, path: str, offset: int = 0, fingerprint: bytes = b"") -> None:
+        self.path = path
+        self._offset = offset
+        self._ino = 0
+        self._fingerprint = fingerprint
+
+    @property
+    def offset(self) -> int:
+        """Byte offset of the active file up to which lines have been read."""
+        return self._offset
+
+    @property
+    def fingerprint(self) -> bytes:
+        """Fingerprint of the active file, as of the last poll."""
+        return self._fingerprint
+
+    def _is_followed_file(self, ino: int, fingerprint: bytes) -> bool:
+        """Whether a file with the given identity is the one read up to `offset`."""
+        if ino != 0 and self._ino != 0:
+            return ino == self._ino
+        return fingerprint[: len(self._fingerprint)] == self._fingerprint
+
+    def _read_rotated(self) -> list[TailRead]:
+        """Read the rest of the followed file after it was rotated, and any files rotated after it."""
+        rotated_paths = _rotated_paths(self.path)
+
+        followed_i = None
+        for i, rotated_path in enumerate(rotated_paths):
+            try:
+                with open(rotated_path, "rb") as f:
+                    ino = os.fstat(f.fileno()).st_ino
+                    fingerprint = f.read(FINGERPRINT_SIZE)
+            except FileNotFoundError:
+                continue
+            if self._is_followed_file(ino, fingerprint):
+                followed_i = i
+                break
+
+        if followed_i is None:
+            logger.warning("Log file rotated, but the old file was not found")
+            return []
+
+        reads: list[TailRead] = []
+        # Oldest first
+        for i in range(followed_i, -1, -1):
+            rotated_path = rotated_paths[i]
+            logger.info(f"Log file rotated to '{rotated_path}'")
+            offset = self._offset if i == followed_i else 0
+            with open(rotated_path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            reads.append(TailRead(rotated_path, data, offset + len(data), True))
+        return reads
+
+    def poll(self) -> Iterator[TailRead]:
+        """
+        Yields the new complete lines since the last poll, one read per file, oldest file first.
+
+        Incomplete lines of the active file are left for the next poll.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            # Between rotation and the creation of the new file
+            return
+        with f:
+            ino = os.fstat(f.fileno()).st_ino
+            fingerprint = f.read(FINGERPRINT_SIZE)
+            size = f.seek(0, os.SEEK_END)
+            rotated = size < self._offset or not self._is_followed_file(
+                ino, fingerprint
+            )
+            offset = 0 if rotated else self._offset
+            f.seek(offset)
+            data = f.read()
+
+        reads = self._read_rotated() if rotated else []
+
+        end = data.rfind(b"\n") + 1
+        self._offset = offset + end
+        self._ino = ino
+        self._fingerprint = fingerprint
+        reads.append(TailRead(self.path, data[:end], self._offset, False))
+
+        for read in reads:
+            if read.data or read.finished:
+                yield read
@@ -0,0 +1,261 @@
+from typing import Any, Sequence
+from array import array
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+
+from . import _bus, constants, reader
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+_MAGIC = b"VLCSESS\0"
+_HEADER_LENGTH_SIZE = 8
+_ENTRY_SUFFIX = ".session"
+# Files are hashed in chunks of this size (bytes)
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def _hash_file(h: "hashlib._Hash", path: str) -> None:
+    with open(path, "rb") as f:
+        h.update(f.seek(0, 2).to_bytes(8, "little"))
+        f.seek(0)
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            h.update(chunk)
+
+
+def session_key(
+    log_paths: Sequence[str],
+    db_path: str = constants.DEFAULT_DB_PATH,
+    snapshot_path: str | None = None,
+) -> str:
+    """
+    Key of the converted parameters of a session: a hash of the contents of its log files (in
+    order) and of the version of the db or snapshot they're read with.
+
+    The db can be huge, so its version is its size and modification time, which change whenever it's
+    recreated. A snapshot is small, so its contents are hashed.
+    """
+    h = hashlib.sha256()
+    h.update(f"vidalicet-session-{FORMAT_VERSION}\0".encode())
+    if snapshot_path is None:
+        stat = os.stat(db_path)
+        h.update(f"db\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    else:
+        h.update(b"snapshot\0")
+        _hash_file(h, snapshot_path)
+    h.update(len(log_paths).to_bytes(8, "little"))
+    for path in log_paths:
+        _hash_file(h, path)
+    return h.hexdigest()
+
+
+def _serialize(params: Sequence[_bus.common.ParameterReadings]) -> list[bytes]:
+    """
+    Returns the header and the buffers of a cache entry.
+
+    Parameters of the same parent block share their timestamps, so each distinct timestamps array
+    is stored once.
+    """
+    timestamp_indexes: dict[int, int] = {}
+    buffers: list[bytes] = []
+    timestamp_lengths: list[int] = []
+    header_params: list[list[Any]] = []
+
+    for p in params:
+        timestamps_i = timestamp_indexes.get(id(p.timestamps), None)
+        if timestamps_i is None:
+            timestamps_i = timestamp_indexes[id(p.timestamps)] = len(timestamp_lengths)
+            timestamp_lengths.append(len(p.timestamps))
+            buffers.append(p.timestamps.tobytes())
+        header_params.append(
+            [p.block_id, p.name, p.text, p.ppe_text, p.ppe_unit_text, timestamps_i]
+        )
+    for p in params:
+        buffers.append(p.values.tobytes())
+
+    header = json.dumps(
+        {
+            "format_version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "timestamp_lengths": timestamp_lengths,
+            "params": header_params,
+        },
+        separators=(",", ":"),
+    ).encode()
+    return [
+        _MAGIC,
+        len(header).to_bytes(_HEADER_LENGTH_SIZE, "little"),
+        header,
+        *buffers,
+    ]
+
+
+def _deserialize(data: bytes) -> list[_bus.common.ParameterReadings]:
+    """Raises `ValueError` if `data` isn't a valid cache entry of this version."""
+    if not data.startswith(_MAGIC):
+        raise ValueError("Not a session cache entry")
+    pos = len(_MAGIC)
+    header_length = int.from_bytes(data[pos : pos + _HEADER_LENGTH_SIZE], "little")
+    pos += _HEADER_LENGTH_SIZE
+    header: dict[str, Any] = json.loads(data[pos : pos + header_length])
+    pos += header_length
+
+    if header.get("format_version", None) != FORMAT_VERSION:
+        raise ValueError(f"Unsupported format version: {header.get('format_version')}")
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"Unsupported byte order: {header['byteorder']}")
+
+    view = memoryview(data)
+
+    def take(typecode: str, length: int) -> array[Any]:
+        nonlocal pos
+        column = array(typecode)
+        end = pos + length * column.itemsize
+        if end > len(data):
+            raise ValueError("Truncated session cache entry")
+        column.frombytes(view[pos:end])
+        pos = end
+        return column
+
+    timestamps = [take("q", length) for length in header["timestamp_lengths"]]
+    params: list[_bus.common.ParameterReadings] = []
+    for block_id, name, text, ppe_text, ppe_unit_text, timestamps_i in header["params"]:
+        param_timestamps = timestamps[timestamps_i]
+        params.append(
+            _bus.common.ParameterReadings(
+                block_id=block_id,
+                name=name,
+                text=text,
+                ppe_text=ppe_text,
+                ppe_unit_text=ppe_unit_text,
+                timestamps=param_timestamps,
+                values=take("d", len(param_timestamps)),
+            )
+        )
+    if pos != len(data):
+        raise ValueError("Trailing data in session cache entry")
+    return params
+
+
+class SessionCache:
+    """
+    On-disk cache of converted sessions, so that reading an unchanged session again only costs
+    hashing its files and loading the result.
+
+    Entries are keyed by `session_key`, so changing a log file or recreating the db or snapshot
+    invalidates them automatically. The least recently used entries are evicted when the total
+    size of the cache exceeds `max_bytes`.
+    """
+
+    directory: str
+    max_bytes: int
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30) -> None:
+        if max_bytes < 0:
+            raise ValueError(f"Invalid cache size: {max_bytes}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def get(self, key: str) -> list[_bus.common.ParameterReadings] | None:
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            params = _deserialize(data)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Discarding invalid session cache entry '{path}': {e}")
+            self._remove(path)
+            return None
+
+        # Modification time is the time of last use
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return params
+
+    def put(self, key: str, params: Sequence[_bus.common.ParameterReadings]) -> None:
+        parts = _serialize(params)
+        size = sum(map(len, parts))
+        if size > self.max_bytes:
+            logger.info(
+                f"Session too large to be cached: {size} bytes > {self.max_bytes} bytes"
+            )
+            return
+
+        # Write atomically, so that concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.writelines(parts)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in `max_bytes`."""
+        entries: list[tuple[int, int, str]] = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(_ENTRY_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logger.debug(f"Evicting session cache entry '{path}'")
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def read_session(
+        self,
+        log_paths: Sequence[str],
+        db_path: str = constants.DEFAULT_DB_PATH,
+        snapshot_path: str | None = None,
+        use_mmap: bool = False,
+    ) -> list[_bus.common.ParameterReadings]:
+        """
+        Read all parameters of a session like `Reader.get_new_params` after ingesting `log_paths`
+        (in order), from the cache if possible.
+
+        See `Reader` for the other arguments.
+        """
+        key = session_key(log_paths, db_path, snapshot_path)
+        params = self.get(key)
+        if params is not None:
+            logger.info(f"Read session from cache: {key}")
+            return params
+
+        r = reader.Reader(db_path, snapshot_path)
+        for path in log_paths:
+            r.ingest_logfile(path, use_mmap)
+        params = r.get_new_params()
+        self.put(key, params)
+        return params
@@ -0,0 +1,82 @@
+from typing import Any
+import dataclasses
+import gzip
+import json
+
+from . import _log_parsing
+
+FORMAT_VERSION = 3
+
+
+@dataclasses.dataclass(frozen=True)
+class Checkpoint:
+    """
+    State of a `Reader` between log files (or polls of a followed one).
+
+    A reader restored from a checkpoint (`Reader.restore`) continues the session where the
+    checkpointed reader left off: files that were ingested before are only read from where
+    ingestion ended, so appending to a session doesn't mean ingesting all of it again.
+    """
+
+    # See `reader.Phase`
+    phase: str
+    ecu_identifiers: list[str]
+    # ECU identification phase: whether its start has been found
+    ecu_id_start_reached: bool
+    # Parameter read phase: request waiting for a response
+    pending_ecu_addr: str | None
+    # See `_log_parsing.common.SessionClock`
+    clock_day_start: int
+    clock_last_time_of_day: int | None
+    last_timestamp: int | None
+    log_files_ingested: int
+    # Byte offset up to which each log file has been ingested, by path
+    file_offsets: dict[str, int]
+    # Start of each of those files, to recognize them (see `_log_parsing.tail.read_fingerprint`)
+    file_fingerprints: dict[str, bytes]
+    # Log file whose last line has no line terminator, and the line, which is left out of
+    # `file_offsets` (see `Reader.ingest_logfile`)
+    unfinished_file: str | None
+    unfinished_line: bytes
+    # Parameter reads ingested, but not converted yet
+    param_messages: list[_log_parsing.params.RawParamRxMsg]
+
+
+def save(checkpoint: Checkpoint, path: str) -> None:
+    data = {
+        "format_version": FORMAT_VERSION,
+        **dataclasses.asdict(checkpoint),
+        "file_fingerprints": {
+            path: fingerprint.hex()
+            for path, fingerprint in checkpoint.file_fingerprints.items()
+        },
+        "unfinished_line": checkpoint.unfinished_line.hex(),
+        "param_messages": [dataclasses.astuple(m) for m in checkpoint.param_messages],
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def load(path: str) -> Checkpoint:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data: dict[str, Any] = json.load(f)
+
+    format_version = data.pop("format_version", None)
+    if format_version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported checkpoint format version: {format_version}. Expected: {FORMAT_VERSION}."
+        )
+
+    return Checkpoint(
+        **{
+            **data,
+            "file_fingerprints": {
+                path: bytes.fromhex(fingerprint)
+                for path, fingerprint in data["file_fingerprints"].items()
+            },
+            "unfinished_line": bytes.fromhex(data["unfinished_line"]),
+            "param_messages": [
+                _log_parsing.params.RawParamRxMsg(*m) for m in data["param_messages"]
+            ],
+        }
+    )
@@ -0,0 +1,94 @@
+from typing import TYPE_CHECKING, Any, Iterable
+from array import array
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    HAS_PYARROW = True
+except ImportError:
+    # Only used if HAS_PYARROW is true
+    if TYPE_CHECKING:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    HAS_PYARROW = False
+
+from . import _bus
+
+
+def require_pyarrow() -> None:
+    """Raise RuntimeError if PyArrow isn't installed."""
+    if not HAS_PYARROW:
+        raise RuntimeError("Arrow export requires PyArrow to be installed")
+
+
+def schema() -> "pa.Schema":
+    """
+    Schema of exported readings: one row per reading.
+
+    `time` is the timestamp of the reading as a duration since midnight of the session's first day.
+    """
+    require_pyarrow()
+    return pa.schema(
+        [
+            ("block_id", pa.int64()),
+            ("name", pa.dictionary(pa.int32(), pa.string())),
+            ("unit", pa.dictionary(pa.int32(), pa.string())),
+            ("time", pa.duration("ms")),
+            ("value", pa.float64()),
+        ]
+    )
+
+
+def _wrap(data_type: "pa.DataType", values: array[Any]) -> "pa.Array":
+    """Wrap the buffer of `values` as an Arrow array without copying."""
+    return pa.Array.from_buffers(data_type, len(values), [None, pa.py_buffer(values)])
+
+
+def _constant_dictionary(value: str, length: int) -> "pa.DictionaryArray":
+    indices = pa.repeat(pa.scalar(0, pa.int32()), length)
+    return pa.DictionaryArray.from_arrays(indices, pa.array([value], pa.string()))
+
+
+def to_record_batch(param: _bus.common.ParameterReadings) -> "pa.RecordBatch":
+    """
+    Convert the readings of a parameter into a record batch (see `schema`).
+
+    The timestamp and value columns share memory with `param`.
+    """
+    require_pyarrow()
+    length = len(param.values)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.repeat(pa.scalar(param.block_id, pa.int64()), length),
+            _constant_dictionary(param.name, length),
+            _constant_dictionary(param.ppe_unit_text, length),
+            _wrap(pa.duration("ms"), param.timestamps),
+            _wrap(pa.float64(), param.values),
+        ],
+        schema=schema(),
+    )
+
+
+def to_table(params: Iterable[_bus.common.ParameterReadings]) -> "pa.Table":
+    """Convert parameter readings into a table (see `schema`) with a record batch per item."""
+    return pa.Table.from_batches(map(to_record_batch, params), schema=schema())
+
+
+def write_parquet(
+    params: Iterable[_bus.common.ParameterReadings], path: str, **kwargs: Any
+) -> int:
+    """
+    Write parameter readings into a Parquet file (see `schema`). Returns the number of rows.
+
+    `params` is consumed one item at a time, so it can be a stream (e.g. `Reader.iter_params`).
+    Keyword arguments are passed to `pyarrow.parquet.ParquetWriter` (e.g. `compression`).
+    """
+    require_pyarrow()
+    rows = 0
+    with pq.ParquetWriter(path, schema(), **kwargs) as writer:
+        for param in params:
+            batch = to_record_batch(param)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
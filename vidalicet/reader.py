@@ -1,55 +1,100 @@
-from typing import Generator, List, Literal, Set, TextIO
+from typing import Any, Iterable, Iterator, List, Literal, Sequence, Set
 import logging
-from dataclasses import dataclass
-from datetime import time
+import concurrent.futures
+import os
+import time as time_module
 import sqlite3
 
-from . import _bus, _db, _log_parsing, constants
+from . import _bus, _db, _log_parsing, constants, export, snapshot
+from .checkpoint import Checkpoint
+from .stats import IngestionStats, StatsHook
 
 
 logger = logging.getLogger(__name__)
 
 type Phase = Literal["init"] | Literal["ecu_identification"] | Literal["parameters"]
-type Parser = Generator[
-    Phase,
-    TextIO,
-    None,
-]
-
-
-@dataclass
-class IngestionStats:
-    ecu_count: int = 0
-    param_count: int = 0
 
 
 class Reader:
-    _parser: Parser
+    _clock: _log_parsing.common.SessionClock
+    _parser: _log_parsing.session.SessionParser
+    _phase: Phase
+    # Byte offset up to which each log file has been ingested, by path
+    _file_offsets: dict[str, int]
+    # Fingerprints of the files in `_file_offsets` (see `_log_parsing.tail.read_fingerprint`)
+    _file_fingerprints: dict[str, bytes]
+    # Log file whose last line has no line terminator (yet). The line is held back in the parser,
+    # and not included in `_file_offsets`.
+    _unfinished_file: str | None
     _ecu_identifiers: Set[str]
     _param_messages_raw: List[_log_parsing.params.RawParamRxMsg]
-    _con: sqlite3.Connection
+    _con: sqlite3.Connection | None
+    _snapshot: snapshot.Snapshot | None
     _message_matcher: _bus.matching.MessageMatcher | None
     _block_extractor: _bus.child_blocks.BlockExtractor | None
+    # Only while streaming (`iter_params`)
+    _buckets: _bus.child_blocks.ReadingBuckets | None
+    _ready_params: list[_bus.common.ParameterReadings]
+    _stats_hook: StatsHook | None
+    _count_lines: bool
 
     last_ingestion_stats: IngestionStats | None
+    last_conversion_stats: IngestionStats | None
     log_files_ingested: int
-    last_timestamp: time | None
-
-    def __init__(self, db_path: str = constants.DEFAULT_DB_PATH) -> None:
-        self._parser = self._create_parser()
+    # Milliseconds since midnight of the session's first day
+    last_timestamp: int | None
+
+    def __init__(
+        self,
+        db_path: str = constants.DEFAULT_DB_PATH,
+        snapshot_path: str | None = None,
+        stats_hook: StatsHook | None = None,
+        count_lines: bool = False,
+    ) -> None:
+        """
+        If `snapshot_path` is given, everything is read from the snapshot (see `vidalicet.snapshot`)
+        instead of the db, and `db_path` is ignored.
+
+        `stats_hook` is called with the `IngestionStats` of every ingested log file (or poll of a
+        followed one) and every conversion (`get_new_params` etc.), e.g. to export them as metrics.
+        The same stats are available as `last_ingestion_stats` and `last_conversion_stats`. If
+        `count_lines` is true, the lines scanned and matched are counted too, which slows parsing
+        down a little.
+        """
+        self._clock = _log_parsing.common.SessionClock()
+        self._parser = _log_parsing.session.SessionParser(
+            self._clock, count_lines=count_lines
+        )
+        self._phase = "init"
+        self._file_offsets = {}
+        self._file_fingerprints = {}
+        self._unfinished_file = None
         self._ecu_identifiers = set()
         self._param_messages_raw = []
-        self._con = _db.connection.connect(db_path)
+        if snapshot_path is None:
+            self._con = _db.connection.connect(db_path)
+            self._snapshot = None
+        else:
+            self._con = None
+            self._snapshot = snapshot.load(snapshot_path)
         self._message_matcher = None
         self._block_extractor = None
+        self._buckets = None
+        self._ready_params = []
+        self._stats_hook = stats_hook
+        self._count_lines = count_lines
 
         self.last_ingestion_stats = None
+        self.last_conversion_stats = None
         self.log_files_ingested = 0
         self.last_timestamp = None
 
-        next(self._parser)
+    @property
+    def ecu_identifiers(self) -> frozenset[str]:
+        """ECU identifiers detected so far."""
+        return frozenset(self._ecu_identifiers)
 
-    def _assert_after_last_timestamp(self, timestamp: time, context: object) -> None:
+    def _assert_after_last_timestamp(self, timestamp: int, context: object) -> None:
         new, prev = timestamp, self.last_timestamp
 
         if prev is None:
@@ -57,10 +102,10 @@ class Reader:
 
         if new < prev:
             raise ValueError(
-                f"Log entry is older than last parsed entry. Did you ingest your log files in the correct order? Timestamps: {new} < {prev}. Context: '{context}'."
+                f"Log entry is older than last parsed entry. Did you ingest your log files in the correct order? Timestamps (ms): {new} < {prev}. Context: '{context}'."
             )
 
-    def _add_ecu_identifier(self, ecu_identifier: str, timestamp: time) -> None:
+    def _add_ecu_identifier(self, ecu_identifier: str, timestamp: int) -> None:
         self._assert_after_last_timestamp(timestamp, ecu_identifier)
 
         if ecu_identifier in self._ecu_identifiers:
@@ -75,94 +120,509 @@ class Reader:
     def _add_param_message(self, message: _log_parsing.params.RawParamRxMsg) -> None:
         self._assert_after_last_timestamp(message.time, message)
 
-        self._param_messages_raw.append(message)
+        if self._buckets is None:
+            self._param_messages_raw.append(message)
+        else:
+            self._route_param_message(message, self._buckets)
         assert self.last_ingestion_stats is not None
         self.last_ingestion_stats.param_count += 1
         self.last_timestamp = message.time
 
-    def _create_parser(self) -> Parser:
-        f = yield "init"
-
-        ## ECU identification phase
-
-        logger.debug("Entering ECU identification phase")
-
-        ecu_parser = _log_parsing.ecu_id.parser()
-        next(ecu_parser)
-        ecu_parser.send(f)
-
-        for response in ecu_parser:
-            if response is None:
-                f = yield "ecu_identification"
-                ecu_parser.send(f)
-                continue
+    def _route_param_message(
+        self,
+        message: _log_parsing.params.RawParamRxMsg,
+        buckets: _bus.child_blocks.ReadingBuckets,
+    ) -> None:
+        """Match a message right away and convert its bucket if it fills up."""
+        assert self._message_matcher is not None and self._block_extractor is not None
+        stats = self.last_ingestion_stats
+        assert stats is not None
+        start = time_module.perf_counter()
+        reading = self._message_matcher.match_one(message)
+        stats.add_time("match", time_module.perf_counter() - start)
+        if reading is None:
+            stats.add_unmatched(message.ecu_addr)
+            return
+        full_bucket = buckets.add(reading)
+        if full_bucket is not None:
+            self._ready_params.extend(
+                self._block_extractor.extract_groups({reading.id: full_bucket}, stats)
+            )
 
-            ecu_identifier, timestamp = response
+    def _collect_parsed(self) -> None:
+        """Add what the parser has found so far, entering the parameter read phase when it's reached."""
+        for ecu_identifier, timestamp in self._parser.pop_ecu_identifiers():
             self._add_ecu_identifier(ecu_identifier, timestamp)
 
-        logger.debug(
-            f"ECU identification phase complete. Detected {len(self._ecu_identifiers)} unique ECUs: {self._ecu_identifiers}"
-        )
+        if self._phase != "parameters":
+            if self._parser.state.phase != "parameters":
+                self._phase = "ecu_identification"
+                return
 
-        ## Parameter read phase
+            logger.debug(
+                f"ECU identification phase complete. Detected {len(self._ecu_identifiers)} unique ECUs: {self._ecu_identifiers}"
+            )
+            self._phase = "parameters"
+            self._init_parameter_phase()
 
-        logger.info("Reading parameter match data from db")
-        match_data = _db.matching.get_parent_match_data(
-            self._con, self._ecu_identifiers
-        )
-        logger.info("Preprocessing parameter match data")
-        self._message_matcher = _bus.matching.MessageMatcher(match_data)
-        self._block_extractor = _bus.child_blocks.BlockExtractor(self._con)
-
-        logger.debug("Entering parameter read phase")
-        param_parser = _log_parsing.params.parser()
-        next(param_parser)
-        param_parser.send(f)
-
-        for message in param_parser:
-            if message is None:
-                f = yield "parameters"
-                param_parser.send(f)
-                continue
+        for message in self._parser.pop_messages():
             self._add_param_message(message)
 
-    def ingest_logfile(self, path: str) -> Phase:
-        file_i = self.log_files_ingested
-
-        logger.info(f"Ingesting log file #{file_i}: '{path}'")
-        self.last_ingestion_stats = IngestionStats()
-        with open(path, "r") as f:
-            try:
-                status = self._parser.send(f)
-            except StopIteration:
-                raise RuntimeError("Parser coroutine ended unexpectedly")
+    def _init_parameter_phase(self) -> None:
+        assert self.last_ingestion_stats is not None
+        with self.last_ingestion_stats.timed("load_specs"):
+            self._load_specs()
+
+    def _load_specs(self) -> None:
+        if self._snapshot is None:
+            assert self._con is not None
+            logger.info("Reading parameter match data from db")
+            match_data = _db.matching.get_parent_match_data(
+                self._con, self._ecu_identifiers
+            )
+        else:
+            logger.info("Reading parameter match data from snapshot")
+            missing = self._ecu_identifiers - self._snapshot.ecu_identifiers
+            if missing:
+                logger.warning(
+                    f"ECU identifiers not in snapshot, their parameters will be ignored: {missing}"
+                )
+            match_data = self._snapshot.get_parent_match_data(
+                self._ecu_identifiers - missing
+            )
 
-        self.log_files_ingested += 1
+        logger.info("Preprocessing parameter match data")
+        self._message_matcher = _bus.matching.MessageMatcher(match_data)
+        ecu_variant_ids = {d.ecu_variant_id for d in match_data}
+        if self._snapshot is None:
+            self._block_extractor = _bus.child_blocks.BlockExtractor(self._con)
+            self._block_extractor.preload(ecu_variant_ids)
+        else:
+            self._block_extractor = _bus.child_blocks.BlockExtractor(
+                None, scaling_trees=self._snapshot.scaling_trees
+            )
+            self._block_extractor.add_child_specs(
+                self._snapshot.child_block_specs, ecu_variant_ids
+            )
 
-        ## Log ingestion outcome
+    def _ingest_rest_of_file(self, path: str, use_mmap: bool) -> Iterator[None]:
+        """
+        Feed a log file to the parser from where its ingestion ended last time (if ever), pausing
+        after each chunk. If it's closed early, the file is left at the start of the line the last
+        chunk ended in.
+        """
+        offset = self._file_offsets.get(path, 0)
+        fed_to_end = False
+        try:
+            for offset in self._parser.feed_file(path, use_mmap, offset):
+                self._collect_parsed()
+                yield
+            # Also if the file was empty
+            self._collect_parsed()
+            fed_to_end = True
+        finally:
+            if fed_to_end:
+                # VIDA may still be writing the last line, so it's held back
+                partial_length = len(self._parser.partial)
+                if partial_length > 0:
+                    self._unfinished_file = path
+            else:
+                # Fed again from the start of the line next time
+                partial_length = self._parser.discard_partial()
+            self._file_offsets[path] = offset - partial_length
+            self._file_fingerprints[path] = _log_parsing.tail.read_fingerprint(path)
+            self._add_line_counts()
+
+    def _resolve_unfinished_file(self, path: str) -> None:
+        """
+        Before `path` is fed: a line held back from it is dropped, as it's fed again from its start.
+        A line held back from another file is complete, as that file is followed by this one.
+        """
+        if self._unfinished_file == path:
+            self._parser.discard_partial()
+            self._unfinished_file = None
+        else:
+            self._finish_unfinished_file()
+
+    def _finish_unfinished_file(self) -> None:
+        """
+        Parse the last line held back from `_unfinished_file` (if any) as a complete line. This is
+        the end of that file's ingestion, with stats of its own.
+        """
+        path = self._unfinished_file
+        if path is None:
+            return
+        self._unfinished_file = None
+        logger.debug(f"Ingesting the last line of log file: '{path}'")
+        stats = IngestionStats(path=path)
+        self.last_ingestion_stats = stats
+        start = time_module.perf_counter()
+        self._file_offsets[path] += len(self._parser.partial)
+        self._parser.end_file()
+        self._collect_parsed()
+        self._add_line_counts()
+        stats.add_remaining_time("parse", time_module.perf_counter() - start)
+        self._report_stats(stats)
+
+    def _report_stats(self, stats: IngestionStats) -> None:
+        if self._stats_hook is not None:
+            self._stats_hook(stats)
+
+    def _add_line_counts(self) -> None:
+        lines_scanned, lines_matched = self._parser.pop_line_counts()
+        assert self.last_ingestion_stats is not None
+        self.last_ingestion_stats.lines_scanned += lines_scanned
+        self.last_ingestion_stats.lines_matched += lines_matched
 
+    def _log_ingestion_outcome(self, file_i: int, path: str, status: Phase) -> None:
         stats = self.last_ingestion_stats
+        assert stats is not None
         logger.info(
             f"Ingested {stats.ecu_count} ECU identifiers and {stats.param_count} parameter reads"
         )
+        self._report_stats(stats)
         match status:
             case "init":
-                raise RuntimeError("Ingested log file, but status is still '{status}'")
+                raise RuntimeError(f"Ingested log file, but status is still '{status}'")
             case "ecu_identification":
                 pass
             case "parameters":
                 pass
         logger.info(f"Ingestion of log file #{file_i} completed: '{path}'")
 
-        return status
+    def ingest_logfile(self, path: str, use_mmap: bool = False) -> Phase:
+        """
+        Ingest the next log file of the session.
+
+        The file is scanned as bytes, and only the lines that can be relevant are decoded. If
+        `use_mmap` is true, the file is memory-mapped instead of read.
+
+        If the file has been ingested before (e.g. by the reader a checkpoint was taken of), only the
+        bytes added to it since are ingested. A last line without a line terminator may still be
+        being written by VIDA, so it's held back: it's ingested again with the rest of the file, or
+        parsed as it is once another file is ingested or the parameters are converted
+        (`get_new_params` etc.).
+        """
+        for _ in self._ingest_logfile_in_chunks(path, use_mmap):
+            pass
+        return self._phase
+
+    def _ingest_logfile_in_chunks(self, path: str, use_mmap: bool) -> Iterator[None]:
+        """Like `ingest_logfile`, but pauses after each chunk of the file has been parsed."""
+        file_i = self.log_files_ingested
+        offset = self._file_offsets.get(path, 0)
+        if os.path.getsize(path) < offset:
+            raise ValueError(
+                f"Log file is smaller than when it was last ingested ({offset} bytes): '{path}'"
+            )
+        fingerprint = self._file_fingerprints.get(path, b"")
+        if _log_parsing.tail.read_fingerprint(path)[: len(fingerprint)] != fingerprint:
+            raise ValueError(
+                f"Log file has been replaced since it was last ingested: '{path}'"
+            )
+
+        self._resolve_unfinished_file(path)
+
+        if offset == 0:
+            logger.info(f"Ingesting log file #{file_i}: '{path}'")
+        else:
+            logger.info(f"Ingesting log file #{file_i} from byte {offset}: '{path}'")
+        stats = IngestionStats(path=path)
+        self.last_ingestion_stats = stats
+        # The time spent by the caller while paused isn't parse time
+        parse_time = 0.0
+        start = time_module.perf_counter()
+        for _ in self._ingest_rest_of_file(path, use_mmap):
+            parse_time += time_module.perf_counter() - start
+            yield
+            start = time_module.perf_counter()
+        parse_time += time_module.perf_counter() - start
+        stats.add_remaining_time("parse", parse_time)
+
+        self.log_files_ingested += 1
+
+        ## Log ingestion outcome
+
+        self._log_ingestion_outcome(file_i, path, self._phase)
+
+    def ingest_logfiles_parallel(
+        self,
+        paths: Sequence[str],
+        max_workers: int | None = None,
+        use_mmap: bool = False,
+    ) -> Phase:
+        """
+        Ingest all log files of a session (in order), parsing them in parallel worker processes.
+
+        Each file is parsed on its own, and requests and responses that straddle file boundaries are
+        matched up afterwards, so the result is the same as with `ingest_logfile`. Must be called
+        before any other files have been ingested. More files can be ingested with `ingest_logfile`
+        afterwards.
+
+        The ECU identification phase is parsed sequentially in this process. It's short and
+        normally contained in the first file. Only the files after it are parsed in parallel.
+
+        On platforms that spawn worker processes (e.g. Windows), the calling script must be
+        importable without side effects (guard it with `if __name__ == "__main__":`).
+        """
+        if self.log_files_ingested != 0:
+            raise RuntimeError(
+                "Parallel ingestion must start from the first log file of the session"
+            )
+
+        # Parse the ECU identification phase here, and only then start worker processes for the
+        # files that remain
+        file_i = 0
+        while file_i < len(paths) and self._phase != "parameters":
+            self.ingest_logfile(paths[file_i], use_mmap)
+            file_i += 1
+        remaining_paths = paths[file_i:]
+        if not remaining_paths:
+            return self._phase
+        self._finish_unfinished_file()
+
+        pending_ecu_addr = self._parser.state.pending_ecu_addr
+        partial_line = b""
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _log_parsing.params.parse_file_params_from_path,
+                    path,
+                    use_mmap,
+                    self._count_lines,
+                    # Only the last file may still be written to
+                    path_i == len(remaining_paths) - 1,
+                )
+                for path_i, path in enumerate(remaining_paths)
+            ]
+
+            for file_i, (path, future) in enumerate(
+                zip(remaining_paths, futures), file_i
+            ):
+                logger.info(f"Ingesting log file #{file_i}: '{path}'")
+                stats = IngestionStats(path=path)
+                self.last_ingestion_stats = stats
+
+                file_params = future.result()
+                # In the worker process
+                stats.add_time("parse", file_params.parse_seconds)
+                stats.lines_scanned += file_params.lines_scanned
+                stats.lines_matched += file_params.lines_matched
+                self._file_offsets[path] = file_params.end_offset
+                self._file_fingerprints[path] = _log_parsing.tail.read_fingerprint(path)
+                # Parsed with a clock of its own
+                messages, pending_ecu_addr = _log_parsing.params.stitch(
+                    file_params, pending_ecu_addr, self._clock
+                )
+                for message in messages:
+                    self._add_param_message(message)
+                partial_line = file_params.partial_line
+
+                self.log_files_ingested += 1
+                self._log_ingestion_outcome(file_i, path, self._phase)
+
+        # Continue where the last file left off
+        self._parser.state.pending_ecu_addr = pending_ecu_addr
+        if partial_line:
+            self._parser.feed(partial_line)
+            self._unfinished_file = remaining_paths[-1]
+        return self._phase
+
+    def checkpoint(self) -> Checkpoint:
+        """
+        Capture the state of the reader between log files, e.g. to save it with
+        `vidalicet.checkpoint.save` and resume reading the session later with `restore`.
+
+        Parameter reads that haven't been converted yet are included. Can't be called while
+        streaming (`iter_params`), or before the chunks it left behind have been returned.
+        """
+        if self._buckets is not None or self._ready_params:
+            raise RuntimeError(
+                "Can't checkpoint while streaming parameters. Call get_new_params first."
+            )
+        return Checkpoint(
+            phase=self._phase,
+            ecu_identifiers=sorted(self._ecu_identifiers),
+            ecu_id_start_reached=self._parser.state.phase != "ecu_id_start",
+            pending_ecu_addr=self._parser.state.pending_ecu_addr,
+            clock_day_start=self._clock.day_start,
+            clock_last_time_of_day=self._clock.last_time_of_day,
+            last_timestamp=self.last_timestamp,
+            log_files_ingested=self.log_files_ingested,
+            file_offsets=dict(self._file_offsets),
+            file_fingerprints=dict(self._file_fingerprints),
+            unfinished_file=self._unfinished_file,
+            unfinished_line=self._parser.partial,
+            param_messages=list(self._param_messages_raw),
+        )
+
+    def restore(self, cp: Checkpoint) -> None:
+        """
+        Continue reading a session from a checkpoint (see `checkpoint`). Must be called before any
+        log files have been ingested.
+
+        Log files that were ingested before the checkpoint can be ingested (or followed) again, and
+        only the bytes added to them since are read. The reader must use the same db or snapshot
+        as the reader the checkpoint was taken of.
+        """
+        if self.log_files_ingested != 0:
+            raise RuntimeError("Can only restore a checkpoint into a new reader")
+
+        self._clock = _log_parsing.common.SessionClock(
+            cp.clock_day_start, cp.clock_last_time_of_day
+        )
+        self._ecu_identifiers = set(cp.ecu_identifiers)
+        self._file_offsets = dict(cp.file_offsets)
+        self._file_fingerprints = dict(cp.file_fingerprints)
+        self._unfinished_file = cp.unfinished_file
+        self._param_messages_raw = list(cp.param_messages)
+        self.last_timestamp = cp.last_timestamp
+        self.log_files_ingested = cp.log_files_ingested
+
+        match cp.phase:
+            case "init" | "ecu_identification":
+                self._phase = cp.phase
+                parser_phase = "ecu_id" if cp.ecu_id_start_reached else "ecu_id_start"
+            case "parameters":
+                self._phase = cp.phase
+                parser_phase = "parameters"
+                self._load_specs()
+            case _:
+                raise ValueError(f"Invalid phase in checkpoint: '{cp.phase}'")
+        self._parser = _log_parsing.session.SessionParser(
+            self._clock,
+            _log_parsing.session.ParserState(parser_phase, cp.pending_ecu_addr),
+            self._count_lines,
+        )
+        self._parser.feed(cp.unfinished_line)
+
+    def follow(
+        self, path: str, poll_interval: float = 1.0
+    ) -> Iterator[list[_bus.common.ParameterReadings]]:
+        """
+        Follow VIDA's active log file (the one ending with `.log`) as VIDA writes to it.
+
+        Polls the file every `poll_interval` seconds, ingests the lines added since the last poll and
+        yields the result of `get_new_params` (which can be empty). Rotation of the active file to
+        `.logN` is handled, also if it's rotated more than once between polls. Any files that have
+        already been rotated should be ingested with `ingest_logfile` first. Runs until the caller
+        stops iterating.
+
+        If the file has been ingested or followed before, following continues from where that ended.
+        """
+        self._resolve_unfinished_file(path)
+        log_tail = _log_parsing.tail.LogTail(
+            path,
+            self._file_offsets.get(path, 0),
+            self._file_fingerprints.get(path, b""),
+        )
+        logger.info(f"Following log file: '{path}'")
+
+        while True:
+            stats = IngestionStats(path=path)
+            self.last_ingestion_stats = stats
+            start = time_module.perf_counter()
+            for read in log_tail.poll():
+                self._parser.feed(read.data)
+                if read.finished:
+                    # A rotated file, which is complete now
+                    self._parser.end_file()
+                    self._file_offsets[read.path] = read.end_offset
+                    self._file_fingerprints[read.path] = (
+                        _log_parsing.tail.read_fingerprint(read.path)
+                    )
+                    self.log_files_ingested += 1
+                self._collect_parsed()
+            self._add_line_counts()
+            self._file_offsets[path] = log_tail.offset
+            self._file_fingerprints[path] = log_tail.fingerprint
+            stats.add_remaining_time("parse", time_module.perf_counter() - start)
+
+            if stats.ecu_count > 0 or stats.param_count > 0:
+                logger.debug(
+                    f"Ingested {stats.ecu_count} ECU identifiers and {stats.param_count} parameter reads"
+                )
+            self._report_stats(stats)
+
+            yield self.get_new_params()
+            time_module.sleep(poll_interval)
+
+    def iter_params(
+        self,
+        paths: Iterable[str],
+        flush_threshold: int = 10_000,
+        use_mmap: bool = False,
+    ) -> Iterator[_bus.common.ParameterReadings]:
+        """
+        Ingest log files (in order) and yield parameter readings as they become available, in chunks.
+
+        Instead of being buffered until the end, each parameter read is matched as soon as it's
+        parsed and put in a bucket of its parent block. When a bucket holds `flush_threshold`
+        readings, it's converted, and the chunks are yielded after each chunk of the file has been
+        parsed. The remaining buckets are converted at the end. Memory use stays bounded for arbitrarily long
+        sessions, but a parameter is typically split into several chunks.
+
+        Parameters that are pending from earlier ingestion are yielded first. If iteration is
+        stopped early, the chunks that weren't yielded are returned by the next `get_new_params`.
+        """
+        yield from self.get_new_params()
+
+        buckets = _bus.child_blocks.ReadingBuckets(flush_threshold)
+        self._buckets = buckets
+        try:
+            for path in paths:
+                for _ in self._ingest_logfile_in_chunks(path, use_mmap):
+                    yield from self._pop_ready_params()
+            self._finish_unfinished_file()
+        finally:
+            self._buckets = None
+            if self._block_extractor is not None:
+                stats = IngestionStats()
+                self.last_conversion_stats = stats
+                self._ready_params.extend(
+                    self._block_extractor.extract_groups(buckets.pop_all(), stats)
+                )
+                self._report_stats(stats)
+
+        yield from self._pop_ready_params()
+
+    def _pop_ready_params(self) -> list[_bus.common.ParameterReadings]:
+        ready_params, self._ready_params = self._ready_params, []
+        return ready_params
+
+    def get_new_params_table(self) -> "export.pa.Table":
+        """Like `get_new_params`, but returns an Arrow table (see `vidalicet.export`)."""
+        # Before the buffered reads are consumed, so that they aren't lost
+        export.require_pyarrow()
+        return export.to_table(self.get_new_params())
+
+    def write_new_params_parquet(self, path: str, **kwargs: Any) -> int:
+        """
+        Like `get_new_params`, but writes the result into a Parquet file (see `vidalicet.export`).
+        Returns the number of readings written.
+        """
+        export.require_pyarrow()
+        return export.write_parquet(self.get_new_params(), path, **kwargs)
 
     def get_new_params(self) -> list[_bus.common.ParameterReadings]:
+        """
+        Convert the parameter reads ingested since the last call. The last line held back from a
+        log file (see `ingest_logfile`) is taken to be complete, and parsed first.
+        """
+        self._finish_unfinished_file()
         if not self._message_matcher or not self._block_extractor:
             return []
 
         logger.info(f"Iterating {len(self._param_messages_raw)} params.")
 
-        readings = self._message_matcher.match(self._param_messages_raw)
-        converted_readings = self._block_extractor.extract_children(readings)
+        stats = IngestionStats(param_count=len(self._param_messages_raw))
+        self.last_conversion_stats = stats
+        with stats.timed("match"):
+            groups = _bus.child_blocks.group_by_parent(
+                self._message_matcher.match(self._param_messages_raw, stats)
+            )
+        converted_readings = self._block_extractor.extract_groups(groups, stats)
         self._param_messages_raw.clear()
-        return converted_readings
+        self._report_stats(stats)
+        return self._pop_ready_params() + converted_readings
@@ -0,0 +1,213 @@
+from typing import Any, Iterable, Literal, Sequence
+from array import array
+from dataclasses import dataclass
+import heapq
+import math
+
+from . import _bus
+from ._bus.common import HAS_NUMPY, np
+
+type Method = Literal["asof"] | Literal["linear"]
+
+
+@dataclass(frozen=True)
+class WideTable:
+    """
+    Readings of several parameters at common timestamps.
+
+    `timestamps` (milliseconds, typecode `q`) and each of `columns` (typecode `d`) are parallel
+    arrays. Missing values are NaN. `block_ids` and `names` identify the parameter of each column.
+    """
+
+    timestamps: array[int]
+    block_ids: list[int]
+    names: list[str]
+    columns: list[array[float]]
+
+    def column(self, name: str) -> array[float]:
+        return self.columns[self.names.index(name)]
+
+
+def _create_grid(
+    params: Sequence[_bus.common.ParameterReadings],
+    interval_ms: int | None,
+    start_ms: int | None,
+    end_ms: int | None,
+) -> array[int]:
+    if interval_ms is None:
+        # Union of all timestamps. They are ordered within each parameter.
+        merged = heapq.merge(*(p.timestamps for p in params))
+        grid = array("q")
+        prev = None
+        for t in merged:
+            if t != prev:
+                grid.append(t)
+                prev = t
+        if start_ms is not None or end_ms is not None:
+            grid = array(
+                "q",
+                (
+                    t
+                    for t in grid
+                    if (start_ms is None or t >= start_ms)
+                    and (end_ms is None or t <= end_ms)
+                ),
+            )
+        return grid
+
+    if interval_ms <= 0:
+        raise ValueError(f"Invalid interval: {interval_ms}")
+    non_empty = [p for p in params if len(p.timestamps) > 0]
+    if start_ms is None:
+        start_ms = min((p.timestamps[0] for p in non_empty), default=0)
+    if end_ms is None:
+        end_ms = max((p.timestamps[-1] for p in non_empty), default=-1)
+    return array("q", range(start_ms, end_ms + 1, interval_ms))
+
+
+def _resample_asof(
+    grid: array[int],
+    timestamps: array[int],
+    values: array[float],
+    tolerance_ms: int | None,
+) -> array[float]:
+    result = array("d")
+    nan = math.nan
+    n = len(timestamps)
+    # Number of readings at or before the current grid point
+    i = 0
+    for t in grid:
+        while i < n and timestamps[i] <= t:
+            i += 1
+        if i == 0 or (
+            tolerance_ms is not None and t - timestamps[i - 1] > tolerance_ms
+        ):
+            result.append(nan)
+        else:
+            result.append(values[i - 1])
+    return result
+
+
+def _resample_linear(
+    grid: array[int], timestamps: array[int], values: array[float]
+) -> array[float]:
+    result = array("d")
+    nan = math.nan
+    n = len(timestamps)
+    # Number of readings at or before the current grid point
+    i = 0
+    for t in grid:
+        while i < n and timestamps[i] <= t:
+            i += 1
+        if i == 0:
+            result.append(nan)
+            continue
+        t0, v0 = timestamps[i - 1], values[i - 1]
+        if t0 == t:
+            result.append(v0)
+        elif i == n:
+            result.append(nan)
+        else:
+            t1, v1 = timestamps[i], values[i]
+            result.append(v0 + (v1 - v0) * (t - t0) / (t1 - t0))
+    return result
+
+
+def _resample_vectorized(
+    grid: "np.ndarray[Any, Any]",
+    timestamps: array[int],
+    values: array[float],
+    method: Method,
+    tolerance_ms: int | None,
+) -> array[float]:
+    """Like `_resample_asof` and `_resample_linear`, but with NumPy."""
+    ts = np.frombuffer(timestamps, dtype=np.int64)
+    vs = np.frombuffer(values, dtype=np.float64)
+    n = len(ts)
+    result = np.full(len(grid), np.nan)
+
+    if n > 0:
+        # Number of readings at or before each grid point
+        counts = np.searchsorted(ts, grid, side="right")
+        has_prev = counts > 0
+        i0 = np.maximum(counts - 1, 0)
+        t0, v0 = ts[i0], vs[i0]
+
+        match method:
+            case "asof":
+                valid = has_prev
+                if tolerance_ms is not None:
+                    valid &= grid - t0 <= tolerance_ms
+                result[valid] = v0[valid]
+            case "linear":
+                exact = has_prev & (t0 == grid)
+                result[exact] = v0[exact]
+                between = has_prev & ~exact & (counts < n)
+                i1 = counts[between]
+                t0b, v0b = t0[between], v0[between]
+                result[between] = v0b + (vs[i1] - v0b) * (grid[between] - t0b) / (
+                    ts[i1] - t0b
+                )
+
+    column = array("d")
+    column.frombytes(result.tobytes())
+    return column
+
+
+def resample(
+    params: Iterable[_bus.common.ParameterReadings],
+    interval_ms: int | None = None,
+    method: Method = "asof",
+    start_ms: int | None = None,
+    end_ms: int | None = None,
+    tolerance_ms: int | None = None,
+    vectorize: bool = HAS_NUMPY,
+) -> WideTable:
+    """
+    Align the readings of several parameters into a `WideTable` with a column per parameter.
+
+    The rows are at a fixed rate of one per `interval_ms` from `start_ms` to `end_ms` (by default,
+    the first and last reading of any parameter). If `interval_ms` is `None`, there's a row for each
+    distinct timestamp of any parameter instead.
+
+    With `method="asof"`, the value of a column is the latest reading at or before the row, or NaN
+    if there is none or if it's older than `tolerance_ms`. With `method="linear"`, values are
+    interpolated linearly between the readings around the row, and rows outside of the readings
+    are NaN.
+
+    Each parameter's timestamps must be in order (as returned by `Reader`), so each column is
+    filled by walking the rows and the readings side by side in O(rows + readings). If `vectorize`
+    is true, NumPy (binary search) is used instead.
+    """
+    if method not in ("asof", "linear"):
+        raise ValueError(f"Invalid method: {method}")
+    if vectorize and not HAS_NUMPY:
+        raise RuntimeError("Vectorized resampling requires NumPy to be installed")
+
+    params = list(params)
+    grid = _create_grid(params, interval_ms, start_ms, end_ms)
+
+    columns: list[array[float]] = []
+    for p in params:
+        if vectorize:
+            column = _resample_vectorized(
+                np.frombuffer(grid, dtype=np.int64),
+                p.timestamps,
+                p.values,
+                method,
+                tolerance_ms,
+            )
+        else:
+            match method:
+                case "asof":
+                    column = _resample_asof(grid, p.timestamps, p.values, tolerance_ms)
+                case "linear":
+                    column = _resample_linear(grid, p.timestamps, p.values)
+        columns.append(column)
+
+    return WideTable(
+        timestamps=grid,
+        block_ids=[p.block_id for p in params],
+        names=[p.name for p in params],
+        columns=columns,
+    )
@@ -0,0 +1,133 @@
+from typing import Any, Iterable
+import dataclasses
+import gzip
+import json
+import sqlite3
+from lark import ParseTree
+
+from . import _db
+from ._bus import _scaling
+
+FORMAT_VERSION = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """
+    Everything `Reader` would otherwise query from the db for a given set of ECUs (i.e. a vehicle).
+
+    Snapshots are small and load in milliseconds, and they can be used on machines that don't have
+    the db.
+    """
+
+    # Match data of each ECU identifier
+    parent_match_data: dict[str, list[_db.matching.DbParentBlockMatchData]]
+    # Child block specs by (ecu_variant_id, parent_block_id)
+    child_block_specs: dict[tuple[int, int], list[_db.child_blocks.DbChildBlockSpec]]
+    # Parsed scaling by scaling definition
+    scaling_trees: dict[str, ParseTree]
+
+    @property
+    def ecu_identifiers(self) -> frozenset[str]:
+        return frozenset(self.parent_match_data)
+
+    @property
+    def ecu_variant_ids(self) -> frozenset[int]:
+        return frozenset(
+            d.ecu_variant_id
+            for match_datas in self.parent_match_data.values()
+            for d in match_datas
+        )
+
+    def get_parent_match_data(
+        self, ecu_identifiers: Iterable[str]
+    ) -> list[_db.matching.DbParentBlockMatchData]:
+        """Like `_db.matching.get_parent_match_data`. Raises `KeyError` for unknown ECUs."""
+        # dict as an ordered set, like SELECT DISTINCT
+        result: dict[_db.matching.DbParentBlockMatchData, None] = {}
+        for ecu_identifier in ecu_identifiers:
+            if ecu_identifier not in self.parent_match_data:
+                raise KeyError(f"ECU identifier not in snapshot: '{ecu_identifier}'")
+            result.update(dict.fromkeys(self.parent_match_data[ecu_identifier]))
+        return list(result)
+
+
+def create(con: sqlite3.Connection, ecu_identifiers: Iterable[str]) -> Snapshot:
+    parent_match_data = {
+        ecu_identifier: _db.matching.get_parent_match_data(con, (ecu_identifier,))
+        for ecu_identifier in ecu_identifiers
+    }
+    snapshot_without_scalings = Snapshot(
+        parent_match_data=parent_match_data,
+        child_block_specs={},
+        scaling_trees={},
+    )
+    child_block_specs = _db.child_blocks.get_child_block_specs_by_parent(
+        con, snapshot_without_scalings.ecu_variant_ids
+    )
+
+    scaling_parser = _scaling.ScalingParser()
+    scaling_trees = {
+        spec.ppe_scaling: scaling_parser.parse(spec.ppe_scaling)
+        for specs in child_block_specs.values()
+        for spec in specs
+    }
+
+    return Snapshot(
+        parent_match_data=parent_match_data,
+        child_block_specs=child_block_specs,
+        scaling_trees=scaling_trees,
+    )
+
+
+def save(snapshot: Snapshot, path: str) -> None:
+    data = {
+        "format_version": FORMAT_VERSION,
+        "parent_match_data": {
+            ecu_identifier: [dataclasses.astuple(d) for d in match_datas]
+            for ecu_identifier, match_datas in snapshot.parent_match_data.items()
+        },
+        "child_block_specs": [
+            [ecu_variant_id, parent_block_id, [dataclasses.astuple(s) for s in specs]]
+            for (
+                ecu_variant_id,
+                parent_block_id,
+            ), specs in snapshot.child_block_specs.items()
+        ],
+        "scaling_trees": {
+            definition: _scaling.serialize_tree(tree)
+            for definition, tree in snapshot.scaling_trees.items()
+        },
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def load(path: str) -> Snapshot:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data: dict[str, Any] = json.load(f)
+
+    format_version = data.get("format_version", None)
+    if format_version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot format version: {format_version}. Expected: {FORMAT_VERSION}. Recreate the snapshot."
+        )
+
+    return Snapshot(
+        parent_match_data={
+            ecu_identifier: [
+                _db.matching.DbParentBlockMatchData(*d) for d in match_datas
+            ]
+            for ecu_identifier, match_datas in data["parent_match_data"].items()
+        },
+        child_block_specs={
+            (ecu_variant_id, parent_block_id): [
+                _db.child_blocks.DbChildBlockSpec(*s) for s in specs
+            ]
+            for ecu_variant_id, parent_block_id, specs in data["child_block_specs"]
+        },
+        scaling_trees={
+            definition: _scaling.deserialize_tree(tree)
+            for definition, tree in data["scaling_trees"].items()
+        },
+    )
@@ -0,0 +1,82 @@
+from typing import Callable, Iterator, Literal
+import contextlib
+import time
+from dataclasses import dataclass, field
+
+# "parse": reading and classifying lines and parsing the relevant ones
+# "load_specs": fetching match data and child block specs, and preprocessing them
+# "match": matching parameter reads to parent blocks (and grouping them)
+# "decode": extracting child block values from payloads
+# "scale": applying scalings to the values
+type Stage = (
+    Literal["parse"]
+    | Literal["load_specs"]
+    | Literal["match"]
+    | Literal["decode"]
+    | Literal["scale"]
+)
+
+# "no_child_specs": parent block without any child blocks for its ECU variant
+# "unsupported_data_type": child block of a data type that can't be decoded
+# "unsupported_length": child block that is longer than `_bus._layout.MAX_FIELD_BITS` or misplaced
+type SkipReason = (
+    Literal["no_child_specs"]
+    | Literal["unsupported_data_type"]
+    | Literal["unsupported_length"]
+)
+
+
+@dataclass
+class IngestionStats:
+    """
+    Counters and timings of a step of reading a session: ingesting a log file (or a poll of a
+    followed one), or converting the parameter reads ingested so far (`path` is `None`).
+
+    When parameters are streamed (`Reader.iter_params`), conversion happens while ingesting, so the
+    stats of a file include it.
+    """
+
+    path: str | None = None
+    ecu_count: int = 0
+    param_count: int = 0
+    # Only counted if the reader was created with `count_lines=True`. Lines that can't be relevant
+    # are skipped without being decoded, but they count as scanned.
+    lines_scanned: int = 0
+    # Lines relevant to the parsers (see `_log_parsing.common.classify_line`)
+    lines_matched: int = 0
+    # Wall time in seconds
+    stage_seconds: dict[Stage, float] = field(default_factory=dict)
+    # Parameter reads that matched no parent block (or had an invalid payload), by CAN id
+    unmatched_by_can_id: dict[str, int] = field(default_factory=dict)
+    # Parent blocks (`no_child_specs`) or child blocks skipped in conversion, by reason. Blocks are
+    # counted each time they're skipped.
+    skipped_blocks: dict[SkipReason, int] = field(default_factory=dict)
+    # Child block values skipped in conversion because the payload of their parameter read was
+    # too short to contain them
+    short_payload_count: int = 0
+
+    def add_time(self, stage: Stage, seconds: float) -> None:
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def timed(self, stage: Stage) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_remaining_time(self, stage: Stage, total_seconds: float) -> None:
+        """Attribute the part of `total_seconds` that isn't attributed to any stage yet to `stage`."""
+        remaining = total_seconds - sum(self.stage_seconds.values())
+        self.add_time(stage, max(remaining, 0.0))
+
+    def add_unmatched(self, can_id: str) -> None:
+        self.unmatched_by_can_id[can_id] = self.unmatched_by_can_id.get(can_id, 0) + 1
+
+    def add_skipped_block(self, reason: SkipReason) -> None:
+        self.skipped_blocks[reason] = self.skipped_blocks.get(reason, 0) + 1
+
+
+# Called with the stats of each step once it's complete, e.g. to export them as metrics
+type StatsHook = Callable[[IngestionStats], None]